@@ -1,4 +1,5 @@
 import os
+import click
 from flask import Flask, render_template, request, make_response
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -13,6 +14,11 @@ login_manager.login_message_category = 'info'
 migrate = Migrate()
 bcrypt = Bcrypt()
 
+def _running_cli_command():
+    """True when the app is being loaded by a `flask` command other than `flask run`."""
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.info_name != 'run'
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -26,7 +32,8 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     
-    # Create upload directories if they don't exist
+    # Create the instance folder (runtime state such as caches) and upload directories if they don't exist
+    os.makedirs(app.instance_path, exist_ok=True)
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(app.config['CV_FOLDER'], exist_ok=True)
     os.makedirs(app.config['PROFILE_PICS_FOLDER'], exist_ok=True)
@@ -44,6 +51,7 @@ def create_app(config_class=Config):
     from app.routes.history import history
     from app.routes.cv import cv
     from app.routes.profile import profile
+    from app.routes.admin import admin
     
     app.register_blueprint(main)
     app.register_blueprint(auth)
@@ -52,11 +60,31 @@ def create_app(config_class=Config):
     app.register_blueprint(history)
     app.register_blueprint(cv)
     app.register_blueprint(profile)
+    app.register_blueprint(admin)
+    
+    # Request, database, Gemini and upload metrics (no-op unless METRICS_ENABLED)
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+    
+    # Span tracing of requests and jobs (no-op unless TRACING_ENABLED)
+    from app.services.tracing import init_tracing
+    init_tracing(app)
     
     # Configure Gemini API
     from app.services.gemini_service import configure_gemini
     configure_gemini()
     
+    # Start the background job queue (handlers are registered by the blueprints above),
+    # except under CLI commands such as `flask db upgrade` that only need the app context
+    from app.services.job_queue import job_queue
+    job_queue.init_app(app)
+    if not _running_cli_command():
+        job_queue.start()
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Middleware to check UI preference
     @app.after_request
     def check_ui_preference(response):
@@ -0,0 +1,227 @@
+import threading
+import click
+from flask.cli import AppGroup
+
+jobs_cli = AppGroup('jobs', help='Background job queue commands.')
+
+@jobs_cli.command('work')
+@click.option('--max-jobs', type=int, default=None, help='Exit after processing this many jobs.')
+def work(max_jobs):
+    """Poll the job table and process queued jobs (database backend)."""
+    from app.services.job_queue import job_queue, DatabaseBackend
+    
+    if not isinstance(job_queue.backend, DatabaseBackend):
+        raise click.ClickException("`flask jobs work` requires JOB_QUEUE_BACKEND=database.")
+    
+    click.echo(f"Worker {job_queue.worker_id} polling for jobs (Ctrl+C to stop)...")
+    stop_event = threading.Event()
+    try:
+        processed = job_queue.backend.work(stop_event, max_jobs=max_jobs)
+    except KeyboardInterrupt:
+        stop_event.set()
+        processed = None
+    
+    if processed is not None:
+        click.echo(f"Processed {processed} jobs.")
+
+@jobs_cli.command('status')
+def status():
+    """Show the number of jobs in each state."""
+    from app import db
+    from app.models import Job
+    
+    rows = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+    if not rows:
+        click.echo("No jobs recorded.")
+    for job_status, count in rows:
+        click.echo(f"{job_status:<10} {count}")
+
+gemini_cli = AppGroup('gemini', help='Gemini API commands.')
+
+@gemini_cli.command('cache-stats')
+def cache_stats():
+    """
+    Show the response cache's backend, size and limits.
+    
+    Hit and miss counters live in each app process, so this command would
+    always report 0/0; the hit rate is exported as the gemini_cache_lookups
+    metric, and `flask usage report` shows cached calls from the usage ledger.
+    """
+    from app.services.response_cache import get_response_cache
+    
+    cache = get_response_cache()
+    if cache is None:
+        click.echo("Response cache is disabled (GEMINI_CACHE_BACKEND=none).")
+        return
+    process_counters = ('hits', 'misses', 'hit_rate')
+    for key, value in cache.stats().items():
+        if key not in process_counters:
+            click.echo(f"{key:<12} {value}")
+    click.echo("Hit rates: see the gemini_cache_lookups_total metric or `flask usage report`.")
+
+@gemini_cli.command('cache-clear')
+def cache_clear():
+    """Remove every cached Gemini response."""
+    from app.services.response_cache import get_response_cache
+    
+    cache = get_response_cache()
+    if cache is not None:
+        cache.clear()
+    click.echo("Response cache cleared.")
+
+transcripts_cli = AppGroup('transcripts', help='Audio transcript cache commands.')
+
+@transcripts_cli.command('stats')
+def transcripts_stats():
+    """Show the transcript dedup hit rate for capacity planning."""
+    from app.services.transcription_service import TranscriptionService
+    
+    for key, value in TranscriptionService.dedup_stats().items():
+        click.echo(f"{key:<24} {value}")
+
+cvs_cli = AppGroup('cvs', help='CV commands.')
+
+@cvs_cli.command('backfill-text')
+@click.option('--batch-size', type=int, default=100, show_default=True, help='CV rows per batch.')
+def backfill_text(batch_size):
+    """Extract and store the text of existing CV files."""
+    from app.services.cv_service import CVService
+    
+    stats = CVService.backfill_text(batch_size=batch_size)
+    for key, value in stats.items():
+        click.echo(f"{key:<10} {value}")
+
+answers_cli = AppGroup('answers', help='Interview answer commands.')
+
+def _format_eta(seconds):
+    if seconds is None:
+        return "unknown"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+@answers_cli.command('rescore')
+@click.option('--batch-size', type=int, default=50, show_default=True, help='Answers fetched and reviewed per batch.')
+@click.option('--concurrency', type=int, default=None, help='Reviews in flight at once (default: GEMINI_MAX_CONCURRENCY).')
+@click.option('--rpm', type=int, default=None, help='Requests per minute budget for this run (default: GEMINI_RPM).')
+@click.option('--model', default=None, help='Gemini model to review with (default: GEMINI_MODEL).')
+@click.option('--limit', type=int, default=None, help='Stop after this many answers.')
+@click.option('--checkpoint', 'checkpoint_path', default=None, help='Checkpoint file (default: RESCORE_CHECKPOINT_FILE).')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first answer.')
+@click.option('--use-cache', is_flag=True, help='Allow cached responses instead of requesting fresh reviews.')
+def rescore(batch_size, concurrency, rpm, model, limit, checkpoint_path, restart, use_cache):
+    """Re-run reviews for answered questions and update ratings in bulk, resuming from the checkpoint."""
+    from flask import current_app
+    from app.services.rate_limiter import configure_rate_limiter
+    from app.services.rescore_service import AnswerRescorer, RescoreCheckpoint
+    
+    checkpoint_path = checkpoint_path or current_app.config['RESCORE_CHECKPOINT_FILE']
+    checkpoint = None if restart else RescoreCheckpoint.load(checkpoint_path)
+    if checkpoint:
+        if model and model != checkpoint.model:
+            raise click.ClickException(f"Checkpoint was made with {checkpoint.model}; pass --restart to re-score with {model}.")
+        click.echo(f"Resuming after answer {checkpoint.last_answer_id} ({checkpoint.processed} already processed).")
+    else:
+        checkpoint = RescoreCheckpoint(checkpoint_path, model=model or current_app.config['GEMINI_MODEL'])
+    
+    # This process's limiter enforces the run's budget
+    limiter = configure_rate_limiter(requests_per_minute=rpm, max_concurrency=concurrency)
+    
+    rescorer = AnswerRescorer(
+        checkpoint,
+        batch_size=batch_size,
+        concurrency=limiter.max_concurrency,
+        use_cache=use_cache,
+        limit=limit
+    )
+    click.echo(f"Re-scoring {rescorer.remaining()} answers with {checkpoint.model} "
+               f"({limiter.max_concurrency} concurrent, {rpm or current_app.config['GEMINI_RPM']} rpm)...")
+    
+    def report(stats):
+        click.echo(f"{stats['done']}/{stats['total']} answers ({stats['updated']} updated, {stats['failed']} failed) | "
+                   f"{stats['answers_per_minute']} answers/min | ETA {_format_eta(stats['eta_seconds'])}")
+    
+    try:
+        rescorer.run(progress=report)
+    except KeyboardInterrupt:
+        click.echo(f"Interrupted. Run again to resume after answer {checkpoint.last_answer_id}.")
+        return
+    
+    click.echo(f"Done. {checkpoint.updated} answers updated in total; checkpoint at {checkpoint_path}.")
+    if checkpoint.failed_ids:
+        click.echo(f"{len(checkpoint.failed_ids)} answers failed and were left unchanged: {checkpoint.failed_ids[:20]}")
+
+stats_cli = AppGroup('stats', help='Per-user summary statistics commands.')
+
+@stats_cli.command('rebuild')
+@click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only rebuild these users (repeatable).')
+def rebuild_stats(user_ids):
+    """Recompute user_stats and user_rating_stats from the interview and CV tables."""
+    from app import db
+    from app.models import UserStats
+    from app.services.stats_service import rebuild_user_stats
+    
+    user_ids = list(user_ids) or None
+    
+    # Snapshot the current counters to report drift
+    query = db.session.query(
+        UserStats.user_id, UserStats.interview_count, UserStats.completed_interview_count, UserStats.cv_count
+    )
+    if user_ids:
+        query = query.filter(UserStats.user_id.in_(user_ids))
+    before = {row[0]: tuple(row[1:]) for row in query}
+    
+    rebuilt = rebuild_user_stats(user_ids)
+    db.session.commit()
+    
+    after = {row[0]: tuple(row[1:]) for row in query}
+    drifted = [user_id for user_id, counts in after.items() if user_id in before and before[user_id] != counts]
+    missing = [user_id for user_id in after if user_id not in before]
+    
+    click.echo(f"Rebuilt stats for {rebuilt} users ({len(drifted)} had drifted, {len(missing)} had no row).")
+    if drifted:
+        click.echo(f"Drifted users: {drifted[:20]}")
+
+usage_cli = AppGroup('usage', help='Gemini usage ledger commands.')
+
+@usage_cli.command('report')
+@click.option('--by', 'group_by', type=click.Choice(['day', 'user', 'call_type', 'model']), multiple=True,
+              help='Group by these columns, in order (repeatable; default: day and call_type).')
+@click.option('--days', type=int, default=7, show_default=True, help='Look-back window in days (0 for all time).')
+@click.option('--user-id', type=int, default=None, help='Only include calls made for this user.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+def usage_report_command(group_by, days, user_id, as_json):
+    """Aggregate Gemini calls, tokens, latency and estimated cost from the usage ledger."""
+    import json
+    from app.services.usage_service import usage_report
+    
+    group_by = list(group_by) or ['day', 'call_type']
+    rows = usage_report(group_by, days=days or None, user_id=user_id)
+    totals = usage_report((), days=days or None, user_id=user_id)[0]
+    
+    if as_json:
+        click.echo(json.dumps({'rows': rows, 'totals': totals}, indent=2))
+        return
+    
+    header = list(group_by) + ['calls', 'cached', 'failed', 'retries', 'input', 'output', 'audio',
+                                            'avg ms', 'max ms', 'cost $']
+    keys = group_by + ['calls', 'cache_hits', 'failures', 'retries', 'input_tokens', 'output_tokens', 'audio_tokens',
+                       'avg_latency_ms', 'max_latency_ms', 'estimated_cost_usd']
+    totals.update({name: 'TOTAL' if index == 0 else '' for index, name in enumerate(group_by)})
+    
+    table = [header] + [[str(row[key]) if row[key] is not None else '-' for key in keys] for row in rows + [totals]]
+    widths = [max(len(line[column]) for line in table) for column in range(len(header))]
+    for number, line in enumerate(table):
+        click.echo("  ".join(value.rjust(width) for value, width in zip(line, widths)))
+        if number == 0 or number == len(table) - 2:
+            click.echo("  ".join('-' * width for width in widths))
+
+def register_commands(app):
+    """Register custom Flask CLI commands."""
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(gemini_cli)
+    app.cli.add_command(transcripts_cli)
+    app.cli.add_command(cvs_cli)
+    app.cli.add_command(answers_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(usage_cli)
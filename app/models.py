@@ -15,8 +15,8 @@ class User(UserMixin, db.Model):
     full_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
-    profile_picture = db.Column(db.String(100), default='default.jpg')
-    actual_cv = db.Column(db.String(100), nullable=True)
+    profile_picture = db.Column(db.String(255), default='default.jpg')  # Storage key, or a bare filename in profile_pics/
+    actual_cv = db.Column(db.String(255), nullable=True)  # Storage key
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     interviews = db.relationship('Interview', backref='user', lazy=True)
@@ -47,6 +47,10 @@ class Question(db.Model):
     
     answers = db.relationship('Answer', backref='question', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_question_profession_id_grade', 'profession_id', 'grade'),
+    )
+    
     def __repr__(self):
         return f'<Question {self.id}: {self.question_text[:30]}...>'
 
@@ -59,9 +63,14 @@ class Interview(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     
-    answers = db.relationship('Answer', backref='interview', lazy=True)
+    answers = db.relationship('Answer', backref='interview', lazy=True, order_by='Answer.id')
     profession = db.relationship('Profession')
     
+    __table_args__ = (
+        db.Index('ix_interview_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_interview_user_id_profession_id_grade', 'user_id', 'profession_id', 'grade'),
+    )
+    
     def __repr__(self):
         return f'<Interview {self.id}: {self.profession.name} - {self.grade}>'
 
@@ -69,12 +78,22 @@ class Answer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
-    audio_path = db.Column(db.String(255), nullable=True)
+    audio_path = db.Column(db.String(255), nullable=True)  # Storage key (older rows: absolute path under UPLOAD_FOLDER)
+    audio_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the uploaded audio
+    audio_size = db.Column(db.Integer, nullable=True)  # Bytes
     transcribed_text = db.Column(db.Text, nullable=True)
     feedback = db.Column(db.Text, nullable=True)
     rating = db.Column(db.Float, nullable=True)
+    # Fields of a structured review (REVIEW_OUTPUT_MODE=structured); None for markdown reviews
+    review_overall = db.Column(db.Text, nullable=True)
+    review_strengths = db.Column(db.JSON, nullable=True)  # List of strings
+    review_improvements = db.Column(db.JSON, nullable=True)  # List of strings
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_answer_interview_id', 'interview_id'),
+    )
+    
     def __repr__(self):
         return f'<Answer {self.id} for Question {self.question_id}>'
 
@@ -82,9 +101,138 @@ class CV(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
-    file_path = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(255), nullable=False)  # Storage key (older rows: absolute path under UPLOAD_FOLDER)
+    content_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the PDF
+    file_size = db.Column(db.Integer, nullable=True)  # Bytes
     review = db.Column(db.Text, nullable=True)
+    review_status = db.Column(db.String(20), nullable=True)  # pending, processing, completed, failed; None if no review was requested
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_cv_user_id_uploaded_at', 'user_id', 'uploaded_at'),
+        db.Index('ix_cv_file_path', 'file_path'),
+    )
+    
+    def __repr__(self):
+        return f'<CV {self.id}: {self.filename}>'
+
+class Job(db.Model):
+    id = db.Column(db.String(36), primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    payload = db.Column(db.Text, nullable=True)  # JSON-encoded handler arguments
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    result = db.Column(db.Text, nullable=True)  # JSON-encoded handler return value
+    progress = db.Column(db.Text, nullable=True)  # JSON-encoded partial output reported while running
+    error = db.Column(db.Text, nullable=True)
+    worker_id = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_job_status_created_at', 'status', 'created_at'),
+    )
+    
+    def get_payload(self):
+        return json.loads(self.payload) if self.payload else {}
+    
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+    
+    def get_progress(self):
+        return json.loads(self.progress) if self.progress else None
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'result': self.get_result(),
+            'progress': self.get_progress(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id}: {self.job_type} ({self.status})>'
+
+class AudioTranscript(db.Model):
+    audio_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the audio bytes
+    transcript = db.Column(db.Text, nullable=False)
+    mime_type = db.Column(db.String(50), nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=True)  # Bytes of the original recording
+    sent_bytes = db.Column(db.Integer, nullable=True)  # Bytes uploaded to the API after preprocessing
+    hit_count = db.Column(db.Integer, nullable=False, default=0)  # Duplicate submissions served from this row
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AudioTranscript {self.audio_hash[:12]} ({self.hit_count} hits)>'
+
+class CVText(db.Model):
+    content_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the PDF
+    text = db.Column(db.Text, nullable=False)  # Empty if the PDF has no text layer
+    page_count = db.Column(db.Integer, nullable=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)  # Extractions served from this row
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CVText {self.content_hash[:12]} ({len(self.text)} chars)>'
+
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    interview_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_interview_count = db.Column(db.Integer, nullable=False, default=0)
+    cv_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def in_progress_interview_count(self):
+        return self.interview_count - self.completed_interview_count
+    
+    def __repr__(self):
+        return f'<UserStats {self.user_id}: {self.interview_count} interviews, {self.cv_count} CVs>'
+
+class UserRatingStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    profession_id = db.Column(db.Integer, db.ForeignKey('profession.id'), primary_key=True)
+    grade = db.Column(db.String(20), primary_key=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)  # Completed interviews with an overall rating
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0)
+    best_rating = db.Column(db.Float, nullable=True)
+    
+    profession = db.relationship('Profession')
+    
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.completed_count, 1) if self.completed_count else None
+    
+    def __repr__(self):
+        return f'<UserRatingStats {self.user_id}/{self.profession_id}/{self.grade}: {self.completed_count} rated>'
+
+class GeminiUsage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    call_type = db.Column(db.String(30), nullable=False)  # transcription, answer_review, fused_answer_review, cv_review
+    model = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # None for calls not made on a user's behalf
+    input_tokens = db.Column(db.Integer, nullable=False, default=0)  # Prompt tokens, including audio_tokens
+    output_tokens = db.Column(db.Integer, nullable=False, default=0)
+    audio_tokens = db.Column(db.Integer, nullable=False, default=0)
+    estimated = db.Column(db.Boolean, nullable=False, default=False)  # Token counts estimated because the API didn't report them
+    latency_ms = db.Column(db.Integer, nullable=False, default=0)  # Including rate limiter waits and retries
+    retries = db.Column(db.Integer, nullable=False, default=0)
+    cache_hit = db.Column(db.Boolean, nullable=False, default=False)  # Served from a cache without an API call
+    success = db.Column(db.Boolean, nullable=False, default=True)
+    
+    __table_args__ = (
+        db.Index('ix_gemini_usage_created_at', 'created_at'),
+        db.Index('ix_gemini_usage_user_id_created_at', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
-        return f'<CV {self.id}: {self.filename}>'
\ No newline at end of file
+        return f'<GeminiUsage {self.id}: {self.call_type} ({self.input_tokens}+{self.output_tokens} tokens)>'
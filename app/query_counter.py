@@ -0,0 +1,57 @@
+import threading
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+class QueryCounter:
+    """
+    Context manager that records SQL statements executed by the current thread.
+    
+    Usage:
+        with QueryCounter() as counter:
+            interview_service.get_interview_details(interview_id)
+        print(counter.count, counter.statements)
+    """
+    
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+        self._thread_id = None
+    
+    @property
+    def count(self):
+        return len(self.statements)
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Ignore queries from other threads, e.g. background job workers
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+    
+    def __enter__(self):
+        self.engine = self.engine or db.engine
+        self._thread_id = threading.get_ident()
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+@contextmanager
+def assert_max_queries(max_queries, engine=None):
+    """
+    Fail if the wrapped block runs more than `max_queries` SQL statements.
+    
+    Args:
+        max_queries: Maximum number of statements allowed
+        engine: Engine to watch (defaults to db.engine)
+        
+    Raises:
+        AssertionError: Listing every statement when the limit is exceeded
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+    
+    if counter.count > max_queries:
+        statements = "\n".join(f"  {i + 1}. {statement}" for i, statement in enumerate(counter.statements))
+        raise AssertionError(f"Expected at most {max_queries} queries, got {counter.count}:\n{statements}")
@@ -0,0 +1,43 @@
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+from app.services.usage_service import GROUP_COLUMNS, usage_report
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+def admin_required(view):
+    """Restrict a JSON view to logged-in users listed in ADMIN_EMAILS."""
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.email.lower() not in current_app.config['ADMIN_EMAILS']:
+            return jsonify({'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
+@admin.route('/usage')
+@admin_required
+def usage():
+    """
+    Gemini usage ledger aggregates as JSON.
+    
+    Query parameters:
+        group_by: Comma-separated grouping (day, user, call_type, model); default day,user,call_type
+        days: Look-back window in days (default 7, 0 for all time)
+        user_id: Only include calls made for this user
+    """
+    group_by = [name.strip() for name in request.args.get('group_by', 'day,user,call_type').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in GROUP_COLUMNS]
+    if unknown:
+        return jsonify({'error': f"Unknown group_by value(s): {', '.join(unknown)}"}), 400
+    
+    days = request.args.get('days', 7, type=int)
+    user_id = request.args.get('user_id', type=int)
+    
+    return jsonify({
+        'group_by': group_by,
+        'days': days or None,
+        'user_id': user_id,
+        'totals': usage_report((), days=days or None, user_id=user_id)[0],
+        'rows': usage_report(group_by, days=days or None, user_id=user_id)
+    })
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
-from app.models import Profession, Question, Interview
-from sqlalchemy import func
+from app.models import Profession, Interview
+from app.services.catalog_service import get_catalog, GRADES
 from datetime import datetime
 
 catalog = Blueprint('catalog', __name__)
@@ -9,19 +9,11 @@ catalog = Blueprint('catalog', __name__)
 @catalog.route('/catalog')
 @login_required
 def index():
-    # Get all professions
-    professions = Profession.query.all()
+    # Get all professions and the cached question count matrix
+    professions, profession_grade_counts = get_catalog()
     
     # Get all grades
-    grades = ['Junior', 'Middle', 'Senior']
-    
-    # Get count of questions for each profession/grade combination
-    profession_grade_counts = {}
-    for profession in professions:
-        profession_grade_counts[profession.id] = {}
-        for grade in grades:
-            count = Question.query.filter_by(profession_id=profession.id, grade=grade).count()
-            profession_grade_counts[profession.id][grade] = count
+    grades = GRADES
     
     # Check if user has modern UI preference in cookies
     ui_preference = request.cookies.get('ai_interview_ui')
@@ -46,29 +38,18 @@ def filter_catalog():
     grade = request.args.get('grade')
     search = request.args.get('search', '')
     
-    # Base query
-    query = Profession.query
+    # Filter the cached catalog instead of querying per request
+    professions, profession_grade_counts = get_catalog()
     
     # Apply filters
     if profession_id:
-        query = query.filter_by(id=profession_id)
+        professions = [p for p in professions if str(p.id) == profession_id]
     
     if search:
-        query = query.filter(Profession.name.ilike(f'%{search}%'))
-    
-    # Get results
-    professions = query.all()
+        professions = [p for p in professions if search.lower() in p.name.lower()]
     
     # Filter grades if specified
-    grades = [grade] if grade else ['Junior', 'Middle', 'Senior']
-    
-    # Get count of questions for each profession/grade combination
-    profession_grade_counts = {}
-    for profession in professions:
-        profession_grade_counts[profession.id] = {}
-        for g in grades:
-            count = Question.query.filter_by(profession_id=profession.id, grade=g).count()
-            profession_grade_counts[profession.id][g] = count
+    grades = [grade] if grade in GRADES else GRADES
     
     # Check if user has modern UI preference in cookies
     ui_preference = request.cookies.get('ai_interview_ui')
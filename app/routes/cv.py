@@ -1,16 +1,38 @@
-import os
-from flask import Blueprint, render_template, request, current_app, redirect, url_for, flash, send_from_directory
+from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app import db
 from app.models import CV
 from app.services.cv_service import CVService
-from werkzeug.utils import secure_filename
-import uuid
+from app.services import stats_service
+from app.services.job_queue import job_queue, JobError, QueueFullError
+from app.services.upload_service import save_upload, UploadTooLargeError
+from app.services.storage import get_storage, send_stored_file
 from datetime import datetime
 
 cv = Blueprint('cv', __name__)
 cv_service = CVService()
 
+@job_queue.handler('process_cv')
+def process_cv_job(cv_id):
+    """Background job: extract the text of an uploaded CV and review it."""
+    cv_record, error = cv_service.review_cv_record(cv_id)
+    
+    if error:
+        raise JobError(error)
+    
+    return {
+        'cv_id': cv_record.id,
+        'review_status': cv_record.review_status
+    }
+
+@job_queue.failure_handler('process_cv')
+def process_cv_failed(error, cv_id):
+    """Mark the review as failed when its job crashes or is reaped, so the CV page stops waiting."""
+    CV.query.filter(CV.id == cv_id, CV.review_status.in_(['pending', 'processing'])).update({
+        'review_status': 'failed',
+        'review': f"Error: {error}"
+    }, synchronize_session=False)
+
 def allowed_file(filename):
     """Check if the file has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
@@ -57,30 +79,39 @@ def upload():
             return redirect(request.url)
         
         try:
-            # Generate a unique filename
-            filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-            file_path = os.path.join(current_app.config['CV_FOLDER'], filename)
-            
-            # Save the file
-            file.save(file_path)
+            # Stream the file to storage, hashing it and enforcing the size limit in one pass
+            upload = save_upload(file, 'cvs', current_app.config['CV_MAX_BYTES'])
             
-            # Process the CV using the service
-            review = cv_service.process_cv(file_path)
-            
-            # Create a CV record in the database
+            # Create the CV record right away; the review is filled in by a background job
             cv_record = CV(
                 user_id=current_user.id,
                 filename=file.filename,
-                file_path=file_path,
-                review=review
+                file_path=upload.key,
+                content_hash=upload.sha256,
+                file_size=upload.size,
+                review_status='pending'
             )
             
             db.session.add(cv_record)
+            stats_service.record_cv_added(current_user.id)
             db.session.commit()
             
-            flash('CV uploaded and reviewed successfully!', 'success')
+            # Queue the text extraction and review
+            try:
+                job_queue.enqueue('process_cv', user_id=current_user.id, cv_id=cv_record.id)
+            except QueueFullError as e:
+                cv_record.review_status = 'failed'
+                cv_record.review = f"Error: {str(e)}"
+                db.session.commit()
+                flash(str(e), 'warning')
+                return redirect(url_for('cv.view', cv_id=cv_record.id))
+            
+            flash('CV uploaded successfully! The AI review will appear shortly.', 'success')
             return redirect(url_for('cv.view', cv_id=cv_record.id))
             
+        except UploadTooLargeError as e:
+            flash(str(e), 'danger')
+            return redirect(request.url)
         except Exception as e:
             flash(f'Error uploading CV: {str(e)}', 'danger')
             return redirect(request.url)
@@ -115,6 +146,23 @@ def view(cv_id):
         year=year
     )
 
+@cv.route('/cvs/status/<int:cv_id>')
+@login_required
+def status(cv_id):
+    # Get the CV
+    cv_record = CV.query.get(cv_id)
+    
+    # Hide CVs that belong to other users
+    if not cv_record or cv_record.user_id != current_user.id:
+        return jsonify({'success': False, 'error': 'CV not found'}), 404
+    
+    return jsonify({
+        'success': cv_record.review_status != 'failed',
+        'cv_id': cv_record.id,
+        'review_status': cv_record.review_status,
+        'view_url': url_for('cv.view', cv_id=cv_record.id)
+    })
+
 @cv.route('/cvs/download/<int:cv_id>')
 @login_required
 def download(cv_id):
@@ -126,17 +174,12 @@ def download(cv_id):
         flash('You do not have permission to download this CV.', 'danger')
         return redirect(url_for('cv.index'))
     
-    # Get the directory and filename
-    directory = os.path.dirname(cv_record.file_path)
-    filename = os.path.basename(cv_record.file_path)
-    
-    # Send the file
-    return send_from_directory(
-        directory, 
-        filename, 
-        as_attachment=True, 
-        download_name=cv_record.filename
-    )
+    # Stream the file from storage, supporting resumed and partial downloads
+    try:
+        return send_stored_file(cv_record.file_path, download_name=cv_record.filename, as_attachment=True)
+    except (FileNotFoundError, ValueError):
+        flash('The CV file could not be found.', 'danger')
+        return redirect(url_for('cv.index'))
 
 @cv.route('/cvs/delete/<int:cv_id>', methods=['POST'])
 @login_required
@@ -151,11 +194,11 @@ def delete(cv_id):
     
     try:
         # Delete the file if it exists
-        if os.path.exists(cv_record.file_path):
-            os.remove(cv_record.file_path)
+        get_storage().delete(cv_record.file_path)
         
         # Delete the database record
         db.session.delete(cv_record)
+        stats_service.record_cv_deleted(current_user.id)
         db.session.commit()
         
         flash('CV deleted successfully!', 'success')
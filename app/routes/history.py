@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, current_app
 from flask_login import login_required, current_user
-from app.models import Interview, Profession
+from app.models import Interview
 from app.services.interview_service import InterviewService
+from app.services.history_service import get_history_page
 from datetime import datetime
 
 history = Blueprint('history', __name__)
@@ -10,26 +11,20 @@ interview_service = InterviewService()
 @history.route('/history')
 @login_required
 def index():
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after')
+    before = request.args.get('before')
     min_rating = request.args.get('min_rating')
     max_rating = request.args.get('max_rating')
     
-    # Base query for user's interviews
-    query = Interview.query.filter_by(user_id=current_user.id)
-    
-    # Apply rating filters if provided
-    if min_rating:
-        query = query.filter(Interview.overall_rating >= float(min_rating))
-    if max_rating:
-        query = query.filter(Interview.overall_rating <= float(max_rating))
-    
-    # Get paginated results
-    interviews = query.order_by(Interview.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False)
-    
-    # Get profession names for each interview
-    for interview in interviews.items:
-        interview.profession_name = Profession.query.get(interview.profession_id).name
+    # Get the page of interviews around the cursor, newest first
+    interviews = get_history_page(
+        current_user.id,
+        min_rating=float(min_rating) if min_rating else None,
+        max_rating=float(max_rating) if max_rating else None,
+        after=after,
+        before=before,
+        per_page=current_app.config['HISTORY_PER_PAGE']
+    )
     
     # Check if user has modern UI preference in cookies
     ui_preference = request.cookies.get('ai_interview_ui')
@@ -1,16 +1,54 @@
-import os
-from flask import Blueprint, render_template, request, jsonify, current_app, url_for, redirect, flash
+import json
+import time
+from flask import Blueprint, Response, render_template, request, jsonify, current_app, url_for, redirect, flash, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from app.models import Profession, Question, Interview, Answer
 from app.services.interview_service import InterviewService
-from werkzeug.utils import secure_filename
-import uuid
+from app.services.job_queue import job_queue, JobError, QueueFullError
+from app.services.upload_service import save_upload, UploadTooLargeError
+from app.services.storage import get_storage
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 interview = Blueprint('interview', __name__)
 interview_service = InterviewService()
 
+# Seconds between partial-review writes while an answer job streams
+PROGRESS_REPORT_INTERVAL = 0.5
+# Seconds of silence after which the answer stream sends a comment to keep proxies from closing it
+SSE_KEEPALIVE_SECONDS = 15
+
+@job_queue.handler('process_answer')
+def process_answer_job(answer_id, audio_path):
+    """Background job: transcribe and review a submitted answer, reporting the partial review as it streams."""
+    progress = {}
+    last_report = 0.0
+    for event, data in interview_service.stream_answer(answer_id, audio_path):
+        if event == 'transcribed':
+            progress = {'transcript': data['transcript'], 'feedback': ''}
+            job_queue.report_progress(progress)
+            last_report = time.monotonic()
+        elif event == 'feedback':
+            progress['feedback'] += data['text']
+            # Chunks arrive every few tokens; don't write the row for each one
+            if time.monotonic() - last_report >= PROGRESS_REPORT_INTERVAL:
+                job_queue.report_progress(progress)
+                last_report = time.monotonic()
+        elif event == 'error':
+            raise JobError(data['error'])
+        elif event == 'complete':
+            return data
+    
+    raise JobError("Answer processing ended unexpectedly.")
+
+def _get_answer_or_404(answer_id):
+    """Load an answer with its question, interview and profession in a single query."""
+    return Answer.query.options(
+        joinedload(Answer.question),
+        joinedload(Answer.interview).joinedload(Interview.profession)
+    ).get_or_404(answer_id)
+
 def allowed_audio_file(filename):
     """Check if the file has an allowed audio extension."""
     ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'flac', 'webm', 'm4a'}
@@ -37,8 +75,8 @@ def start_interview(profession_id, grade):
 @interview.route('/interview/process/<int:interview_id>')
 @login_required
 def process(interview_id):
-    # Get the interview
-    interview_obj = Interview.query.get_or_404(interview_id)
+    # Get the interview with its profession
+    interview_obj = Interview.query.options(joinedload(Interview.profession)).get_or_404(interview_id)
     
     # Check if the user owns this interview
     if interview_obj.user_id != current_user.id:
@@ -46,7 +84,7 @@ def process(interview_id):
         return redirect(url_for('catalog.index'))
     
     # Get the profession
-    profession = Profession.query.get(interview_obj.profession_id)
+    profession = interview_obj.profession
     
     # Get questions for this interview
     questions, error = interview_service.get_interview_questions(interview_id)
@@ -74,20 +112,20 @@ def process(interview_id):
 @interview.route('/interview/question/<int:answer_id>')
 @login_required
 def question(answer_id):
-    # Get the answer (which links to question)
-    answer = Answer.query.get_or_404(answer_id)
+    # Get the answer with its question, interview and profession
+    answer = _get_answer_or_404(answer_id)
     
     # Check if the user owns this answer
-    interview_obj = Interview.query.get(answer.interview_id)
+    interview_obj = answer.interview
     if interview_obj.user_id != current_user.id:
         flash('You do not have permission to access this question.', 'danger')
         return redirect(url_for('catalog.index'))
     
     # Get the question
-    question = Question.query.get(answer.question_id)
+    question = answer.question
     
     # Get the profession
-    profession = Profession.query.get(interview_obj.profession_id)
+    profession = interview_obj.profession
     
     # Check if user has modern UI preference in cookies
     ui_preference = request.cookies.get('ai_interview_ui')
@@ -106,53 +144,70 @@ def question(answer_id):
         year=year
     )
 
-@interview.route('/interview/submit_answer/<int:answer_id>', methods=['POST'])
-@login_required
-def submit_answer(answer_id):
-    # Get the answer
-    answer = Answer.query.get_or_404(answer_id)
+def _receive_answer_upload(answer_id):
+    """
+    Validate an answer submission and stream its recording to disk.
+    
+    Returns:
+        Tuple of (answer, upload, error response). The upload is None when the
+        answer already has feedback; the error response is a (json, status) pair.
+    """
+    # Get the answer with its interview
+    answer = Answer.query.options(joinedload(Answer.interview)).get_or_404(answer_id)
     
     # Check if the user owns this answer
-    interview_obj = Interview.query.get(answer.interview_id)
+    interview_obj = answer.interview
     if interview_obj.user_id != current_user.id:
-        return jsonify({'success': False, 'error': 'Unauthorized access'}), 403
+        return answer, None, (jsonify({'success': False, 'error': 'Unauthorized access'}), 403)
     
     # Check if an audio file was uploaded
     if 'audio' not in request.files:
-        return jsonify({'success': False, 'error': 'No audio file provided'}), 400
+        return answer, None, (jsonify({'success': False, 'error': 'No audio file provided'}), 400)
     
     file = request.files['audio']
     
     # If the user didn't select a file
     if file.filename == '':
-        return jsonify({'success': False, 'error': 'No audio file selected'}), 400
+        return answer, None, (jsonify({'success': False, 'error': 'No audio file selected'}), 400)
     
     # Check if the file is allowed
     if not allowed_audio_file(file.filename):
-        return jsonify({'success': False, 'error': 'Invalid file format'}), 400
+        return answer, None, (jsonify({'success': False, 'error': 'Invalid file format'}), 400)
     
+    # Stream the file to storage, hashing it and enforcing the size limit in one pass
     try:
-        # Check file size (limit to 10MB)
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)  # Reset file pointer
-        
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            return jsonify({'success': False, 'error': 'File too large (max 10MB)'}), 400
-        
-        # Generate a unique filename
-        filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-        file_path = os.path.join(current_app.config['AUDIO_FOLDER'], filename)
-        
-        # Save the file
-        file.save(file_path)
+        upload = save_upload(file, 'audio', current_app.config['AUDIO_MAX_BYTES'])
+    except UploadTooLargeError as e:
+        return answer, None, (jsonify({'success': False, 'error': str(e)}), 400)
+    
+    # Check if the file was already processed
+    if answer.feedback:
+        # Delete the newly uploaded file as we don't need it
+        get_storage().delete(upload.key)
+        return answer, None, None
+    
+    # Record the upload's identity so later stages don't re-read the file
+    answer.audio_path = upload.key
+    answer.audio_hash = upload.sha256
+    answer.audio_size = upload.size
+    db.session.commit()
+    
+    return answer, upload, None
+
+def _sse_event(event, data):
+    """Format a Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@interview.route('/interview/submit_answer/<int:answer_id>', methods=['POST'])
+@login_required
+def submit_answer(answer_id):
+    try:
+        answer, upload, error_response = _receive_answer_upload(answer_id)
+        if error_response:
+            return error_response
         
-        # Check if the file was already processed
-        if answer.feedback:
-            # Delete the newly uploaded file as we don't need it
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            
+        # Return the existing feedback if the answer was already processed
+        if upload is None:
             return jsonify({
                 'success': True, 
                 'feedback': answer.feedback,
@@ -160,40 +215,170 @@ def submit_answer(answer_id):
                 'next_url': url_for('interview.process', interview_id=answer.interview_id)
             })
         
-        # Process the answer using the service
-        answer, error = interview_service.process_answer(answer_id, file_path)
+        # Queue the answer for background processing
+        try:
+            job = job_queue.enqueue(
+                'process_answer',
+                user_id=current_user.id,
+                answer_id=answer_id,
+                audio_path=upload.key
+            )
+        except QueueFullError as e:
+            get_storage().delete(upload.key)
+            return jsonify({'success': False, 'error': str(e)}), 503
         
-        if error:
-            return jsonify({'success': False, 'error': error}), 500
-        
-        # Return success with the feedback
+        # Return the job id immediately; the client polls the status endpoint
         return jsonify({
-            'success': True, 
-            'feedback': answer.feedback,
-            'rating': answer.rating,
-            'next_url': url_for('interview.process', interview_id=answer.interview_id)
-        })
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('interview.job_status', job_id=job.id)
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@interview.route('/interview/submit_answer/<int:answer_id>/stream', methods=['POST'])
+@login_required
+def submit_answer_stream(answer_id):
+    """
+    Queue an answer like submit_answer, then relay the job's progress as Server-Sent Events.
+    
+    Transcription and review run on the job queue; this request only watches
+    the job row, so it works whichever process picks the job up.
+    
+    Events: "uploaded", "started", "transcribed", "feedback" (new review text
+    since the last event), then "complete" with the rating and next_url, or "error".
+    """
+    try:
+        answer, upload, error_response = _receive_answer_upload(answer_id)
+        if error_response:
+            return error_response
         
+        job = None
+        if upload is not None:
+            try:
+                job = job_queue.enqueue(
+                    'process_answer',
+                    user_id=current_user.id,
+                    answer_id=answer_id,
+                    audio_path=upload.key
+                )
+            except QueueFullError as e:
+                get_storage().delete(upload.key)
+                return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+    
+    next_url = url_for('interview.process', interview_id=answer.interview_id)
+    job_id = job.id if job else None
+    
+    def generate():
+        # The answer was already processed; send the stored feedback straight away
+        if job_id is None:
+            yield _sse_event('complete', {
+                'success': True,
+                'feedback': answer.feedback,
+                'rating': answer.rating,
+                'next_url': next_url
+            })
+            return
+        
+        yield _sse_event('uploaded', {'size': upload.size, 'job_id': job_id})
+        
+        started = False
+        transcript_sent = False
+        feedback_sent = 0
+        last_event = time.monotonic()
+        state = None
+        for state in job_queue.watch(
+            job_id,
+            poll_interval=current_app.config['JOB_STREAM_POLL_INTERVAL'],
+            timeout=current_app.config['JOB_QUEUE_STALE_SECONDS']
+        ):
+            events = []
+            progress = state['progress'] or {}
+            
+            if not started and state['status'] != 'queued':
+                started = True
+                events.append(_sse_event('started', {}))
+            
+            if not transcript_sent and progress.get('transcript') is not None:
+                transcript_sent = True
+                events.append(_sse_event('transcribed', {'transcript': progress['transcript']}))
+            
+            # Send only the review text written since the last poll
+            feedback = progress.get('feedback') or ''
+            if len(feedback) > feedback_sent:
+                events.append(_sse_event('feedback', {'text': feedback[feedback_sent:]}))
+                feedback_sent = len(feedback)
+            
+            if state['status'] == 'completed':
+                events.append(_sse_event('complete', dict(state['result'], success=True, next_url=next_url)))
+            elif state['status'] == 'failed':
+                events.append(_sse_event('error', {'success': False, 'error': state['error']}))
+            
+            if events:
+                last_event = time.monotonic()
+                yield ''.join(events)
+            elif time.monotonic() - last_event >= SSE_KEEPALIVE_SECONDS:
+                last_event = time.monotonic()
+                yield ": keep-alive\n\n"
+        
+        # The job vanished or outlived the wait; the page can still poll the job status endpoint
+        if state is None or state['status'] not in ('completed', 'failed'):
+            yield _sse_event('error', {
+                'success': False,
+                'error': "Processing is taking longer than expected. Please check back shortly.",
+                'job_id': job_id
+            })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@interview.route('/interview/jobs/<string:job_id>')
+@login_required
+def job_status(job_id):
+    # Get the job
+    job = job_queue.get_job(job_id)
+    
+    # Hide jobs that belong to other users
+    if not job or job.user_id != current_user.id:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    response = job.to_dict()
+    response['success'] = job.status != 'failed'
+    
+    # Once the answer is processed, tell the client where to go next
+    if job.status == 'completed' and job.job_type == 'process_answer':
+        response['next_url'] = url_for('interview.process', interview_id=response['result']['interview_id'])
+    
+    return jsonify(response)
 
 @interview.route('/interview/feedback/<int:answer_id>')
 @login_required
 def feedback(answer_id):
-    # Get the answer
-    answer = Answer.query.get_or_404(answer_id)
+    # Get the answer with its question, interview and profession
+    answer = _get_answer_or_404(answer_id)
     
     # Check if the user owns this answer
-    interview_obj = Interview.query.get(answer.interview_id)
+    interview_obj = answer.interview
     if interview_obj.user_id != current_user.id:
         flash('You do not have permission to access this feedback.', 'danger')
         return redirect(url_for('catalog.index'))
     
     # Get the question
-    question = Question.query.get(answer.question_id)
+    question = answer.question
     
     # Get the profession
-    profession = Profession.query.get(interview_obj.profession_id)
+    profession = interview_obj.profession
     
     # Check if feedback is available
     if not answer.feedback:
@@ -1,12 +1,15 @@
 import os
 from flask import Blueprint, render_template, request, current_app, redirect, url_for, flash, send_from_directory
+from io import BytesIO
 from flask_login import login_required, current_user
 from app import db
-from app.models import User, CV, Interview
+from app.models import User, CV
 from datetime import datetime
-from werkzeug.utils import secure_filename
-import uuid
 from PIL import Image
+from app.services.upload_service import save_upload, UploadTooLargeError
+from app.services import stats_service
+from app.services.storage import get_storage, send_stored_file
+from app.services.tracing import traced
 
 profile = Blueprint('profile', __name__)
 
@@ -19,45 +22,53 @@ def allowed_pdf_file(filename):
     """Check if the file has an allowed PDF extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
 
+def profile_picture_key(filename):
+    """Storage key for a profile_picture value; older rows hold a bare filename in profile_pics/."""
+    return filename if filename.startswith('profile_pics/') else f'profile_pics/{filename}'
+
+@traced()
 def save_profile_picture(file):
     """Save and process profile picture."""
-    # Generate a unique filename
-    filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-    file_path = os.path.join(current_app.config['PROFILE_PICS_FOLDER'], filename)
-    
-    # Save the file temporarily
-    file.save(file_path)
-    
-    # Open the image
-    img = Image.open(file_path)
-    
-    # Resize to a square
-    size = min(img.width, img.height)
-    img_cropped = img.crop((
-        (img.width - size) // 2,
-        (img.height - size) // 2,
-        (img.width + size) // 2,
-        (img.height + size) // 2
-    ))
+    # Stream the file to storage, enforcing the size limit
+    upload = save_upload(file, 'profile_pics', current_app.config['IMAGE_MAX_BYTES'])
+    storage = get_storage()
     
-    # Resize to a standard size (e.g., 200x200 pixels)
-    img_resized = img_cropped.resize((200, 200))
-    
-    # Save the processed image
-    img_resized.save(file_path)
-    
-    return filename
+    try:
+        # Open the image
+        img = Image.open(BytesIO(storage.read(upload.key)))
+        
+        # Resize to a square
+        size = min(img.width, img.height)
+        img_cropped = img.crop((
+            (img.width - size) // 2,
+            (img.height - size) // 2,
+            (img.width + size) // 2,
+            (img.height + size) // 2
+        ))
+        
+        # Resize to a standard size (e.g., 200x200 pixels)
+        img_resized = img_cropped.resize((200, 200))
+        
+        # Save the processed image over the original
+        output = BytesIO()
+        img_resized.save(output, format=img.format)
+        output.seek(0)
+        storage.save(upload.key, output)
+    except Exception:
+        storage.delete(upload.key)
+        raise
+    
+    return upload.key
 
 @profile.route('/profile')
 @login_required
 def index():
-    # Get user CVs
-    cvs = CV.query.filter_by(user_id=current_user.id).all()
+    # Get the precomputed interview and CV counts
+    stats = stats_service.get_user_stats(current_user.id)
+    rating_stats = stats_service.get_rating_stats(current_user.id)
     
-    # Get interview counts
-    interview_count = Interview.query.filter_by(user_id=current_user.id).count()
-    completed_interview_count = Interview.query.filter_by(user_id=current_user.id, completed_at=None).count()
-    cv_count = len(cvs)
+    # Get the primary CV record for its original filename and upload date
+    actual_cv = CV.query.filter_by(file_path=current_user.actual_cv).first() if current_user.actual_cv else None
     
     # Check if user has modern UI preference in cookies
     ui_preference = request.cookies.get('ai_interview_ui')
@@ -69,10 +80,12 @@ def index():
     return render_template(
         template,
         title='User Profile',
-        cvs=cvs,
-        interview_count=interview_count,
-        completed_interview_count=completed_interview_count,
-        cv_count=cv_count,
+        actual_cv=actual_cv,
+        rating_stats=rating_stats,
+        interview_count=stats.interview_count,
+        completed_interview_count=stats.completed_interview_count,
+        in_progress_interview_count=stats.in_progress_interview_count,
+        cv_count=stats.cv_count,
         year=year
     )
 
@@ -93,15 +106,19 @@ def update():
             if not allowed_image_file(file.filename):
                 flash('Invalid image format. Only PNG, JPG, JPEG, and GIF files are allowed.', 'danger')
             else:
-                # Delete the old profile picture if it's not the default
-                if current_user.profile_picture != 'default.jpg':
-                    old_picture_path = os.path.join(current_app.config['PROFILE_PICS_FOLDER'], current_user.profile_picture)
-                    if os.path.exists(old_picture_path):
-                        os.remove(old_picture_path)
+                try:
+                    # Save the new profile picture
+                    filename = save_profile_picture(file)
+                except UploadTooLargeError as e:
+                    flash(f'Profile picture not updated: {e}', 'danger')
+                    filename = None
                 
-                # Save the new profile picture
-                filename = save_profile_picture(file)
-                current_user.profile_picture = filename
+                if filename:
+                    # Delete the old profile picture if it's not the default
+                    if current_user.profile_picture != 'default.jpg':
+                        get_storage().delete(profile_picture_key(current_user.profile_picture))
+                    
+                    current_user.profile_picture = filename
     
     # Update actual CV
     if 'actual_cv' in request.files:
@@ -111,30 +128,32 @@ def update():
             if not allowed_pdf_file(file.filename):
                 flash('Invalid CV format. Only PDF files are allowed.', 'danger')
             else:
-                # Generate a unique filename
-                filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-                file_path = os.path.join(current_app.config['CV_FOLDER'], filename)
-                
-                # Save the file
-                file.save(file_path)
-                
-                # Create a CV record in the database
-                cv_record = CV(
-                    user_id=current_user.id,
-                    filename=file.filename,
-                    file_path=file_path
-                )
+                try:
+                    # Stream the file to storage, hashing it and enforcing the size limit in one pass
+                    upload = save_upload(file, 'cvs', current_app.config['CV_MAX_BYTES'])
+                except UploadTooLargeError as e:
+                    flash(f'CV not updated: {e}', 'danger')
+                    upload = None
                 
-                db.session.add(cv_record)
-                
-                # Delete the old actual CV if it exists
-                if current_user.actual_cv:
-                    old_cv_path = current_user.actual_cv
-                    if os.path.exists(old_cv_path):
-                        os.remove(old_cv_path)
-                
-                # Update user's actual CV
-                current_user.actual_cv = file_path
+                if upload:
+                    # Create a CV record in the database
+                    cv_record = CV(
+                        user_id=current_user.id,
+                        filename=file.filename,
+                        file_path=upload.key,
+                        content_hash=upload.sha256,
+                        file_size=upload.size
+                    )
+                    
+                    db.session.add(cv_record)
+                    stats_service.record_cv_added(current_user.id)
+                    
+                    # Delete the old actual CV if it exists
+                    if current_user.actual_cv:
+                        get_storage().delete(current_user.actual_cv)
+                    
+                    # Update user's actual CV
+                    current_user.actual_cv = upload.key
     
     # Save changes to the database
     db.session.commit()
@@ -142,12 +161,12 @@ def update():
     flash('Profile updated successfully!', 'success')
     return redirect(url_for('profile.index'))
 
-@profile.route('/profile/picture/<filename>')
+@profile.route('/profile/picture/<path:filename>')
 def profile_picture(filename):
-    # First try to find in uploads folder
+    # First try to find in upload storage
     try:
-        return send_from_directory(current_app.config['PROFILE_PICS_FOLDER'], filename)
-    except:
+        return send_stored_file(profile_picture_key(filename), max_age=86400)
+    except (FileNotFoundError, ValueError):
         # If not found, return default image
         return send_from_directory(os.path.join(current_app.root_path, 'static/img'), 'default.jpg')
 
@@ -158,18 +177,13 @@ def download_cv():
         flash('No CV available for download.', 'warning')
         return redirect(url_for('profile.index'))
     
-    # Get the directory and filename
-    directory = os.path.dirname(current_user.actual_cv)
-    filename = os.path.basename(current_user.actual_cv)
-    
     # Find the original filename from the CV record
     cv_record = CV.query.filter_by(file_path=current_user.actual_cv).first()
-    download_name = cv_record.filename if cv_record else filename
+    download_name = cv_record.filename if cv_record else current_user.actual_cv.rsplit('/', 1)[-1]
     
-    # Send the file
-    return send_from_directory(
-        directory, 
-        filename, 
-        as_attachment=True, 
-        download_name=download_name
-    )
\ No newline at end of file
+    # Stream the file from storage, supporting resumed and partial downloads
+    try:
+        return send_stored_file(current_user.actual_cv, download_name=download_name, as_attachment=True)
+    except (FileNotFoundError, ValueError):
+        flash('Your CV file could not be found.', 'danger')
+        return redirect(url_for('profile.index'))
\ No newline at end of file
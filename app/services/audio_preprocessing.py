@@ -0,0 +1,143 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+ProcessedAudio = namedtuple('ProcessedAudio', ['data', 'mime_type', 'original_size', 'processed_size', 'seconds'])
+
+# Output smaller than this is treated as "everything was trimmed"
+MIN_OUTPUT_BYTES = 1024
+
+# ffmpeg encoder arguments and the MIME type sent to Gemini for each output format
+OUTPUT_FORMATS = {
+    'ogg': (['-c:a', 'libopus', '-application', 'voip', '-f', 'ogg'], 'audio/ogg'),
+    'mp3': (['-c:a', 'libmp3lame', '-f', 'mp3'], 'audio/mp3'),
+    'flac': (['-c:a', 'flac', '-f', 'flac'], 'audio/flac'),
+}
+
+
+def find_ffmpeg():
+    """Return the ffmpeg executable path, or None if it isn't installed."""
+    return shutil.which(get_setting('AUDIO_FFMPEG_PATH', 'ffmpeg'))
+
+
+def build_ffmpeg_command(ffmpeg, input_path, output_format, bitrate, sample_rate, silence_db):
+    """
+    Build the ffmpeg command that decodes, trims, downmixes and re-encodes a recording.
+
+    Silence is trimmed from the start, then the audio is reversed so the same
+    filter trims the end, and reversed back. Output goes to stdout.
+    """
+    codec_args, _ = OUTPUT_FORMATS[output_format]
+    trim = f"silenceremove=start_periods=1:start_threshold={silence_db}dB"
+    command = [
+        ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-i', input_path,
+        '-vn',
+        '-af', f"{trim},areverse,{trim},areverse",
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        *codec_args
+    ]
+    if output_format != 'flac':
+        command += ['-b:a', bitrate]
+    return command + ['pipe:1']
+
+
+def preprocess_audio(audio_data, suffix, output_format=None, bitrate=None, sample_rate=None, silence_db=None, timeout=None):
+    """
+    Decode a recording, trim leading and trailing silence, downmix to mono,
+    resample and re-encode it to a compact codec with a local ffmpeg.
+
+    Runs entirely offline. Any failure (ffmpeg missing, undecodable input,
+    timeout, an all-silent recording) returns None so callers send the
+    original bytes instead, as does output that isn't smaller than the input.
+
+    Args:
+        audio_data: The recording's bytes
+        suffix: File extension of the recording (e.g. '.webm'), used by ffmpeg to pick a demuxer
+        output_format: 'ogg' (Opus), 'mp3' or 'flac' (defaults to AUDIO_PREPROCESS_FORMAT)
+        bitrate: Target bitrate for lossy formats, e.g. '24k' (defaults to AUDIO_PREPROCESS_BITRATE)
+        sample_rate: Output sample rate in Hz (defaults to AUDIO_PREPROCESS_SAMPLE_RATE)
+        silence_db: Level below which audio counts as silence (defaults to AUDIO_PREPROCESS_SILENCE_DB)
+        timeout: Seconds before ffmpeg is killed (defaults to AUDIO_PREPROCESS_TIMEOUT)
+
+    Returns:
+        A ProcessedAudio, or None if the original should be sent unchanged
+    """
+    output_format = output_format or get_setting('AUDIO_PREPROCESS_FORMAT', 'ogg')
+    bitrate = bitrate or get_setting('AUDIO_PREPROCESS_BITRATE', '24k')
+    sample_rate = sample_rate or get_setting('AUDIO_PREPROCESS_SAMPLE_RATE', 16000)
+    silence_db = silence_db if silence_db is not None else get_setting('AUDIO_PREPROCESS_SILENCE_DB', -50)
+    timeout = timeout or get_setting('AUDIO_PREPROCESS_TIMEOUT', 30)
+
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        logger.warning("Audio preprocessing is enabled but ffmpeg was not found; sending original audio")
+        return None
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown audio preprocessing format: {output_format}")
+
+    # Containers like MP4/M4A keep their index at the end, so ffmpeg needs a seekable file rather than a pipe
+    fd, input_path = tempfile.mkstemp(suffix=suffix)
+    start = time.perf_counter()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_data)
+        result = subprocess.run(
+            build_ffmpeg_command(ffmpeg, input_path, output_format, bitrate, sample_rate, silence_db),
+            capture_output=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Audio preprocessing timed out after {timeout}s; sending original audio")
+        return None
+    finally:
+        os.remove(input_path)
+    seconds = time.perf_counter() - start
+
+    if result.returncode != 0:
+        logger.warning(f"Audio preprocessing failed: {result.stderr.decode(errors='replace').strip()[:200]}")
+        return None
+
+    processed = result.stdout
+    if len(processed) < MIN_OUTPUT_BYTES:
+        # Trimming left (almost) nothing, e.g. a very quiet microphone; let the model hear the original
+        logger.info(f"Preprocessed audio is only {len(processed)} bytes; sending original")
+        return None
+    if len(processed) >= len(audio_data):
+        logger.info(f"Preprocessed audio not smaller ({len(processed)} >= {len(audio_data)} bytes); sending original")
+        return None
+
+    logger.info(f"Preprocessed audio {len(audio_data)} -> {len(processed)} bytes in {seconds:.2f}s")
+    return ProcessedAudio(processed, OUTPUT_FORMATS[output_format][1], len(audio_data), len(processed), seconds)
+
+
+def compact_audio(audio_data, audio_path, mime_type):
+    """
+    Return the bytes and MIME type to send to Gemini for a recording.
+
+    Preprocesses the audio when AUDIO_PREPROCESS_ENABLED is set, otherwise
+    (or if preprocessing fails) returns the original unchanged.
+
+    Args:
+        audio_data: The recording's bytes
+        audio_path: Storage key or path of the recording, for its extension
+        mime_type: The recording's MIME type
+
+    Returns:
+        A tuple of (data, mime_type)
+    """
+    if not get_setting('AUDIO_PREPROCESS_ENABLED', False):
+        return audio_data, mime_type
+
+    processed = preprocess_audio(audio_data, os.path.splitext(audio_path)[1].lower())
+    if processed is None:
+        return audio_data, mime_type
+    return processed.data, processed.mime_type
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Profession, Question
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+GRADES = ['Junior', 'Middle', 'Senior']
+
+# Lightweight stand-in for Profession rows so cached data never touches a session
+CatalogProfession = namedtuple('CatalogProfession', ['id', 'name'])
+
+_catalog = None  # (loaded_at, version, professions, question_counts)
+_catalog_lock = threading.Lock()
+
+def catalog_version():
+    """Modification time of the shared version file, touched whenever any process invalidates the catalog."""
+    try:
+        return os.stat(get_setting('CATALOG_VERSION_FILE')).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+def get_catalog():
+    """
+    Return the professions and the question-count matrix for the catalog.
+    
+    Both are loaded with two queries (one GROUP BY for the counts) and cached
+    in-process until questions change in any process or CATALOG_CACHE_TTL expires.
+    
+    Returns:
+        A tuple (professions, question_counts) where question_counts maps
+        profession_id -> {grade: count} for every grade in GRADES
+    """
+    global _catalog
+    
+    ttl = get_setting('CATALOG_CACHE_TTL', 300)
+    version = catalog_version()
+    with _catalog_lock:
+        if _catalog is not None and time.monotonic() - _catalog[0] < ttl and _catalog[1] == version:
+            return _catalog[2], _catalog[3]
+    
+    professions = [
+        CatalogProfession(profession_id, name)
+        for profession_id, name in db.session.query(Profession.id, Profession.name).order_by(Profession.id)
+    ]
+    
+    # Start every cell at zero so professions/grades without questions still render
+    question_counts = {profession.id: {grade: 0 for grade in GRADES} for profession in professions}
+    rows = db.session.query(
+        Question.profession_id, Question.grade, func.count(Question.id)
+    ).group_by(Question.profession_id, Question.grade).all()
+    for profession_id, grade, count in rows:
+        question_counts.setdefault(profession_id, {g: 0 for g in GRADES})[grade] = count
+    
+    with _catalog_lock:
+        _catalog = (time.monotonic(), version, professions, question_counts)
+    
+    return professions, question_counts
+
+def invalidate_catalog():
+    """Drop the cached catalog and question pools here and signal other processes (e.g. after seed_db.py) to reload it."""
+    # Imported here because the sampler reads catalog_version from this module
+    from app.services.question_sampler import question_sampler
+    
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+    # Reload this process's question pools right away, even if the version file's mtime doesn't move
+    question_sampler.invalidate()
+    
+    version_file = get_setting('CATALOG_VERSION_FILE')
+    if version_file:
+        try:
+            with open(version_file, 'a'):
+                os.utime(version_file)
+        except OSError as e:
+            logger.warning(f"Could not touch catalog version file {version_file}: {e}")
+    logger.debug("Catalog cache invalidated")
+
+# Other processes reload as soon as the version changes, so only signal once the rows are committed
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_question_change(session, flush_context):
+    # Questions or professions added, removed or moved between cells change the counts
+    changed = list(session.new) + list(session.deleted) + list(session.dirty)
+    if any(isinstance(obj, (Question, Profession)) for obj in changed):
+        session.info['catalog_changed'] = True
+
+@event.listens_for(Session, 'after_bulk_delete')
+def _invalidate_on_bulk_delete(delete_context):
+    if delete_context.mapper.class_ in (Question, Profession):
+        delete_context.session.info['catalog_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('catalog_changed', False):
+        invalidate_catalog()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_changes(session):
+    session.info.pop('catalog_changed', None)
@@ -1,7 +1,17 @@
-import os
-import PyPDF2
 import logging
+from datetime import datetime
+from flask import has_app_context
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import CV, CVText
 from app.services.gemini_service import GeminiService
+from app.services.pdf_text import extract_pdf_pages
+from app.services.settings import get_setting
+from app.services.storage import get_storage
+from app.services.tracing import traced
+from app.services.upload_service import hash_stored_file
+from app.services.usage_service import usage_user
 
 logger = logging.getLogger(__name__)
 
@@ -9,25 +19,31 @@ class CVService:
     def __init__(self):
         self.gemini_service = GeminiService()
     
-    def extract_text_from_pdf(self, pdf_path):
+    @traced()
+    def extract_text_from_pdf(self, pdf_path, content_hash=None):
         """
         Extract text from a PDF file.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Storage key (or legacy local path) of the PDF file
+            content_hash: SHA-256 of the PDF; when given, text extracted
+                earlier for the same file is reused instead of re-parsing it
             
         Returns:
             The extracted text as a string
         """
         try:
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract text from each page
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n\n"
+            # The store lives in the database, so it needs an app context
+            use_store = content_hash is not None and has_app_context()
+            
+            text = self._get_stored_text(content_hash) if use_store else None
+            if text is not None:
+                logger.info(f"Reusing stored text for PDF: {pdf_path} ({content_hash[:12]})")
+            else:
+                pages = self._extract_pages(pdf_path)
+                text = "\n\n".join(pages)
+                if use_store:
+                    self._store_text(content_hash, text, len(pages))
             
             if not text.strip():
                 logger.warning(f"No text extracted from PDF: {pdf_path}")
@@ -40,19 +56,20 @@ class CVService:
             logger.error(f"Error extracting text from PDF: {e}")
             return f"Error processing PDF: {str(e)}"
     
-    def process_cv(self, pdf_path):
+    def process_cv(self, pdf_path, content_hash=None):
         """
         Process a CV by extracting text and generating a review.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Storage key (or legacy local path) of the PDF file
+            content_hash: Optional SHA-256 of the PDF, used to reuse stored text
             
         Returns:
             The generated review as a string
         """
         try:
             # Extract text from PDF
-            cv_text = self.extract_text_from_pdf(pdf_path)
+            cv_text = self.extract_text_from_pdf(pdf_path, content_hash)
             
             # If no text could be extracted
             if cv_text.startswith("Error") or cv_text.startswith("No readable"):
@@ -65,4 +82,174 @@ class CVService:
             
         except Exception as e:
             logger.error(f"Error processing CV: {e}")
-            return f"Error processing CV: {str(e)}"
\ No newline at end of file
+            return f"Error processing CV: {str(e)}"
+    
+    def review_cv_record(self, cv_id):
+        """
+        Review a stored CV and save the result on its record.
+        
+        Args:
+            cv_id: ID of the CV record
+            
+        Returns:
+            Tuple of (CV, error message)
+        """
+        # Get the CV
+        cv_record = CV.query.get(cv_id)
+        if not cv_record:
+            return None, "CV not found"
+        
+        # Mark the CV as in progress so the status endpoint reflects it
+        cv_record.review_status = 'processing'
+        db.session.commit()
+        
+        # Extract the text and generate the review, charging the calls to the CV's owner
+        with usage_user(cv_record.user_id):
+            review = self.process_cv(cv_record.file_path, cv_record.content_hash)
+        
+        cv_record.review = review
+        if review.startswith("Error") or review.startswith("No readable"):
+            cv_record.review_status = 'failed'
+            db.session.commit()
+            return cv_record, review
+        
+        cv_record.review_status = 'completed'
+        db.session.commit()
+        
+        logger.info(f"Reviewed CV {cv_id}")
+        return cv_record, None
+    
+    @staticmethod
+    def _extract_pages(pdf_path):
+        """Extract the text of each page of a stored PDF, in parallel for long documents."""
+        # The parser and the pool workers need a local file; remote backends download a temporary copy
+        with get_storage().local_path(pdf_path) as local_path:
+            return extract_pdf_pages(
+                local_path,
+                parallel_threshold=get_setting('CV_PARALLEL_PAGE_THRESHOLD', 8),
+                workers=get_setting('CV_EXTRACTION_WORKERS', 4)
+            )
+    
+    @staticmethod
+    def _get_stored_text(content_hash):
+        """
+        Return the stored text for a PDF hash and record the hit, or None.
+        
+        The hit is written in the caller's transaction, which the caller commits
+        along with the CV it is reviewing.
+        """
+        stored = CVText.query.get(content_hash)
+        if stored is None:
+            return None
+        
+        CVText.query.filter_by(content_hash=content_hash).update({
+            'hit_count': CVText.hit_count + 1,
+            'last_used_at': datetime.utcnow()
+        }, synchronize_session=False)
+        return stored.text
+    
+    @staticmethod
+    def _store_text(content_hash, text, page_count):
+        """
+        Add extracted text to the caller's transaction; a concurrent insert for the same PDF is ignored.
+        
+        The savepoint keeps a duplicate key from rolling back the caller's
+        pending changes, which are committed by the caller, not here.
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.add(CVText(content_hash=content_hash, text=text, page_count=page_count))
+        except IntegrityError:
+            logger.info(f"Text for {content_hash[:12]} was stored concurrently")
+    
+    @staticmethod
+    def backfill_text(batch_size=100):
+        """
+        Populate the extracted-text store for existing CV files.
+        
+        CVs are read in primary key order, one batch at a time. Missing
+        content hashes and file sizes are filled in, and each distinct PDF
+        not yet in the store is extracted once. Hash updates and new store
+        rows are written with one bulk statement each per batch.
+        
+        Args:
+            batch_size: Number of CV rows per batch
+            
+        Returns:
+            A dict of counters: scanned, hashed, extracted, reused, missing, failed
+        """
+        stats = dict.fromkeys(['scanned', 'hashed', 'extracted', 'reused', 'missing', 'failed'], 0)
+        last_id = 0
+        
+        while True:
+            rows = db.session.query(CV.id, CV.file_path, CV.content_hash).filter(
+                CV.id > last_id
+            ).order_by(CV.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            stats['scanned'] += len(rows)
+            
+            # Hash files uploaded before content hashes were recorded
+            storage = get_storage()
+            hashes = {}
+            hash_updates = []
+            for row in rows:
+                if not storage.exists(row.file_path):
+                    stats['missing'] += 1
+                    continue
+                content_hash = row.content_hash
+                if not content_hash:
+                    content_hash = hash_stored_file(row.file_path)
+                    hash_updates.append({
+                        'id': row.id,
+                        'content_hash': content_hash,
+                        'file_size': storage.size(row.file_path)
+                    })
+                hashes[content_hash] = row.file_path
+            
+            # Skip PDFs whose text is already stored
+            stored = {
+                content_hash for (content_hash,) in db.session.query(CVText.content_hash).filter(
+                    CVText.content_hash.in_(list(hashes))
+                )
+            }
+            stats['reused'] += len(stored)
+            
+            new_rows = []
+            for content_hash, file_path in hashes.items():
+                if content_hash in stored:
+                    continue
+                try:
+                    pages = CVService._extract_pages(file_path)
+                except Exception as e:
+                    logger.error(f"Error extracting text from PDF {file_path}: {e}")
+                    stats['failed'] += 1
+                    continue
+                new_rows.append({
+                    'content_hash': content_hash,
+                    'text': "\n\n".join(pages),
+                    'page_count': len(pages),
+                    'hit_count': 0
+                })
+            
+            if hash_updates:
+                db.session.execute(update(CV), hash_updates)
+                stats['hashed'] += len(hash_updates)
+            db.session.commit()
+            
+            if new_rows:
+                try:
+                    db.session.execute(insert(CVText), new_rows)
+                    db.session.commit()
+                except IntegrityError:
+                    # An upload stored one of these PDFs meanwhile; fall back to row-by-row inserts
+                    db.session.rollback()
+                    for new_row in new_rows:
+                        CVService._store_text(new_row['content_hash'], new_row['text'], new_row['page_count'])
+                    db.session.commit()
+                stats['extracted'] += len(new_rows)
+            
+            logger.info(f"Backfilled CV text up to id {last_id}: {stats}")
+        
+        return stats
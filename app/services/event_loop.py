@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+import threading
+from flask import current_app, has_app_context
+from app.services.tracing import current_span, use_span
+from app.services.usage_service import current_usage_user, usage_user
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """
+    Return the process-wide event loop used by the async Gemini services,
+    starting it on a daemon thread on first use.
+
+    All async Gemini calls share this one loop, so the library's cached
+    grpc.aio client and the rate limiter's asyncio semaphore are only ever
+    used from the loop they were created on.
+    """
+    global _loop, _loop_pid
+
+    with _loop_lock:
+        # A forked worker inherits the loop object but not its thread
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            thread = threading.Thread(target=_loop.run_forever, name='gemini-event-loop', daemon=True)
+            thread.start()
+            logger.info("Started Gemini event loop thread")
+        return _loop
+
+
+def run_async(coro, timeout=None):
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+
+    This is how synchronous code (routes, jobs, CLI commands) calls the async
+    services. The caller's app context, if any, is pushed for the coroutine
+    so database-backed caches keep working, Gemini calls are attributed
+    to the caller's user in the usage ledger, and spans join the caller's trace.
+
+    Args:
+        coro: The coroutine to run
+        timeout: Optional overall timeout in seconds
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        Whatever the coroutine raises, or TimeoutError if it runs past timeout
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+    user_id = current_usage_user()
+    parent_span = current_span()
+
+    async def runner():
+        # Context variables don't cross threads, so carry the usage ledger's user and the trace over
+        with usage_user(user_id), use_span(parent_span):
+            if app is None:
+                return await coro
+            with app.app_context():
+                return await coro
+
+    future = asyncio.run_coroutine_threadsafe(runner(), get_event_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+async def gather_in_order(coros, limit=None):
+    """
+    Await coroutines concurrently and return their results in input order.
+
+    Args:
+        coros: Iterable of coroutines
+        limit: Optional cap on how many run at once, on top of the shared Gemini semaphore
+
+    Returns:
+        A list of results; exceptions are returned in place rather than raised
+    """
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def limited(coro):
+        if semaphore is None:
+            return await coro
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(limited(coro) for coro in coros), return_exceptions=True)
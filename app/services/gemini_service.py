@@ -1,15 +1,40 @@
 import google.generativeai as genai
 import os
+import re
+import json
 import logging
 import functools
+import inspect
 from dotenv import load_dotenv
 from flask import current_app
+from app.services.response_cache import get_response_cache, make_cache_key
+from app.services.rate_limiter import get_rate_limiter, estimate_tokens
+from app.services.settings import get_setting
+from app.services.event_loop import run_async, gather_in_order
+from app.services.tracing import traced
+from app.services.usage_service import track_usage, CALL_ANSWER_REVIEW, CALL_CV_REVIEW, CALL_FUSED_ANSWER_REVIEW
 
 logger = logging.getLogger(__name__)
 
 # Global flag to avoid multiple reconfigurations
 _gemini_configured = False
 
+# JSON schema for structured answer reviews (REVIEW_OUTPUT_MODE=structured)
+REVIEW_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'overall': {'type': 'string'},
+        'strengths': {'type': 'array', 'items': {'type': 'string'}},
+        'improvements': {'type': 'array', 'items': {'type': 'string'}},
+        'score': {'type': 'number'},
+    },
+    'required': ['overall', 'strengths', 'improvements', 'score'],
+}
+
+def supports_response_schema():
+    """Whether the installed google-generativeai accepts response_mime_type/response_schema."""
+    return 'response_schema' in inspect.signature(genai.types.GenerationConfig).parameters
+
 def configure_gemini():
     """Loads API key and configures the Gemini client."""
     global _gemini_configured
@@ -33,41 +58,50 @@ def configure_gemini():
             raise
 
 class GeminiService:
-    def __init__(self, model_name='gemini-1.5-flash-latest'):
-        """Initializes the Gemini Service."""
+    def __init__(self, model_name=None):
+        """Initializes the Gemini Service with the given model, or GEMINI_MODEL from the config."""
         try:
-            self.model_name = model_name
+            self.model_name = model_name or get_setting('GEMINI_MODEL', 'gemini-1.5-flash-latest')
             self._model = genai.GenerativeModel(self.model_name)
             logger.info(f"GeminiService initialized with model: {self.model_name}")
         except Exception as e:
             logger.error(f"Failed to initialize Gemini Model ({self.model_name}): {e}", exc_info=True)
             raise
     
-    def generate_review(self, prompt_text, safety_settings=None, generation_config=None, retries=2):
+    @traced()
+    def generate_review(self, prompt_text, safety_settings=None, generation_config=None, retries=None, use_cache=True,
+                        call_type=CALL_ANSWER_REVIEW):
         """
         Generates content using the configured Gemini model.
         
         Args:
-            prompt_text: The complete prompt to send to the Gemini API.
+            prompt_text: The complete prompt to send to the Gemini API (a string, or a list of parts for multimodal input).
             safety_settings: Optional safety settings.
             generation_config: Optional generation config (temperature, max_tokens etc).
-            retries: Number of retries in case of rate limit or transient errors.
+            retries: Number of retries in case of rate limit or transient errors (defaults to GEMINI_MAX_RETRIES).
+            use_cache: Set to False to bypass the response cache for this call.
+            call_type: Call type recorded in the usage ledger.
             
         Returns:
             The generated text content as a string, or None if an error occurs.
         """
-        import time
+        # Default generation config if none provided
+        if not generation_config:
+            generation_config = {
+                'temperature': 0.7,
+                'max_output_tokens': 2048,
+            }
         
-        for attempt in range(retries + 1):
+        with track_usage(call_type, self.model_name, prompt_text) as usage:
+            # Serve byte-identical requests from the response cache
+            cache, cache_key, cached_text = self._lookup_cache(prompt_text, generation_config, use_cache)
+            if cached_text is not None:
+                usage.cache_hit = True
+                return cached_text
+            
             try:
-                logger.debug(f"Sending prompt to Gemini ({self.model_name}):\n{prompt_text[:200]}...")
-                
-                # Default generation config if none provided
-                if not generation_config:
-                    generation_config = {
-                        'temperature': 0.7,
-                        'max_output_tokens': 2048,
-                    }
+                preview = prompt_text[:200] if isinstance(prompt_text, str) else "[multimodal content]"
+                logger.debug(f"Sending prompt to Gemini ({self.model_name}):\n{preview}...")
                 
                 # Prepare optional configurations
                 kwargs = {}
@@ -75,34 +109,113 @@ class GeminiService:
                     kwargs['safety_settings'] = safety_settings
                 kwargs['generation_config'] = generation_config
                 
-                # Call the API
-                response = self._model.generate_content(prompt_text, **kwargs)
+                # Call the API through the shared limiter, which retries rate limit and server errors
+                response = get_rate_limiter().call(
+                    self._model.generate_content,
+                    prompt_text,
+                    estimated_tokens=estimate_tokens(prompt_text, generation_config.get('max_output_tokens', 0)),
+                    max_retries=retries,
+                    usage=usage,
+                    **kwargs
+                )
+                usage.response = response
                 
-                # Basic check on response structure
-                if response and hasattr(response, 'text'):
-                    logger.debug(f"Received Gemini response (first 100 chars): {response.text[:100]}")
-                    return response.text
-                elif response and hasattr(response, 'prompt_feedback') and response.prompt_feedback:
-                    logger.warning(f"Gemini content generation blocked. Feedback: {response.prompt_feedback}")
-                    return f"Error: Content generation blocked due to safety settings ({response.prompt_feedback})."
-                else:
-                    logger.error(f"Received unexpected or empty response from Gemini API. Response: {response}")
-                    return "Error: Received an unexpected or empty response from the AI."
+                text = self._response_text(response, cache, cache_key)
+                usage.success = not text.startswith("Error")
+                return text
                     
             except Exception as e:
-                error_message = str(e).lower()
-                
-                # Check if this is a rate limit error or server error (5xx)
-                if "rate limit" in error_message or "429" in error_message or "500" in error_message:
-                    if attempt < retries:
-                        wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, etc.
-                        logger.warning(f"Rate limit or server error, retrying in {wait_time}s... ({attempt+1}/{retries})")
-                        time.sleep(wait_time)
-                        continue
-                
+                usage.success = False
                 logger.error(f"Gemini API call failed: {e}", exc_info=True)
                 return f"Error: AI service encountered an issue ({type(e).__name__}). Please try again later."
     
+    def _lookup_cache(self, prompt_text, generation_config, use_cache=True):
+        """Returns (cache, cache_key, cached_text); cache is None when caching is off for this call."""
+        cache = get_response_cache() if use_cache else None
+        if not cache:
+            return None, None, None
+        
+        cache_key = make_cache_key(self.model_name, prompt_text, generation_config)
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            logger.debug(f"Gemini response cache hit ({cache_key[:12]})")
+        return cache, cache_key, cached_text
+    
+    def _response_text(self, response, cache=None, cache_key=None):
+        """Returns the text of a generate_content response, caching it, or an "Error: ..." string."""
+        # Basic check on response structure
+        if response and hasattr(response, 'text'):
+            logger.debug(f"Received Gemini response (first 100 chars): {response.text[:100]}")
+            if cache:
+                cache.set(cache_key, response.text)
+            return response.text
+        elif response and hasattr(response, 'prompt_feedback') and response.prompt_feedback:
+            logger.warning(f"Gemini content generation blocked. Feedback: {response.prompt_feedback}")
+            return f"Error: Content generation blocked due to safety settings ({response.prompt_feedback})."
+        else:
+            logger.error(f"Received unexpected or empty response from Gemini API. Response: {response}")
+            return "Error: Received an unexpected or empty response from the AI."
+    
+    def stream_review(self, prompt_text, safety_settings=None, generation_config=None, call_type=CALL_ANSWER_REVIEW):
+        """
+        Generates content like generate_review, yielding the text as it arrives.
+        
+        The rate limiter slot is held until the stream is exhausted or closed.
+        Cached responses are yielded in one piece, and complete streamed
+        responses are added to the cache.
+        
+        Args:
+            prompt_text: The complete prompt to send to the Gemini API.
+            safety_settings: Optional safety settings.
+            generation_config: Optional generation config (temperature, max_tokens etc).
+            call_type: Call type recorded in the usage ledger.
+            
+        Yields:
+            Text chunks of the response.
+            
+        Raises:
+            Any API exception; no retries are attempted once text has been yielded.
+        """
+        if not generation_config:
+            generation_config = {
+                'temperature': 0.7,
+                'max_output_tokens': 2048,
+            }
+        
+        with track_usage(call_type, self.model_name, prompt_text) as usage:
+            cache, cache_key, cached_text = self._lookup_cache(prompt_text, generation_config)
+            if cached_text is not None:
+                usage.cache_hit = True
+                yield cached_text
+                return
+            
+            kwargs = {'generation_config': generation_config}
+            if safety_settings:
+                kwargs['safety_settings'] = safety_settings
+            
+            estimated = estimate_tokens(prompt_text, generation_config.get('max_output_tokens', 0))
+            parts = []
+            with get_rate_limiter().slot(estimated):
+                response = self._model.generate_content(prompt_text, stream=True, **kwargs)
+                usage.response = response
+                for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. the final safety verdict) raise on .text
+                        continue
+                    if text:
+                        parts.append(text)
+                        usage.output_text = "".join(parts)
+                        yield text
+            
+            if not parts:
+                feedback = getattr(response, 'prompt_feedback', None)
+                raise ValueError(f"Content generation returned no text ({feedback})")
+        
+        if cache:
+            cache.set(cache_key, "".join(parts))
+    
     def create_interview_review_prompt(self, question, answer, profession, grade):
         """Creates a prompt for Gemini to review an interview answer."""
         prompt = f"""
@@ -167,12 +280,468 @@ class GeminiService:
         """
         return prompt
     
+    def create_cv_section_prompt(self, section_text, section_number, section_count):
+        """Creates a prompt for Gemini to take review notes on one section of a long CV."""
+        prompt = f"""
+        The following text is section {section_number} of {section_count} of a candidate's CV (Resume), split because the full CV is very long. Assume the candidate is likely applying for roles in the IT industry.
+        
+        **CV Section Text:**
+        --- Start of Section ---
+        {section_text}
+        --- End of Section ---
+        
+        **Instructions for AI Analysis:**
+        Act as an experienced IT recruiter. Write concise review notes on this section only; they will be merged with notes on the other sections into one review.
+        **Output Format:**
+        **Content:** [One or two sentences on what this section covers (e.g. experience, education, publications).]
+        **Strengths:**
+        - [Specific strong points, skills or achievements in this section.]
+        **Weaknesses:**
+        - [Weak descriptions, lack of quantification, formatting problems in this section.]
+        **Keywords:** [Prominent IT keywords in this section, comma-separated.]
+        
+        **Important:** Base your notes *only* on this section. Do not comment on sections that seem to be missing, since they may appear elsewhere in the CV. Keep the notes under 250 words.
+        """
+        return prompt
+    
+    def create_cv_merge_prompt(self, section_notes):
+        """Creates a prompt for Gemini to merge per-section review notes into a full CV review."""
+        notes = "\n\n".join(
+            f"--- Notes on section {i} of {len(section_notes)} ---\n{note}"
+            for i, note in enumerate(section_notes, 1)
+        )
+        prompt = f"""
+        A candidate's CV (Resume) was too long to review in one pass, so each section was reviewed separately. Combine the section notes below into a single review of the whole CV. Assume the candidate is likely applying for roles in the IT industry.
+        
+        **Section Review Notes:**
+        {notes}
+        
+        **Instructions for AI Analysis:**
+        Act as an experienced IT recruiter and career advisor. Merge the notes, removing duplicates and resolving contradictions. Judge completeness against the CV as a whole: a section is only missing if no notes mention it.
+        **Output Format:**
+        Provide a structured review with the following sections:
+        **Overall Impression:** [A brief summary (2-3 sentences) of the CV's effectiveness and target role suitability based on the content.]
+        **Strengths:**
+        - [List specific strong points, key skills highlighted, notable achievements mentioned.]
+        **Weaknesses / Areas for Improvement:**
+        - [Identify missing key sections, weak descriptions, lack of quantification, and suggest specific improvements.]
+        **Clarity and Formatting (Inferred):** [Comment on the likely clarity and readability, including the CV's length.]
+        **Keywords and Relevance:** [Mention prominent IT keywords found and comment on potential relevance to common IT roles.]
+        
+        **Important:** Base your review *only* on the provided notes. Be constructive and provide actionable advice for the candidate.
+        """
+        return prompt
+    
+    def split_cv_text(self, cv_text, max_tokens):
+        """
+        Splits CV text into sections of at most roughly max_tokens each.
+        
+        Paragraphs are packed greedily so sections break at paragraph
+        boundaries; a paragraph longer than a whole section is split by
+        lines, and a single overlong line by characters.
+        
+        Args:
+            cv_text: The extracted CV text.
+            max_tokens: Estimated token budget per section.
+            
+        Returns:
+            A list of section strings.
+        """
+        max_chars = max_tokens * 4  # Matches the estimate_tokens heuristic
+        
+        # Break the text into pieces that each fit in a section
+        pieces = []
+        for paragraph in re.split(r"\n\s*\n", cv_text):
+            if len(paragraph) <= max_chars:
+                pieces.append(paragraph)
+                continue
+            for line in paragraph.splitlines():
+                pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+        
+        # Pack the pieces into as few sections as possible, keeping their order
+        sections = []
+        current = []
+        current_chars = 0
+        for piece in pieces:
+            if not piece.strip():
+                continue
+            if current and current_chars + len(piece) > max_chars:
+                sections.append("\n\n".join(current))
+                current = []
+                current_chars = 0
+            current.append(piece)
+            current_chars += len(piece) + 2
+        if current:
+            sections.append("\n\n".join(current))
+        
+        return sections
+    
+    def review_cv_chunked(self, cv_text):
+        """
+        Reviews a long CV map-reduce style: each section is reviewed
+        concurrently, then the section notes are merged into one review.
+        
+        Args:
+            cv_text: The extracted CV text.
+            
+        Returns:
+            The review in the same format as review_cv, or an "Error: ..." string.
+        """
+        return run_async(self.async_service.review_cv_chunked(cv_text))
+    
+    @property
+    def async_service(self):
+        """An AsyncGeminiService for the same model, used for concurrent fan-out."""
+        if getattr(self, '_async_service', None) is None:
+            self._async_service = AsyncGeminiService(self.model_name)
+        return self._async_service
+    
+    def create_fused_answer_prompt(self, question, profession, grade):
+        """Creates a prompt asking Gemini to transcribe an audio answer and review it in one call."""
+        prompt = f"""
+        The attached audio is a candidate's spoken answer to an interview question. Transcribe it and review it.
+        
+        **Profession:** {profession}
+        **Grade Level:** {grade}
+        **Interview Question:**
+        "{question}"
+        
+        **Instructions for AI Analysis:**
+        1. Transcribe the audio accurately, without any additional commentary.
+        2. Act as an experienced IT interviewer or technical hiring manager for the specified role and level. Evaluate the transcribed answer for technical accuracy, relevance, clarity and conciseness, completeness at a {grade} level, and structure.
+        
+        **Output Format:**
+        Respond with ONLY a JSON object, no code fences, with exactly these keys:
+        - "transcript": the transcribed answer as a string.
+        - "feedback": a markdown string in this structure:
+          **Overall Assessment:** [1-2 sentence summary of the answer's quality.]
+          **Strengths:**
+          - [Specific strengths.]
+          **Areas for Improvement:**
+          - [Specific weaknesses and ways to improve the answer.]
+          **Technical Score (Estimate):** [Score from 1.0 to 5.0.]
+        - "score": the technical score as a number from 1.0 (Poor) to 5.0 (Excellent), matching the feedback.
+        
+        **Important:** Focus solely on the provided question and answer. Be constructive and provide actionable feedback. If the audio is silent, unintelligible or irrelevant, say so in the feedback. Do not invent information not present in the answer.
+        """
+        return prompt
+    
+    def parse_fused_response(self, response_text):
+        """
+        Parses the JSON returned for a fused transcription + review request.
+        
+        Args:
+            response_text: Raw text returned by the model.
+            
+        Returns:
+            A dict with 'transcript', 'feedback' and 'score' keys, or None if the
+            response is not valid structured output.
+        """
+        if not response_text or response_text.startswith("Error"):
+            return None
+        
+        # Strip markdown code fences the model sometimes adds despite instructions
+        text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", response_text.strip())
+        
+        try:
+            data = json.loads(text)
+            transcript = data['transcript'].strip()
+            feedback = data['feedback'].strip()
+            score = float(data['score'])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Failed to parse fused answer response: {e}")
+            return None
+        
+        if not transcript or not feedback:
+            logger.warning("Fused answer response is missing a transcript or feedback.")
+            return None
+        
+        return {
+            'transcript': transcript,
+            'feedback': feedback,
+            'score': score if 1.0 <= score <= 5.0 else None
+        }
+    
+    def review_interview_audio(self, question, audio_data, mime_type, profession, grade):
+        """Transcribe and review an audio answer in a single request. Returns None if the response can't be parsed."""
+        prompt = self.create_fused_answer_prompt(question, profession, grade)
+        response_text = self.generate_review(
+            [prompt, {"mime_type": mime_type, "data": audio_data}],
+            call_type=CALL_FUSED_ANSWER_REVIEW
+        )
+        return self.parse_fused_response(response_text)
+    
     def review_interview_answer(self, question, answer, profession, grade):
         """Process an interview answer and generate a review."""
         prompt = self.create_interview_review_prompt(question, answer, profession, grade)
         return self.generate_review(prompt)
     
+    def create_structured_review_prompt(self, question, answer, profession, grade):
+        """Creates a prompt for Gemini to review an interview answer as compact JSON matching REVIEW_SCHEMA."""
+        prompt = f"""
+        Analyze the following interview answer based on the provided question, profession, and grade level.
+        
+        **Profession:** {profession}
+        **Grade Level:** {grade}
+        **Interview Question:**
+        "{question}"
+        
+        **Candidate's Answer (Transcribed Audio):**
+        "{answer}"
+        
+        **Instructions for AI Analysis:**
+        Act as an experienced IT interviewer or technical hiring manager for the specified role and level. Evaluate the answer for technical accuracy, relevance, clarity and conciseness, completeness at a {grade} level, and structure.
+        
+        **Output Format:**
+        Respond with ONLY a JSON object, no code fences, matching this schema:
+        {json.dumps(REVIEW_SCHEMA)}
+        - "overall": a 1-2 sentence summary of the answer's quality.
+        - "strengths": up to 3 short, specific strengths.
+        - "improvements": up to 3 short, specific weaknesses or ways to improve the answer.
+        - "score": the technical score from 1.0 (Poor) to 5.0 (Excellent) for this single answer, considering the role/level.
+        
+        **Important:** Keep each item to one sentence. Focus solely on the provided question and answer. If the answer is completely irrelevant or nonsensical, say so in "overall". Do not invent information not present in the answer.
+        """
+        return prompt
+    
+    def structured_generation_config(self):
+        """Generation config for structured reviews: a tight output budget, and the response schema when the SDK supports it."""
+        generation_config = {
+            'temperature': 0.4,
+            'max_output_tokens': get_setting('REVIEW_STRUCTURED_MAX_TOKENS', 512),
+        }
+        if supports_response_schema():
+            generation_config['response_mime_type'] = 'application/json'
+            generation_config['response_schema'] = REVIEW_SCHEMA
+        return generation_config
+    
+    def parse_structured_review(self, response_text):
+        """
+        Strictly parses a structured review.
+        
+        The response must be a JSON object with exactly the REVIEW_SCHEMA keys,
+        non-empty strings, lists of strings and a numeric score from 1.0 to 5.0.
+        
+        Args:
+            response_text: Raw text returned by the model.
+            
+        Returns:
+            A dict with 'overall', 'strengths', 'improvements' and 'score' keys, or
+            None if the response doesn't match the schema.
+        """
+        if not response_text or response_text.startswith("Error"):
+            return None
+        
+        # Strip markdown code fences the model sometimes adds despite instructions
+        text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", response_text.strip())
+        
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            logger.warning(f"Structured review is not valid JSON: {e}")
+            return None
+        
+        if not isinstance(data, dict) or set(data) != set(REVIEW_SCHEMA['required']):
+            logger.warning(f"Structured review has unexpected keys: {sorted(data) if isinstance(data, dict) else type(data).__name__}")
+            return None
+        
+        overall = data['overall']
+        score = data['score']
+        lists = [data['strengths'], data['improvements']]
+        if not isinstance(overall, str) or not overall.strip():
+            logger.warning("Structured review is missing the overall assessment.")
+            return None
+        if any(not isinstance(items, list) or not all(isinstance(item, str) for item in items) for items in lists):
+            logger.warning("Structured review strengths/improvements are not lists of strings.")
+            return None
+        # bool is a subclass of int, so reject it explicitly
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 1.0 <= score <= 5.0:
+            logger.warning(f"Structured review score is invalid: {score!r}")
+            return None
+        
+        return {
+            'overall': overall.strip(),
+            'strengths': [item.strip() for item in data['strengths'] if item.strip()],
+            'improvements': [item.strip() for item in data['improvements'] if item.strip()],
+            'score': float(score)
+        }
+    
+    def format_structured_review(self, review):
+        """Renders a parsed structured review as markdown in the same layout as free-form reviews."""
+        lines = [f"**Overall Assessment:** {review['overall']}", "**Strengths:**"]
+        lines += [f"- {item}" for item in review['strengths']] or ["- None noted."]
+        lines.append("**Areas for Improvement:**")
+        lines += [f"- {item}" for item in review['improvements']] or ["- None noted."]
+        lines.append(f"**Technical Score (Estimate):** {review['score']:.1f}")
+        return "\n".join(lines)
+    
+    def review_interview_answer_structured(self, question, answer, profession, grade, use_cache=True):
+        """Review an interview answer as structured JSON. Returns None if the response can't be parsed."""
+        prompt = self.create_structured_review_prompt(question, answer, profession, grade)
+        response_text = self.generate_review(prompt, generation_config=self.structured_generation_config(), use_cache=use_cache)
+        return self.parse_structured_review(response_text)
+    
+    def stream_interview_answer_review(self, question, answer, profession, grade):
+        """Like review_interview_answer, but yields the review text as it is generated."""
+        prompt = self.create_interview_review_prompt(question, answer, profession, grade)
+        return self.stream_review(prompt)
+    
     def review_cv(self, cv_text):
-        """Process a CV and generate a review."""
+        """Process a CV and generate a review. CVs above CV_CHUNK_THRESHOLD_TOKENS are reviewed in sections."""
+        threshold = get_setting('CV_CHUNK_THRESHOLD_TOKENS', 8000)
+        if threshold and estimate_tokens(cv_text) > threshold:
+            return self.review_cv_chunked(cv_text)
+        
+        prompt = self.create_cv_review_prompt(cv_text)
+        return self.generate_review(prompt, call_type=CALL_CV_REVIEW)
+
+
+class AsyncGeminiService(GeminiService):
+    """
+    Asyncio variant of GeminiService built on generate_content_async.
+    
+    Calls share the rate limiter's concurrency slots and per-minute budgets
+    with sync callers, and each attempt is bounded by GEMINI_TIMEOUT.
+    Coroutines must run on the shared event loop; call them from sync code
+    with run_async.
+    """
+    
+    @traced()
+    async def generate_review(self, prompt_text, safety_settings=None, generation_config=None, retries=None, use_cache=True,
+                              call_type=CALL_ANSWER_REVIEW):
+        """Async version of GeminiService.generate_review."""
+        # Default generation config if none provided
+        if not generation_config:
+            generation_config = {
+                'temperature': 0.7,
+                'max_output_tokens': 2048,
+            }
+        
+        with track_usage(call_type, self.model_name, prompt_text) as usage:
+            # Serve byte-identical requests from the response cache
+            cache, cache_key, cached_text = self._lookup_cache(prompt_text, generation_config, use_cache)
+            if cached_text is not None:
+                usage.cache_hit = True
+                return cached_text
+            
+            try:
+                kwargs = {'generation_config': generation_config}
+                if safety_settings:
+                    kwargs['safety_settings'] = safety_settings
+                
+                response = await get_rate_limiter().async_call(
+                    self._model.generate_content_async,
+                    prompt_text,
+                    estimated_tokens=estimate_tokens(prompt_text, generation_config.get('max_output_tokens', 0)),
+                    max_retries=retries,
+                    timeout=get_setting('GEMINI_TIMEOUT', 60.0),
+                    usage=usage,
+                    **kwargs
+                )
+                usage.response = response
+                
+                text = self._response_text(response, cache, cache_key)
+                usage.success = not text.startswith("Error")
+                return text
+                
+            except Exception as e:
+                usage.success = False
+                logger.error(f"Gemini API call failed: {type(e).__name__} {e}", exc_info=True)
+                return f"Error: AI service encountered an issue ({type(e).__name__}). Please try again later."
+    
+    async def review_interview_answer(self, question, answer, profession, grade, use_cache=True):
+        """Process an interview answer and generate a review."""
+        prompt = self.create_interview_review_prompt(question, answer, profession, grade)
+        return await self.generate_review(prompt, use_cache=use_cache)
+    
+    async def review_interview_answer_structured(self, question, answer, profession, grade, use_cache=True):
+        """Async version of GeminiService.review_interview_answer_structured."""
+        prompt = self.create_structured_review_prompt(question, answer, profession, grade)
+        response_text = await self.generate_review(prompt, generation_config=self.structured_generation_config(), use_cache=use_cache)
+        return self.parse_structured_review(response_text)
+    
+    async def review_answers(self, pairs, profession, grade, use_cache=True, limit=None, structured=False):
+        """
+        Reviews several interview answers concurrently.
+        
+        Args:
+            pairs: List of (question text, answer text) tuples.
+            profession: Profession name, or a list with one per pair.
+            grade: Grade level, or a list with one per pair.
+            use_cache: Set to False to request fresh reviews.
+            limit: Optional cap on concurrent requests for this batch.
+            structured: Request structured reviews instead of markdown.
+            
+        Returns:
+            A list of reviews (or "Error: ..." strings) in the same order as pairs. With
+            structured=True each review is a parsed dict, or an "Error: ..." string if the
+            response didn't match the schema.
+        """
+        professions = profession if isinstance(profession, list) else [profession] * len(pairs)
+        grades = grade if isinstance(grade, list) else [grade] * len(pairs)
+        review = self.review_interview_answer_structured if structured else self.review_interview_answer
+        results = await gather_in_order(
+            (
+                review(question, answer, pair_profession, pair_grade, use_cache=use_cache)
+                for (question, answer), pair_profession, pair_grade in zip(pairs, professions, grades)
+            ),
+            limit=limit
+        )
+        if structured:
+            return [
+                "Error: AI response did not match the review schema." if result is None else self._error_text(result)
+                for result in results
+            ]
+        return [self._error_text(result) for result in results]
+    
+    async def review_cv(self, cv_text):
+        """Process a CV and generate a review. CVs above CV_CHUNK_THRESHOLD_TOKENS are reviewed in sections."""
+        threshold = get_setting('CV_CHUNK_THRESHOLD_TOKENS', 8000)
+        if threshold and estimate_tokens(cv_text) > threshold:
+            return await self.review_cv_chunked(cv_text)
+        
         prompt = self.create_cv_review_prompt(cv_text)
-        return self.generate_review(prompt)
\ No newline at end of file
+        return await self.generate_review(prompt, call_type=CALL_CV_REVIEW)
+    
+    async def review_cvs(self, cv_texts):
+        """Reviews several CVs concurrently. Returns the reviews in the same order as cv_texts."""
+        results = await gather_in_order(self.review_cv(cv_text) for cv_text in cv_texts)
+        return [self._error_text(result) for result in results]
+    
+    async def review_cv_chunked(self, cv_text):
+        """Async version of GeminiService.review_cv_chunked."""
+        sections = self.split_cv_text(cv_text, get_setting('CV_CHUNK_TARGET_TOKENS', 3000))
+        logger.info(f"Reviewing CV in {len(sections)} sections")
+        
+        section_config = {
+            'temperature': 0.4,
+            'max_output_tokens': get_setting('CV_CHUNK_NOTES_MAX_TOKENS', 512),
+        }
+        
+        # The shared rate limiter still caps how many of these reach the API at once
+        section_notes = await gather_in_order(
+            (
+                self.generate_review(
+                    self.create_cv_section_prompt(section_text, number, len(sections)),
+                    generation_config=section_config,
+                    call_type=CALL_CV_REVIEW
+                )
+                for number, section_text in enumerate(sections, 1)
+            ),
+            limit=get_setting('CV_CHUNK_CONCURRENCY', 4)
+        )
+        
+        for note in section_notes:
+            note = self._error_text(note)
+            if note.startswith("Error"):
+                return note
+        
+        return await self.generate_review(self.create_cv_merge_prompt(section_notes), call_type=CALL_CV_REVIEW)
+    
+    @staticmethod
+    def _error_text(result):
+        """Turns an exception returned by gather_in_order into the usual error string."""
+        if isinstance(result, BaseException):
+            logger.error(f"Gemini request failed: {type(result).__name__} {result}")
+            return f"Error: AI service encountered an issue ({type(result).__name__}). Please try again later."
+        return result
@@ -0,0 +1,160 @@
+import base64
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import and_, func, or_
+from app import db
+from app.models import Interview, Profession
+from app.services import stats_service
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+_count_cache = OrderedDict()  # (user_id, min_rating, max_rating) -> (cached_at, version, count)
+_count_cache_lock = threading.Lock()
+_COUNT_CACHE_MAX_ENTRIES = 1024
+
+
+class HistoryPage:
+    """One page of a user's interview history, newest first."""
+
+    def __init__(self, items, total, has_next, has_prev, next_cursor, prev_cursor):
+        self.items = items
+        self.total = total
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def encode_cursor(interview):
+    """Encode an interview's (created_at, id) position as an opaque URL-safe token."""
+    raw = f"{interview.created_at.isoformat()}|{interview.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token.
+
+    Returns:
+        A (created_at, id) tuple, or None if the token is missing or malformed
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, interview_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(interview_id)
+    except (ValueError, UnicodeDecodeError):
+        logger.warning(f"Ignoring malformed history cursor {token!r}")
+        return None
+
+
+def get_history_page(user_id, min_rating=None, max_rating=None, after=None, before=None, per_page=10):
+    """
+    Get a page of a user's interviews using keyset pagination on (created_at, id).
+
+    Each page is one indexed range scan on (user_id, created_at) that reads
+    per_page + 1 rows, with the profession name joined in, so its cost does
+    not grow with how deep the user pages.
+
+    Args:
+        user_id: ID of the user
+        min_rating: Optional minimum overall rating
+        max_rating: Optional maximum overall rating
+        after: Cursor of the last interview on the previous page (older interviews follow)
+        before: Cursor of the first interview on the next page (newer interviews follow)
+        per_page: Interviews per page
+
+    Returns:
+        A HistoryPage
+    """
+    # Base query for user's interviews, with the profession name in the same query
+    query = db.session.query(Interview, Profession.name).join(
+        Profession, Interview.profession_id == Profession.id
+    ).filter(Interview.user_id == user_id)
+
+    # Apply rating filters if provided
+    if min_rating is not None:
+        query = query.filter(Interview.overall_rating >= min_rating)
+    if max_rating is not None:
+        query = query.filter(Interview.overall_rating <= max_rating)
+
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if after_key is None else None
+
+    if before_key:
+        # Walk forwards in time from the cursor, then flip back to newest first
+        created_at, interview_id = before_key
+        rows = query.filter(or_(
+            Interview.created_at > created_at,
+            and_(Interview.created_at == created_at, Interview.id > interview_id)
+        )).order_by(Interview.created_at.asc(), Interview.id.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if after_key:
+            created_at, interview_id = after_key
+            query = query.filter(or_(
+                Interview.created_at < created_at,
+                and_(Interview.created_at == created_at, Interview.id < interview_id)
+            ))
+        rows = query.order_by(Interview.created_at.desc(), Interview.id.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = after_key is not None
+
+    items = []
+    for interview, profession_name in rows:
+        interview.profession_name = profession_name
+        items.append(interview)
+
+    return HistoryPage(
+        items=items,
+        total=count_interviews(user_id, min_rating, max_rating),
+        has_next=has_next and bool(items),
+        has_prev=has_prev and bool(items),
+        next_cursor=encode_cursor(items[-1]) if items else None,
+        prev_cursor=encode_cursor(items[0]) if items else None
+    )
+
+
+def count_interviews(user_id, min_rating=None, max_rating=None):
+    """
+    Total number of a user's interviews matching the rating filters.
+
+    The unfiltered total is read from the user's summary row. Filtered
+    totals are counted once and cached in-process for HISTORY_COUNT_CACHE_TTL
+    seconds, or until the user's summary row changes.
+    """
+    stats = stats_service.get_user_stats(user_id)
+    if min_rating is None and max_rating is None:
+        return stats.interview_count
+
+    key = (user_id, min_rating, max_rating)
+    version = stats.updated_at
+    ttl = get_setting('HISTORY_COUNT_CACHE_TTL', 60)
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl and cached[1] == version:
+            _count_cache.move_to_end(key)
+            return cached[2]
+
+    query = db.session.query(func.count(Interview.id)).filter(Interview.user_id == user_id)
+    if min_rating is not None:
+        query = query.filter(Interview.overall_rating >= min_rating)
+    if max_rating is not None:
+        query = query.filter(Interview.overall_rating <= max_rating)
+    count = query.scalar()
+
+    with _count_cache_lock:
+        _count_cache[key] = (time.monotonic(), version, count)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > _COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.popitem(last=False)
+
+    return count
@@ -1,20 +1,41 @@
 import logging
-import os
 import re
 from app import db
-from app.models import Interview, Question, Answer, Profession
-from app.services.transcription_service import TranscriptionService
+from app.models import Interview, Answer, Profession
+from app.services.transcription_service import TranscriptionService, get_audio_mime_type
 from app.services.gemini_service import GeminiService
-from sqlalchemy.sql import func
+from app.services.question_sampler import question_sampler
+from app.services import stats_service
+from app.services.storage import get_storage
+from app.services.audio_preprocessing import compact_audio
+from app.services.tracing import traced
+from app.services.usage_service import usage_user
+from sqlalchemy import func, insert
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
+from flask import current_app
 
 logger = logging.getLogger(__name__)
 
+def extract_rating(feedback, answer_id=None):
+    """Extract the technical score from review feedback, or None if it is missing or out of range."""
+    # Take the first number after the label on the same line or the next one, not anywhere further down
+    score_match = re.search(r"Technical Score[^\d\n]*\n?[^\d\n]*?(\d+\.\d+|\d+)", feedback)
+    if score_match:
+        try:
+            rating = float(score_match.group(1))
+            if 1.0 <= rating <= 5.0:
+                return rating
+        except ValueError:
+            logger.warning(f"Failed to parse rating from feedback for answer {answer_id}")
+    return None
+
 class InterviewService:
     def __init__(self):
         self.transcription_service = TranscriptionService()
         self.gemini_service = GeminiService()
     
+    @traced()
     def create_interview(self, user_id, profession_id, grade):
         """Create a new interview session."""
         try:
@@ -30,6 +51,16 @@ class InterviewService:
                 logger.error(f"Invalid grade: {grade}")
                 return None, "Invalid grade selected."
             
+            # Sample random questions for this profession and grade, favouring ones the user hasn't seen lately
+            recent_ids = self._recent_question_ids(user_id, profession_id, grade)
+            question_ids = question_sampler.sample(
+                profession_id,
+                grade,
+                current_app.config['QUESTIONS_PER_INTERVIEW'],
+                recent_ids=recent_ids,
+                recent_weight=current_app.config['QUESTION_RECENT_WEIGHT']
+            )
+            
             # Create new interview
             interview = Interview(
                 user_id=user_id,
@@ -38,21 +69,17 @@ class InterviewService:
             )
             
             db.session.add(interview)
-            db.session.commit()
+            db.session.flush()  # Flush to get the ID
             
-            # Select 5 random questions for this profession and grade
-            questions = Question.query.filter_by(
-                profession_id=profession_id, 
-                grade=grade
-            ).order_by(func.random()).limit(5).all()
+            # Create answer placeholders for each question in a single bulk insert
+            if question_ids:
+                db.session.execute(insert(Answer), [
+                    {'interview_id': interview.id, 'question_id': question_id}
+                    for question_id in question_ids
+                ])
             
-            # Create answer placeholders for each question
-            for question in questions:
-                answer = Answer(
-                    interview_id=interview.id,
-                    question_id=question.id
-                )
-                db.session.add(answer)
+            # Count the interview in the user's summary row
+            stats_service.record_interview_started(user_id)
             
             db.session.commit()
             
@@ -64,22 +91,33 @@ class InterviewService:
             logger.error(f"Error creating interview: {e}")
             return None, f"Error creating interview: {str(e)}"
     
+    def _recent_question_ids(self, user_id, profession_id, grade):
+        """Return the IDs of questions asked in the user's most recent interviews for this profession and grade."""
+        recent_interviews = db.session.query(Interview.id).filter_by(
+            user_id=user_id,
+            profession_id=profession_id,
+            grade=grade
+        ).order_by(Interview.created_at.desc()).limit(current_app.config['QUESTION_RECENT_INTERVIEWS'])
+        
+        rows = db.session.query(Answer.question_id).filter(Answer.interview_id.in_(recent_interviews.scalar_subquery()))
+        return frozenset(question_id for (question_id,) in rows)
+    
+    @traced()
     def get_interview_questions(self, interview_id):
         """Get all questions for an interview."""
         try:
-            # Get the interview
-            interview = Interview.query.get(interview_id)
+            # Get the interview with its answers and their questions in two queries
+            interview = Interview.query.options(
+                selectinload(Interview.answers).joinedload(Answer.question)
+            ).filter_by(id=interview_id).first()
             if not interview:
                 logger.error(f"Interview with ID {interview_id} not found.")
                 return None, "Interview not found."
             
-            # Get answers (which link to questions)
-            answers = Answer.query.filter_by(interview_id=interview_id).all()
-            
             # Create a list of questions with their IDs and texts
             questions = []
-            for answer in answers:
-                question = Question.query.get(answer.question_id)
+            for answer in interview.answers:
+                question = answer.question
                 questions.append({
                     'id': question.id,
                     'text': question.question_text,
@@ -93,94 +131,228 @@ class InterviewService:
             logger.error(f"Error getting interview questions: {e}")
             return None, f"Error retrieving questions: {str(e)}"
     
+    @traced()
     def process_answer(self, answer_id, audio_path):
-        """Process an interview answer."""
+        """
+        Process an interview answer, returning once its review is stored.
+        
+        Runs the same pipeline as stream_answer, so every pipeline and review
+        output mode behaves the same whether or not the caller streams.
+        
+        Returns:
+            Tuple of (answer, error message)
+        """
+        for event, data in self.stream_answer(answer_id, audio_path):
+            if event == 'error':
+                return None, data['error']
+            if event == 'complete':
+                return db.session.get(Answer, data['answer_id']), None
+        return None, "Answer processing ended unexpectedly."
+    
+    def stream_answer(self, answer_id, audio_path):
+        """
+        Process an interview answer, yielding progress as it happens.
+        
+        The two-call pipeline streams a markdown review as it is generated. In
+        fused mode, and for structured reviews, the review arrives in one
+        piece, since their JSON responses can't be shown until they are
+        complete; a structured review that can't be parsed falls back to a
+        streamed markdown one.
+        
+        Args:
+            answer_id: ID of the answer being processed
+            audio_path: Storage key of the uploaded recording
+            
+        Yields:
+            (event, data) tuples: ('transcribed', {transcript}), any number of
+            ('feedback', {text}), then ('complete', {answer_id, interview_id,
+            feedback, rating}) or ('error', {error})
+        """
         try:
-            # Get the answer
-            answer = Answer.query.get(answer_id)
-            if not answer:
-                logger.error(f"Answer with ID {answer_id} not found.")
-                return None, "Answer not found."
-            
-            # Get associated question
-            question = Question.query.get(answer.question_id)
-            if not question:
-                logger.error(f"Question with ID {answer.question_id} not found.")
-                return None, "Question not found."
-            
-            # Get interview and profession info
-            interview = Interview.query.get(answer.interview_id)
-            profession = Profession.query.get(interview.profession_id)
-            
-            # Store the audio path
+            # Get the answer with its question, interview and profession in one query
+            answer = Answer.query.options(
+                joinedload(Answer.question),
+                joinedload(Answer.interview).joinedload(Interview.profession)
+            ).filter_by(id=answer_id).first()
+            if not answer or not answer.question:
+                yield 'error', {'error': "Answer not found."}
+                return
+            
+            question = answer.question
+            interview = answer.interview
+            
+            # Reuse the hash computed at upload time when it belongs to this file
+            audio_hash = answer.audio_hash if answer.audio_path == audio_path else None
             answer.audio_path = audio_path
             
-            # Transcribe the audio
-            transcribed_text = self.transcription_service.transcribe(audio_path)
-            answer.transcribed_text = transcribed_text
-            
-            # If transcription failed or returned an error message
-            if transcribed_text.startswith("Sorry") or transcribed_text.startswith("Error"):
-                # For testing purposes, we'll use a fallback text instead of returning an error
-                logger.info("Using fallback text instead of returning transcription error")
-                # We'll continue with the fallback text instead of returning
-                pass
-            
-            # Generate review using Gemini
-            feedback = self.gemini_service.review_interview_answer(
-                question.question_text,
-                transcribed_text,
-                profession.name,
-                interview.grade
-            )
-            
-            answer.feedback = feedback
-            
-            # Extract rating from feedback
-            score_match = re.search(r"Technical Score.*?(\d+\.\d+|\d+)", feedback, re.DOTALL)
-            if score_match:
-                try:
-                    rating = float(score_match.group(1))
-                    if 1.0 <= rating <= 5.0:
-                        answer.rating = rating
-                except ValueError:
-                    logger.warning(f"Failed to parse rating from feedback for answer {answer_id}")
-            
-            db.session.commit()
+            # Charge the Gemini calls to the interview's owner (this usually runs in a background job)
+            with usage_user(interview.user_id):
+                # Fused mode transcribes and reviews in one request; fall back to two calls if it fails
+                fused_result = None
+                if current_app.config.get('INTERVIEW_PIPELINE_MODE') == 'fused':
+                    fused_result = self._transcribe_and_review(audio_path, question, interview.profession, interview)
+                
+                if fused_result:
+                    self._apply_fused_result(answer, fused_result)
+                    db.session.commit()
+                    yield 'transcribed', {'transcript': answer.transcribed_text}
+                    yield 'feedback', {'text': answer.feedback}
+                else:
+                    # Transcribe the audio
+                    transcribed_text = self.transcription_service.transcribe(audio_path, audio_hash=audio_hash)
+                    answer.transcribed_text = transcribed_text
+                    db.session.commit()
+                    yield 'transcribed', {'transcript': transcribed_text}
+                
+                    # Structured mode asks for compact JSON, which can't be shown until it is complete
+                    review = None
+                    if current_app.config.get('REVIEW_OUTPUT_MODE') == 'structured':
+                        review = self.gemini_service.review_interview_answer_structured(
+                            question.question_text,
+                            transcribed_text,
+                            interview.profession.name,
+                            interview.grade
+                        )
+                        if review is None:
+                            logger.warning(f"Structured review failed for answer {answer_id}, falling back to a markdown review")
+                    
+                    if review:
+                        self._apply_review(answer, self.gemini_service.format_structured_review(review), review)
+                        db.session.commit()
+                        yield 'feedback', {'text': answer.feedback}
+                    else:
+                        # Stream the markdown review as Gemini generates it
+                        parts = []
+                        for text in self.gemini_service.stream_interview_answer_review(
+                            question.question_text,
+                            transcribed_text,
+                            interview.profession.name,
+                            interview.grade
+                        ):
+                            parts.append(text)
+                            yield 'feedback', {'text': text}
+                        
+                        # Persist the final text and rating
+                        self._apply_review(answer, "".join(parts))
+                        db.session.commit()
             
             # Check if this completes the interview
             self._check_interview_completion(interview)
             
-            return answer, None
+            yield 'complete', {
+                'answer_id': answer.id,
+                'interview_id': answer.interview_id,
+                'feedback': answer.feedback,
+                'rating': answer.rating
+            }
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error processing answer: {e}")
-            return None, f"Error processing answer: {str(e)}"
+            logger.error(f"Error streaming answer {answer_id}: {e}", exc_info=True)
+            yield 'error', {'error': f"AI service encountered an issue ({type(e).__name__}). Please try again later."}
     
+    @traced()
+    def _transcribe_and_review(self, audio_path, question, profession, interview):
+        """Run the fused single-request pipeline. Returns None so the caller can fall back to two calls."""
+        storage = get_storage()
+        if not storage.exists(audio_path):
+            return None
+        
+        audio_data = storage.read(audio_path)
+        if not audio_data:
+            return None
+        
+        # Compact the recording before upload if preprocessing is enabled
+        audio_data, mime_type = compact_audio(audio_data, audio_path, get_audio_mime_type(audio_path))
+        
+        result = self.gemini_service.review_interview_audio(
+            question.question_text,
+            audio_data,
+            mime_type,
+            profession.name,
+            interview.grade
+        )
+        
+        if result is None:
+            logger.warning(f"Fused review failed for {audio_path}, falling back to separate transcription and review")
+        
+        return result
+    
+    def _apply_fused_result(self, answer, result):
+        """Store the transcript and review from a fused pipeline response on an answer."""
+        answer.transcribed_text = result['transcript']
+        self._apply_review(answer, result['feedback'])
+        # The model's own score takes precedence over one parsed from the feedback text
+        if result['score'] is not None:
+            answer.rating = result['score']
+    
+    @traced()
+    def _apply_review(self, answer, feedback, review=None):
+        """
+        Store a review on an answer.
+        
+        Args:
+            answer: The Answer to update
+            feedback: Review markdown, shown on the results pages
+            review: Parsed structured review, whose fields and score are stored
+                directly; None for a free-form review, whose score is parsed from the text
+        """
+        answer.feedback = feedback
+        if review:
+            answer.review_overall = review['overall']
+            answer.review_strengths = review['strengths']
+            answer.review_improvements = review['improvements']
+            answer.rating = review['score']
+            return
+        
+        answer.review_overall = None
+        answer.review_strengths = None
+        answer.review_improvements = None
+        
+        # Extract rating from feedback
+        rating = extract_rating(feedback, answer.id)
+        if rating is not None:
+            answer.rating = rating
+    
+    @traced()
     def _check_interview_completion(self, interview):
         """Check if all answers in an interview have been processed and calculate overall rating."""
         try:
-            # Get all answers for this interview
-            answers = Answer.query.filter_by(interview_id=interview.id).all()
+            # Count the answers still waiting for feedback instead of loading them all
+            pending = db.session.query(func.count(Answer.id)).filter(
+                Answer.interview_id == interview.id,
+                Answer.feedback.is_(None)
+            ).scalar()
             
-            # Check if all answers have feedback
-            all_completed = all(answer.feedback is not None for answer in answers)
-            
-            if all_completed:
+            if pending == 0:
                 # Calculate overall rating (average of all answer ratings)
-                ratings = [answer.rating for answer in answers if answer.rating is not None]
+                average = db.session.query(func.avg(Answer.rating)).filter(
+                    Answer.interview_id == interview.id,
+                    Answer.rating.isnot(None)
+                ).scalar()
                 
-                if ratings:
-                    overall_rating = sum(ratings) / len(ratings)
-                    interview.overall_rating = round(overall_rating, 1)
+                if average is not None:
+                    overall_rating = round(average, 1)
                 else:
                     # Set a default rating if no individual ratings are available
-                    interview.overall_rating = 3.0  # Default rating
+                    overall_rating = 3.0  # Default rating
                     logger.warning(f"No answer ratings found for interview {interview.id}, setting default rating.")
                 
-                # Mark interview as completed
-                interview.completed_at = datetime.utcnow()
+                if interview.completed_at is None:
+                    # Only the request that marks the interview completed counts it, so concurrent answers can't count it twice
+                    claimed = Interview.query.filter_by(id=interview.id, completed_at=None).update({
+                        'overall_rating': overall_rating,
+                        'completed_at': datetime.utcnow()
+                    })
+                    if claimed:
+                        stats_service.record_interview_completed(
+                            interview.user_id, interview.profession_id, interview.grade, overall_rating
+                        )
+                elif interview.overall_rating != overall_rating:
+                    # A re-answered question changed the rating of a completed interview
+                    interview.overall_rating = overall_rating
+                    stats_service.refresh_rating_stats([interview.id])
+                
                 db.session.commit()
                 
                 logger.info(f"Interview {interview.id} completed with rating {interview.overall_rating}")
@@ -189,31 +361,37 @@ class InterviewService:
             db.session.rollback()
             logger.error(f"Error checking interview completion: {e}")
     
+    @traced()
     def get_interview_details(self, interview_id):
         """Get detailed information about an interview."""
         try:
-            # Get the interview
-            interview = Interview.query.get(interview_id)
+            # Get the interview, profession, answers and questions in two queries
+            interview = Interview.query.options(
+                joinedload(Interview.profession),
+                selectinload(Interview.answers).joinedload(Answer.question)
+            ).filter_by(id=interview_id).first()
             if not interview:
                 logger.error(f"Interview with ID {interview_id} not found.")
                 return None, "Interview not found."
             
             # Get the profession
-            profession = Profession.query.get(interview.profession_id)
-            
-            # Get all answers for this interview
-            answers = Answer.query.filter_by(interview_id=interview_id).all()
+            profession = interview.profession
             
             # Create answer details
             answer_details = []
-            for answer in answers:
-                question = Question.query.get(answer.question_id)
+            for answer in interview.answers:
+                question = answer.question
                 answer_details.append({
                     'question_id': question.id,
                     'question_text': question.question_text,
                     'transcribed_text': answer.transcribed_text,
                     'feedback': answer.feedback,
-                    'rating': answer.rating
+                    'rating': answer.rating,
+                    'review': {
+                        'overall': answer.review_overall,
+                        'strengths': answer.review_strengths or [],
+                        'improvements': answer.review_improvements or []
+                    } if answer.review_overall else None
                 })
             
             # Create interview details
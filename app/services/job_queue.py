@@ -0,0 +1,425 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import db
+from app.models import Job
+from app.services.tracing import current_span, finish_trace, start_trace
+
+logger = logging.getLogger(__name__)
+
+
+# Shown on jobs whose worker died or hung mid-job
+STALE_JOB_ERROR = "Processing took too long and was stopped. Please try again."
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds the configured maximum number of jobs."""
+
+
+class JobError(Exception):
+    """Raised by job handlers to mark a job as failed with a user-facing message."""
+
+
+class ThreadPoolBackend:
+    """Runs jobs on an in-process thread pool as soon as they are enqueued."""
+
+    def __init__(self, app, job_queue):
+        self.app = app
+        self.job_queue = job_queue
+        self.workers = app.config['JOB_QUEUE_WORKERS']
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Run jobs left queued by a previous process, e.g. one that was restarted or crashed."""
+        with self.app.app_context():
+            job_ids = [job_id for (job_id,) in db.session.query(Job.id).filter_by(status='queued').order_by(Job.created_at)]
+
+        # Other processes may dispatch the same rows; claim_job lets only one of them run each job
+        for job_id in job_ids:
+            self.dispatch(job_id)
+        if job_ids:
+            logger.info(f"Re-dispatched {len(job_ids)} queued jobs")
+
+    def dispatch(self, job_id):
+        with self._lock:
+            # The pool is created lazily, and again after a fork, so each worker process gets its own threads
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='job-worker'
+                )
+                self._executor_pid = os.getpid()
+                self._pending = 0
+            self._pending += 1
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                if self.job_queue.claim_job(job_id):
+                    self.job_queue.run_job(job_id)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def queue_depth(self):
+        with self._lock:
+            return self._pending
+
+
+class DatabaseBackend:
+    """Leaves jobs in the job table for polling workers to claim."""
+
+    def __init__(self, app, job_queue):
+        self.app = app
+        self.job_queue = job_queue
+        self.workers = app.config['JOB_QUEUE_WORKERS']
+        self.poll_interval = app.config['JOB_QUEUE_POLL_INTERVAL']
+        self._threads = []
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start poller threads inside this process if configured to do so."""
+        if not self.app.config['JOB_QUEUE_START_WORKERS'] or self._threads:
+            return
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self.work,
+                args=(self._stop_event,),
+                name=f'job-poller-{i}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def dispatch(self, job_id):
+        # Nothing to do: the committed row is picked up by the next poll
+        pass
+
+    def work(self, stop_event, max_jobs=None):
+        """
+        Poll the job table and run queued jobs until stopped.
+
+        Args:
+            stop_event: threading.Event that ends the loop when set
+            max_jobs: Optional number of jobs to run before returning
+
+        Returns:
+            The number of jobs processed
+        """
+        processed = 0
+        next_reap = 0
+        while not stop_event.is_set():
+            job_id = None
+            try:
+                with self.app.app_context():
+                    # Now and then, fail jobs whose worker died so their pages stop waiting
+                    if time.monotonic() >= next_reap:
+                        self.job_queue.reap_stale_jobs()
+                        next_reap = time.monotonic() + min(self.job_queue.stale_seconds, 60)
+                    job_id = self._claim_next()
+                    if job_id:
+                        self.job_queue.run_job(job_id)
+                        processed += 1
+            except Exception as e:
+                logger.error(f"Job poller error: {e}", exc_info=True)
+
+            if max_jobs is not None and processed >= max_jobs:
+                break
+
+            # Only sleep when the queue was empty so bursts drain quickly
+            if not job_id:
+                stop_event.wait(self.poll_interval)
+
+        return processed
+
+    def _claim_next(self):
+        """Claim the oldest queued job, retrying if another worker wins the race."""
+        for _ in range(5):
+            job = Job.query.filter_by(status='queued').order_by(Job.created_at).first()
+            if not job:
+                return None
+            if self.job_queue.claim_job(job.id):
+                return job.id
+        return None
+
+    def queue_depth(self):
+        with self.app.app_context():
+            return Job.query.filter_by(status='queued').count()
+
+
+BACKENDS = {
+    'thread': ThreadPoolBackend,
+    'database': DatabaseBackend,
+}
+
+
+class JobQueue:
+    """
+    Answer/CV processing queue with pluggable backends.
+
+    Every job is persisted in the `job` table so its status can be polled from
+    any process; the backend decides where and when the handler actually runs.
+    """
+
+    def __init__(self, app=None):
+        self._handlers = {}
+        self._failure_handlers = {}
+        self.app = None
+        self.backend = None
+        self.max_depth = None
+        self.stale_seconds = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._current = threading.local()  # ID of the job running on this thread
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_name = app.config['JOB_QUEUE_BACKEND']
+        if backend_name not in BACKENDS:
+            raise ValueError(f"Unknown job queue backend: {backend_name}")
+
+        self.app = app
+        self.max_depth = app.config['JOB_QUEUE_MAX_DEPTH']
+        self.stale_seconds = app.config['JOB_QUEUE_STALE_SECONDS']
+        self.backend = BACKENDS[backend_name](app, self)
+        app.extensions['job_queue'] = self
+        logger.info(f"Job queue initialized with {backend_name} backend "
+                    f"({app.config['JOB_QUEUE_WORKERS']} workers, max depth {self.max_depth})")
+
+    def start(self):
+        """Recover jobs abandoned by earlier processes, then start the backend."""
+        # A missing job table (e.g. before the first migration) shouldn't stop the app from starting
+        try:
+            with self.app.app_context():
+                self.reap_stale_jobs()
+            self.backend.start()
+        except Exception as e:
+            logger.warning(f"Could not start the job queue: {e}")
+
+    def handler(self, job_type):
+        """Decorator registering a function as the handler for a job type."""
+        def decorator(func):
+            self._handlers[job_type] = func
+            return func
+        return decorator
+
+    def failure_handler(self, job_type):
+        """
+        Decorator registering a function called when a job of this type fails.
+
+        It is called with the error message and the job's payload as keyword
+        arguments, both when the handler raises and when a stale job is
+        reaped, so records the job was updating can be marked as failed too.
+        """
+        def decorator(func):
+            self._failure_handlers[job_type] = func
+            return func
+        return decorator
+
+    def enqueue(self, job_type, user_id=None, **payload):
+        """
+        Persist a new job and hand it to the backend.
+
+        Args:
+            job_type: Name of a registered handler
+            user_id: Owner of the job, used for status access checks
+            **payload: JSON-serialisable keyword arguments for the handler
+
+        Returns:
+            The created Job record
+
+        Raises:
+            QueueFullError: If the queue already holds JOB_QUEUE_MAX_DEPTH jobs
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type: {job_type}")
+
+        if self.backend.queue_depth() >= self.max_depth:
+            raise QueueFullError("The processing queue is full. Please try again shortly.")
+
+        # Let the job continue the enqueuing request's trace, whichever process runs it
+        parent_span = current_span()
+        if parent_span is not None:
+            payload['_traceparent'] = parent_span.traceparent
+
+        job = Job(
+            id=str(uuid.uuid4()),
+            job_type=job_type,
+            user_id=user_id,
+            payload=json.dumps(payload),
+            status='queued'
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.backend.dispatch(job.id)
+        logger.info(f"Enqueued job {job.id} ({job_type})")
+        return job
+
+    def get_job(self, job_id):
+        return Job.query.get(job_id)
+
+    def queue_depth(self):
+        return self.backend.queue_depth()
+
+    def claim_job(self, job_id):
+        """Atomically move a job from queued to running. Returns True if this worker won it."""
+        claimed = Job.query.filter_by(id=job_id, status='queued').update({
+            'status': 'running',
+            'worker_id': self.worker_id,
+            'started_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def report_progress(self, progress):
+        """
+        Store partial output for the job running on this thread, e.g. for a stream relaying it.
+
+        The write goes through its own connection, so it neither commits nor
+        discards the handler's session. Does nothing outside a job.
+
+        Args:
+            progress: JSON-serialisable progress, replacing the previous value
+        """
+        job_id = getattr(self._current, 'job_id', None)
+        if job_id is None:
+            return
+
+        # Progress is only informative; never fail the job over it
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    Job.__table__.update()
+                    .where(Job.__table__.c.id == job_id)
+                    .values(progress=json.dumps(progress))
+                )
+        except Exception as e:
+            logger.warning(f"Could not store progress for job {job_id}: {e}")
+
+    def watch(self, job_id, poll_interval, timeout):
+        """
+        Poll a job's row until it finishes, wherever it runs.
+
+        Args:
+            job_id: ID of the job to watch
+            poll_interval: Seconds between polls
+            timeout: Seconds after which to stop watching an unfinished job
+
+        Yields:
+            The job's to_dict() after every poll, ending with its completed or
+            failed state, or with the last state seen when the timeout expires
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = db.session.get(Job, job_id, populate_existing=True)
+            state = job.to_dict() if job else None
+            # End the read transaction so the next poll sees the worker's commits
+            db.session.rollback()
+
+            if state is None:
+                return
+            yield state
+            if state['status'] in ('completed', 'failed') or time.monotonic() >= deadline:
+                return
+            time.sleep(poll_interval)
+
+    def reap_stale_jobs(self):
+        """
+        Fail jobs that have been running for longer than JOB_QUEUE_STALE_SECONDS.
+
+        A worker that crashes or is killed mid-job leaves its row in 'running',
+        and pages polling the job would otherwise wait forever.
+
+        Returns:
+            The number of jobs reaped
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        stale = Job.query.filter(Job.status == 'running', Job.started_at < cutoff).all()
+
+        reaped = 0
+        for job in stale:
+            # Only fail the job if it is still running, in case it finished while we looked
+            updated = Job.query.filter_by(id=job.id, status='running').update({
+                'status': 'failed',
+                'error': STALE_JOB_ERROR,
+                'finished_at': datetime.utcnow()
+            }, synchronize_session=False)
+            if updated:
+                self._handle_failure(job, STALE_JOB_ERROR)
+                reaped += 1
+                logger.warning(f"Job {job.id} ({job.job_type}) on {job.worker_id} was running since "
+                               f"{job.started_at} and has been marked as failed")
+        db.session.commit()
+        return reaped
+
+    def _handle_failure(self, job, error):
+        """Call the failure handler for a failed job, if its type has one."""
+        failure_handler = self._failure_handlers.get(job.job_type)
+        if failure_handler is None:
+            return
+        payload = job.get_payload()
+        payload.pop('_traceparent', None)
+        try:
+            failure_handler(error, **payload)
+        except Exception as e:
+            logger.error(f"Failure handler for job {job.id} ({job.job_type}) failed: {e}", exc_info=True)
+
+    def run_job(self, job_id):
+        """Run the handler for an already-claimed job and store its outcome."""
+        job = Job.query.get(job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found.")
+            return
+
+        payload = job.get_payload()
+        trace_root = start_trace(
+            f"job {job.job_type}",
+            traceparent=payload.pop('_traceparent', None),
+            attributes={'job.id': job_id, 'job.type': job.job_type}
+        )
+
+        start_time = time.monotonic()
+        error = None
+        self._current.job_id = job_id
+        try:
+            handler = self._handlers[job.job_type]
+            result = handler(**payload)
+            outcome = {'status': 'completed', 'result': json.dumps(result)}
+        except Exception as e:
+            error = e
+            db.session.rollback()
+            message = str(e) if isinstance(e, JobError) else f"Error processing job: {str(e)}"
+            if not isinstance(e, JobError):
+                logger.error(f"Job {job_id} ({job.job_type}) failed: {e}", exc_info=True)
+            outcome = {'status': 'failed', 'error': message}
+        finally:
+            self._current.job_id = None
+
+        # Only finish the job if it is still running: the reaper may have failed it meanwhile,
+        # and pages watching it must not see it flip from failed to completed
+        outcome['finished_at'] = datetime.utcnow()
+        finished = Job.query.filter_by(id=job_id, status='running').update(outcome, synchronize_session=False)
+        if finished and outcome['status'] == 'failed':
+            self._handle_failure(job, outcome['error'])
+        db.session.commit()
+        finish_trace(trace_root, error)
+
+        if finished:
+            logger.info(f"Job {job_id} {outcome['status']} in {time.monotonic() - start_time:.2f}s")
+        else:
+            logger.warning(f"Job {job_id} ({job.job_type}) finished after {time.monotonic() - start_time:.2f}s "
+                           f"but had already been marked as failed; its {outcome['status']} outcome was discarded")
+
+job_queue = JobQueue()
@@ -0,0 +1,224 @@
+"""
+Prometheus metrics for requests, database queries, Gemini calls and uploads.
+
+Enabled with METRICS_ENABLED, which needs the optional prometheus_client
+package. Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory
+shared by the workers: each worker then writes its samples to memory-mapped
+files there, and /metrics aggregates every worker's files no matter which
+worker serves the scrape (gunicorn.conf.py cleans up after dead workers).
+
+When metrics are disabled the record_* helpers return after a single
+check, and no request hooks or SQLAlchemy listeners are installed.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from flask import Response, current_app, g, request
+from sqlalchemy import event
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Seconds; requests and Gemini calls span milliseconds to minutes
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+GEMINI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+LIMITER_WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+# [query count, query seconds] for the current request; None outside requests
+_request_queries = contextvars.ContextVar('request_queries', default=None)
+
+
+class _Metrics:
+    """The process's metric objects, created once because prometheus_client registers them globally."""
+
+    def __init__(self):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'HTTP request latency',
+            ['blueprint', 'endpoint', 'method', 'status'], buckets=REQUEST_BUCKETS
+        )
+        self.requests_in_progress = Gauge(
+            'http_requests_in_progress', 'HTTP requests being handled',
+            ['blueprint', 'endpoint'], multiprocess_mode='livesum'
+        )
+        self.request_queries = Histogram(
+            'http_request_db_queries', 'SQL statements executed per HTTP request',
+            ['blueprint', 'endpoint'], buckets=QUERY_COUNT_BUCKETS
+        )
+        self.request_query_seconds = Histogram(
+            'http_request_db_seconds', 'Time spent in SQL statements per HTTP request',
+            ['blueprint', 'endpoint'], buckets=REQUEST_BUCKETS
+        )
+        self.query_latency = Histogram(
+            'db_query_duration_seconds', 'Duration of individual SQL statements (requests and background jobs)',
+            buckets=QUERY_BUCKETS
+        )
+        self.gemini_latency = Histogram(
+            'gemini_request_duration_seconds', 'Gemini call latency including rate limiter waits and retries',
+            ['call_type', 'model', 'status'], buckets=GEMINI_BUCKETS
+        )
+        self.gemini_limiter_wait = Histogram(
+            'gemini_limiter_wait_seconds', 'Time Gemini calls waited for a rate limiter slot and budget',
+            buckets=LIMITER_WAIT_BUCKETS
+        )
+        self.gemini_cache_lookups = Counter(
+            'gemini_cache_lookups', 'Gemini response cache lookups', ['backend', 'result']
+        )
+        self.gemini_retries = Counter(
+            'gemini_retries', 'Gemini call attempts retried after a transient error', ['call_type']
+        )
+        self.upload_bytes = Counter('upload_bytes', 'Bytes received in file uploads', ['category'])
+        self.uploads = Counter('uploads', 'File uploads received', ['category'])
+
+
+def init_metrics(app):
+    """
+    Install request hooks, SQLAlchemy listeners and the /metrics endpoint if METRICS_ENABLED is set.
+
+    Raises:
+        RuntimeError: If metrics are enabled but prometheus_client isn't installed
+    """
+    global _metrics
+
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    try:
+        import prometheus_client  # noqa: F401
+    except ImportError:
+        raise RuntimeError("METRICS_ENABLED requires prometheus_client (pip install prometheus-client)")
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = _Metrics()
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    with app.app_context():
+        engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    mode = 'multiprocess' if os.environ.get('PROMETHEUS_MULTIPROC_DIR') else 'single process'
+    logger.info(f"Prometheus metrics enabled at /metrics ({mode})")
+
+
+def _labels():
+    """(blueprint, endpoint) labels for the current request; unmatched URLs share one label."""
+    return request.blueprint or '', request.endpoint or 'unmatched'
+
+
+def _before_request():
+    if request.endpoint == 'metrics':
+        return
+    labels = _labels()
+    g._metrics_request = (time.perf_counter(), labels)
+    _metrics.requests_in_progress.labels(*labels).inc()
+    _request_queries.set([0, 0.0])
+
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(error):
+    state = g.pop('_metrics_request', None)
+    if state is None:
+        return
+    start, labels = state
+
+    # after_request doesn't run when a view raises
+    status = g.pop('_metrics_status', 500)
+    _metrics.request_latency.labels(*labels, request.method, str(status)).observe(time.perf_counter() - start)
+    _metrics.requests_in_progress.labels(*labels).dec()
+
+    queries = _request_queries.get()
+    _request_queries.set(None)
+    if queries is not None:
+        _metrics.request_queries.labels(*labels).observe(queries[0])
+        _metrics.request_query_seconds.labels(*labels).observe(queries[1])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    _metrics.query_latency.observe(elapsed)
+
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+        queries[1] += elapsed
+
+
+def record_gemini_call(call_type, model, status, seconds, retries=0):
+    """
+    Observe a finished Gemini or transcription call.
+
+    Args:
+        call_type: Usage ledger call type (e.g. 'transcription', 'answer_review')
+        model: Model name
+        status: 'ok', 'error' or 'cache_hit'
+        seconds: Latency of the whole call
+        retries: Attempts retried during the call
+    """
+    if _metrics is None:
+        return
+    _metrics.gemini_latency.labels(call_type, model, status).observe(seconds)
+    if retries:
+        _metrics.gemini_retries.labels(call_type).inc(retries)
+
+
+def record_limiter_wait(seconds):
+    """Observe how long a Gemini call attempt queued in the rate limiter."""
+    if _metrics is None:
+        return
+    _metrics.gemini_limiter_wait.observe(seconds)
+
+
+def record_cache_lookup(backend, hit):
+    """Count a Gemini response cache lookup as a 'hit' or a 'miss'."""
+    if _metrics is None:
+        return
+    _metrics.gemini_cache_lookups.labels(backend, 'hit' if hit else 'miss').inc()
+
+
+def record_upload(category, size):
+    """Count an upload saved to storage."""
+    if _metrics is None:
+        return
+    _metrics.uploads.labels(category).inc()
+    _metrics.upload_bytes.labels(category).inc(size)
+
+
+def metrics_view():
+    """Prometheus text exposition of this process's metrics, or of every worker's in multiprocess mode."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Build a fresh registry per scrape that reads every worker's sample files
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
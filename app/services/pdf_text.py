@@ -0,0 +1,91 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def extract_page_range(pdf_path, start, end):
+    """
+    Extract the text of pages [start, end) from a PDF.
+
+    Runs inside pool worker processes, so it opens its own reader instead of
+    receiving page objects that can't be pickled.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start: Index of the first page
+        end: Index one past the last page
+
+    Returns:
+        A list with the text of each page
+    """
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _get_pool(workers):
+    """Return the shared extraction pool, creating it on first use."""
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawn rather than fork: the web and job worker processes are multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def extract_pdf_pages(pdf_path, parallel_threshold=8, workers=4):
+    """
+    Extract the text of every page of a PDF.
+
+    PDFs with at least `parallel_threshold` pages are split into contiguous
+    page ranges extracted across a process pool; smaller ones are read
+    in-process, where the pool round trip would cost more than it saves.
+
+    Args:
+        pdf_path: Path to the PDF file
+        parallel_threshold: Minimum page count for parallel extraction
+        workers: Number of pool processes
+
+    Returns:
+        A list with the text of each page, in page order
+    """
+    with open(pdf_path, 'rb') as file:
+        page_count = len(PyPDF2.PdfReader(file).pages)
+
+    if workers > 1 and page_count >= parallel_threshold:
+        # One range per worker keeps the number of times each process parses the file low
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        try:
+            pool = _get_pool(workers)
+            futures = [pool.submit(extract_page_range, pdf_path, start, end) for start, end in ranges]
+            pages = [text for future in futures for text in future.result()]
+            logger.info(f"Extracted {page_count} pages from {pdf_path} across {len(ranges)} processes")
+            return pages
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF extraction pool failed ({e}), extracting in-process")
+            _reset_pool()
+
+    return extract_page_range(pdf_path, 0, page_count)
@@ -0,0 +1,95 @@
+import logging
+import random
+import threading
+import time
+from array import array
+from app import db
+from app.models import Question
+from app.services.catalog_service import catalog_version
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+class QuestionSampler:
+    """
+    Samples interview questions from in-memory per-(profession, grade) ID arrays.
+    
+    The arrays are loaded with one query and reloaded when the question bank
+    changes (tracked through the catalog version file) or CATALOG_CACHE_TTL
+    expires, so starting an interview no longer sorts the question table.
+    """
+    
+    def __init__(self):
+        self._pools = None
+        self._loaded_at = 0
+        self._version = None
+        self._lock = threading.Lock()
+    
+    def _get_pools(self):
+        version = catalog_version()
+        ttl = get_setting('CATALOG_CACHE_TTL', 300)
+        
+        with self._lock:
+            if self._pools is not None and self._version == version and time.monotonic() - self._loaded_at < ttl:
+                return self._pools
+        
+        pools = {}
+        for question_id, profession_id, grade in db.session.query(Question.id, Question.profession_id, Question.grade):
+            pools.setdefault((profession_id, grade), array('q')).append(question_id)
+        
+        with self._lock:
+            self._pools = pools
+            self._version = version
+            self._loaded_at = time.monotonic()
+        
+        logger.info(f"Loaded question pools for {len(pools)} profession/grade combinations")
+        return pools
+    
+    def invalidate(self):
+        """Drop the loaded pools so the next sample reloads them; called by invalidate_catalog."""
+        with self._lock:
+            self._pools = None
+    
+    def sample(self, profession_id, grade, k, recent_ids=frozenset(), recent_weight=0.1):
+        """
+        Pick k distinct question IDs in expected O(k) time.
+        
+        Args:
+            profession_id: Profession to sample from
+            grade: Grade to sample from
+            k: Number of questions wanted
+            recent_ids: Question IDs the user answered recently
+            recent_weight: Relative chance (0-1) of picking a recent question over a fresh one
+            
+        Returns:
+            A list of up to k question IDs
+        """
+        pool = self._get_pools().get((profession_id, grade), array('q'))
+        if len(pool) <= k:
+            ids = list(pool)
+            random.shuffle(ids)
+            return ids
+        
+        # Rejection sampling: recent questions are accepted only with probability recent_weight
+        chosen = []
+        seen = set()
+        max_attempts = k * 20
+        for _ in range(max_attempts):
+            if len(chosen) == k:
+                break
+            question_id = pool[random.randrange(len(pool))]
+            if question_id in seen:
+                continue
+            if question_id in recent_ids and random.random() >= recent_weight:
+                continue
+            seen.add(question_id)
+            chosen.append(question_id)
+        
+        # Almost everything was answered recently; top up uniformly from the rest of the pool
+        if len(chosen) < k:
+            remaining = [question_id for question_id in pool if question_id not in seen]
+            chosen.extend(random.sample(remaining, k - len(chosen)))
+        
+        return chosen
+
+question_sampler = QuestionSampler()
@@ -0,0 +1,414 @@
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+from google.api_core import exceptions as google_exceptions
+from app.services.metrics import record_limiter_wait
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Seconds between attempts of an async caller to take a concurrency slot
+ASYNC_SLOT_POLL_INTERVAL = 0.01
+
+# HTTP status codes that indicate quota exhaustion or a transient server problem
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Exceptions raised for the same conditions, including network errors that never got a status code
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def get_status_code(error):
+    """Return the HTTP status code carried by an API exception, or None."""
+    # google.api_core errors expose it as .code; HTTP client errors on their response
+    for status in (getattr(error, 'code', None),
+                   getattr(getattr(error, 'response', None), 'status_code', None),
+                   getattr(getattr(error, 'response', None), 'status', None)):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_retryable_error(error):
+    """Return True if an API exception is worth retrying, judged by its type or status code, not its message."""
+    return isinstance(error, RETRYABLE_ERRORS) or get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def get_retry_after(error):
+    """
+    Extract a server-provided retry delay from an API exception.
+
+    Args:
+        error: The exception raised by the Gemini client
+
+    Returns:
+        The delay in seconds, or None if the error carries no hint
+    """
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers and headers.get('Retry-After'):
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            pass
+
+    # google.rpc.RetryInfo is rendered as "retry_delay { seconds: 17 }" in the error text
+    match = re.search(r"retry[_ -]?(?:delay|after)\D{0,20}?(\d+(?:\.\d+)?)", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def estimate_tokens(contents, max_output_tokens=0):
+    """Roughly estimate the tokens a request will consume for budgeting purposes."""
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    tokens = max_output_tokens
+    for part in parts:
+        if isinstance(part, dict):
+            # Gemini bills audio at ~32 tokens/s; ~16 KB/s is typical for compressed speech
+            tokens += len(part.get('data', b'')) // 500
+        else:
+            tokens += len(str(part)) // 4
+    return tokens
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously. Reservations may overdraw it, making later callers wait."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._available = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """Take `amount` from the bucket and return how long the caller must wait before using it."""
+        # A single request larger than the whole budget would otherwise wait forever
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+            self._updated = now
+            self._available -= amount
+            if self._available >= 0:
+                return 0.0
+            return -self._available / self.rate
+
+
+class GeminiRateLimiter:
+    """
+    Process-wide limiter shared by every Gemini call.
+
+    Caps the number of calls in flight, spaces requests to stay within the
+    requests-per-minute and tokens-per-minute budgets, and retries retryable
+    failures with exponential backoff and full jitter. Sync and async callers
+    draw from the same concurrency slots, and each attempt is abandoned after
+    `timeout` seconds and retried.
+
+    The budgets are per process: with several gunicorn workers (or job
+    worker processes) the account-wide load can reach the number of
+    processes times GEMINI_MAX_CONCURRENCY, GEMINI_RPM and GEMINI_TPM, so
+    divide the account's quota between them.
+    """
+
+    def __init__(self, max_concurrency, requests_per_minute, tokens_per_minute,
+                 max_retries=3, backoff_base=1.0, backoff_max=30.0, timeout=None):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._executor = None  # Runs sync calls that have a timeout; created lazily, and again after a fork
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._calls = 0
+        self._retries = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def reserve(self, estimated_tokens=0):
+        """Charge one request and its tokens against the per-minute budgets. Returns the required wait in seconds."""
+        delay = 0.0
+        if self._requests:
+            delay = max(delay, self._requests.reserve(1))
+        if self._tokens and estimated_tokens:
+            delay = max(delay, self._tokens.reserve(estimated_tokens))
+        return delay
+    
+    @contextmanager
+    def slot(self, estimated_tokens=0):
+        """Block until a concurrency slot and enough rate budget are available."""
+        self._acquire(estimated_tokens)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _acquire(self, estimated_tokens=0):
+        """Take a concurrency slot and wait out the rate budget, counting the call as in flight."""
+        start = time.monotonic()
+        self._semaphore.acquire()
+        try:
+            delay = self.reserve(estimated_tokens)
+            if delay:
+                time.sleep(delay)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        self._record_wait(time.monotonic() - start)
+        with self._stats_lock:
+            self._in_flight += 1
+
+    def _release(self, *args):
+        """Give back a slot taken by _acquire. Extra arguments let it serve as a future's done callback."""
+        with self._stats_lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                # Calls only run here while they hold a slot, so max_concurrency threads are enough
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix='gemini-call'
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _call_once(self, func, args, kwargs, estimated_tokens, timeout):
+        """
+        Make one attempt at a call under a slot, giving up on it after timeout seconds.
+
+        The client has no per-request timeout, so the call runs on a helper
+        thread. An abandoned call keeps its slot until it actually returns,
+        which keeps the concurrency cap honest.
+        """
+        if not timeout:
+            with self.slot(estimated_tokens):
+                return func(*args, **kwargs)
+
+        self._acquire(estimated_tokens)
+        try:
+            # Carry the caller's trace and usage context over to the helper thread
+            future = self._get_executor().submit(contextvars.copy_context().run, func, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout)
+        except FuturesTimeoutError:
+            raise TimeoutError(f"Gemini call did not finish within {timeout:g}s") from None
+
+    def call(self, func, *args, estimated_tokens=0, max_retries=None, timeout=None, usage=None, **kwargs):
+        """
+        Run an API call under the limiter, retrying retryable errors and timeouts.
+
+        Args:
+            func: The client method to call
+            *args: Positional arguments for func
+            estimated_tokens: Token cost charged against the per-minute budget
+            max_retries: Override for the configured retry count
+            timeout: Seconds to wait for each attempt (defaults to the limiter's timeout)
+            usage: Optional UsageRecord whose retry count is incremented on each retry
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            The last exception once retries are exhausted or the error is not retryable
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        timeout = self.timeout if timeout is None else timeout
+
+        for attempt in range(retries + 1):
+            try:
+                return self._call_once(func, args, kwargs, estimated_tokens, timeout)
+            except Exception as e:
+                if attempt >= retries or not is_retryable_error(e):
+                    raise
+
+                # Back off outside the slot so other callers can use it
+                delay = self.backoff_delay(attempt, get_retry_after(e))
+                with self._stats_lock:
+                    self._retries += 1
+                if usage is not None:
+                    usage.retries += 1
+                logger.warning(f"Gemini call failed ({type(e).__name__}), retrying in {delay:.1f}s... ({attempt + 1}/{retries})")
+                time.sleep(delay)
+
+    async def async_call(self, func, *args, estimated_tokens=0, max_retries=None, timeout=None, usage=None, **kwargs):
+        """
+        Await an async API call under the limiter, retrying retryable errors and timeouts.
+        
+        Concurrency slots and the per-minute budgets are shared with sync
+        callers. Must run on the shared event loop (see app.services.event_loop).
+        
+        Args:
+            func: The async client method to call
+            *args: Positional arguments for func
+            estimated_tokens: Token cost charged against the per-minute budget
+            max_retries: Override for the configured retry count
+            timeout: Seconds to wait for each attempt (defaults to the limiter's timeout)
+            usage: Optional UsageRecord whose retry count is incremented on each retry
+            **kwargs: Keyword arguments for func
+            
+        Returns:
+            Whatever func's coroutine returns
+            
+        Raises:
+            The last exception once retries are exhausted or the error is not retryable
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        timeout = self.timeout if timeout is None else timeout
+        
+        for attempt in range(retries + 1):
+            try:
+                start = time.monotonic()
+                # Take a slot from the pool sync callers use, without blocking the event loop
+                while not self._semaphore.acquire(blocking=False):
+                    await asyncio.sleep(ASYNC_SLOT_POLL_INTERVAL)
+                try:
+                    delay = self.reserve(estimated_tokens)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    
+                    self._record_wait(time.monotonic() - start)
+                    with self._stats_lock:
+                        self._in_flight += 1
+                    try:
+                        return await asyncio.wait_for(func(*args, **kwargs), timeout or None)
+                    finally:
+                        with self._stats_lock:
+                            self._in_flight -= 1
+                finally:
+                    self._semaphore.release()
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if attempt >= retries or not (timed_out or is_retryable_error(e)):
+                    raise
+                
+                # Back off outside the slot so other callers can use it
+                delay = self.backoff_delay(attempt, None if timed_out else get_retry_after(e))
+                with self._stats_lock:
+                    self._retries += 1
+                if usage is not None:
+                    usage.retries += 1
+                logger.warning(f"Gemini call failed ({type(e).__name__}), retrying in {delay:.1f}s... ({attempt + 1}/{retries})")
+                await asyncio.sleep(delay)
+    
+    def backoff_delay(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than a server retry-after hint."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            # Spread retries slightly so callers told to wait the same time don't return in lockstep
+            delay = retry_after + random.uniform(0, self.backoff_base)
+        return delay
+
+    def _record_wait(self, wait):
+        with self._stats_lock:
+            self._calls += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        record_limiter_wait(wait)
+        if wait > 1.0:
+            logger.info(f"Gemini call waited {wait:.2f}s for a rate limiter slot")
+
+    def stats(self):
+        """Return queue wait time and retry metrics for this process."""
+        with self._stats_lock:
+            return {
+                'calls': self._calls,
+                'in_flight': self._in_flight,
+                'max_concurrency': self.max_concurrency,
+                'retries': self._retries,
+                'queue_wait_total_seconds': round(self._wait_total, 3),
+                'queue_wait_avg_seconds': round(self._wait_total / self._calls, 3) if self._calls else 0.0,
+                'queue_wait_max_seconds': round(self._wait_max, 3)
+            }
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide Gemini rate limiter, creating it from config on first use."""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = GeminiRateLimiter(
+                max_concurrency=get_setting('GEMINI_MAX_CONCURRENCY', 4),
+                requests_per_minute=get_setting('GEMINI_RPM', 60),
+                tokens_per_minute=get_setting('GEMINI_TPM', 1000000),
+                max_retries=get_setting('GEMINI_MAX_RETRIES', 3),
+                backoff_base=get_setting('GEMINI_BACKOFF_BASE', 1.0),
+                backoff_max=get_setting('GEMINI_BACKOFF_MAX', 30.0),
+                timeout=get_setting('GEMINI_TIMEOUT', 60.0)
+            )
+
+    return _rate_limiter
+
+def configure_rate_limiter(**overrides):
+    """
+    Replace the process-wide limiter with one built from config plus overrides.
+    
+    Meant for batch CLI runs that need their own budget, before any calls are made.
+    
+    Args:
+        **overrides: GeminiRateLimiter keyword arguments, e.g. requests_per_minute=30
+        
+    Returns:
+        The new limiter
+    """
+    global _rate_limiter
+    
+    settings = {
+        'max_concurrency': get_setting('GEMINI_MAX_CONCURRENCY', 4),
+        'requests_per_minute': get_setting('GEMINI_RPM', 60),
+        'tokens_per_minute': get_setting('GEMINI_TPM', 1000000),
+        'max_retries': get_setting('GEMINI_MAX_RETRIES', 3),
+        'backoff_base': get_setting('GEMINI_BACKOFF_BASE', 1.0),
+        'backoff_max': get_setting('GEMINI_BACKOFF_MAX', 30.0),
+        'timeout': get_setting('GEMINI_TIMEOUT', 60.0)
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    
+    with _rate_limiter_lock:
+        _rate_limiter = GeminiRateLimiter(**settings)
+    
+    return _rate_limiter
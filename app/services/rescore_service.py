@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from sqlalchemy import func, update
+from app import db
+from app.models import Answer, Interview, Profession, Question
+from app.services.event_loop import run_async
+from app.services.gemini_service import AsyncGeminiService
+from app.services.settings import get_setting
+from app.services.interview_service import extract_rating
+from app.services.stats_service import refresh_rating_stats
+
+logger = logging.getLogger(__name__)
+
+
+class RescoreCheckpoint:
+    """Progress of a re-scoring run, persisted as JSON after every batch."""
+
+    def __init__(self, path, last_answer_id=0, processed=0, updated=0, failed_ids=None, model=None, started_at=None):
+        self.path = path
+        self.last_answer_id = last_answer_id
+        self.processed = processed
+        self.updated = updated
+        self.failed_ids = failed_ids or []
+        self.model = model
+        self.started_at = started_at or datetime.utcnow().isoformat()
+
+    @classmethod
+    def load(cls, path):
+        """Load a checkpoint, or return None if the file doesn't exist."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return cls(path, **data)
+
+    def save(self):
+        """Write the checkpoint atomically so an interrupted run never leaves a partial file."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'last_answer_id': self.last_answer_id,
+                'processed': self.processed,
+                'updated': self.updated,
+                'failed_ids': self.failed_ids,
+                'model': self.model,
+                'started_at': self.started_at
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+class AnswerRescorer:
+    """
+    Re-runs reviews for answered questions, e.g. after a prompt or model change.
+
+    Answers are read in keyset-paginated batches of primary keys, reviewed
+    concurrently through AsyncGeminiService, and written back with one bulk
+    UPDATE for answers and one for the affected interviews per batch. The
+    checkpoint is saved after each batch is committed.
+    """
+
+    def __init__(self, checkpoint, batch_size=50, concurrency=4, use_cache=False, limit=None):
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+        self.limit = limit
+        self.gemini_service = AsyncGeminiService(checkpoint.model)
+
+    def _base_query(self):
+        """Answers that have been reviewed, with everything the review prompt needs."""
+        return db.session.query(
+            Answer.id,
+            Answer.interview_id,
+            Answer.transcribed_text,
+            Question.question_text,
+            Profession.name.label('profession_name'),
+            Interview.grade
+        ).join(Question, Answer.question_id == Question.id).join(
+            Interview, Answer.interview_id == Interview.id
+        ).join(
+            Profession, Interview.profession_id == Profession.id
+        ).filter(
+            Answer.feedback.isnot(None),
+            Answer.transcribed_text.isnot(None)
+        )
+
+    def remaining(self):
+        """Number of answers after the checkpoint, capped by the run limit."""
+        count = db.session.query(func.count(Answer.id)).filter(
+            Answer.id > self.checkpoint.last_answer_id,
+            Answer.feedback.isnot(None),
+            Answer.transcribed_text.isnot(None)
+        ).scalar()
+        return min(count, self.limit) if self.limit is not None else count
+
+    def run(self, progress=None):
+        """
+        Re-score answers until none remain after the checkpoint or the limit is reached.
+
+        Args:
+            progress: Optional callback receiving a stats dict after each batch
+
+        Returns:
+            The final stats dict
+        """
+        total = self.remaining()
+        done = 0
+        start_time = time.monotonic()
+        self._initial_updated = self.checkpoint.updated
+        self._initial_failed = len(self.checkpoint.failed_ids)
+        stats = self._stats(done, total, start_time)
+
+        while self.limit is None or done < self.limit:
+            batch_size = self.batch_size if self.limit is None else min(self.batch_size, self.limit - done)
+            rows = self._base_query().filter(
+                Answer.id > self.checkpoint.last_answer_id
+            ).order_by(Answer.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            self._rescore_batch(rows)
+            done += len(rows)
+
+            stats = self._stats(done, total, start_time)
+            if progress:
+                progress(stats)
+
+        return stats
+
+    def _rescore_batch(self, rows):
+        """Review one batch concurrently and write the results back in bulk."""
+        structured = get_setting('REVIEW_OUTPUT_MODE', 'markdown') == 'structured'
+        reviews = run_async(self.gemini_service.review_answers(
+            [(row.question_text, row.transcribed_text) for row in rows],
+            [row.profession_name for row in rows],
+            [row.grade for row in rows],
+            use_cache=self.use_cache,
+            limit=self.concurrency,
+            structured=structured
+        ))
+
+        answer_updates = []
+        for row, review in zip(rows, reviews):
+            if isinstance(review, str) and review.startswith("Error"):
+                logger.warning(f"Re-scoring answer {row.id} failed: {review}")
+                self.checkpoint.failed_ids.append(row.id)
+                continue
+            if structured:
+                answer_updates.append({
+                    'id': row.id,
+                    'feedback': self.gemini_service.format_structured_review(review),
+                    'rating': review['score'],
+                    'review_overall': review['overall'],
+                    'review_strengths': review['strengths'],
+                    'review_improvements': review['improvements']
+                })
+            else:
+                answer_update = {
+                    'id': row.id,
+                    'feedback': review,
+                    'review_overall': None,
+                    'review_strengths': None,
+                    'review_improvements': None
+                }
+                # Keep the previous rating if the new review has no readable score, as live reviews do
+                rating = extract_rating(review, row.id)
+                if rating is not None:
+                    answer_update['rating'] = rating
+                answer_updates.append(answer_update)
+
+        if answer_updates:
+            db.session.execute(update(Answer), answer_updates)
+            self._update_overall_ratings({row.interview_id for row in rows})
+        db.session.commit()
+
+        # Only advance the checkpoint once the batch is committed
+        self.checkpoint.last_answer_id = rows[-1].id
+        self.checkpoint.processed += len(rows)
+        self.checkpoint.updated += len(answer_updates)
+        self.checkpoint.save()
+
+    def _update_overall_ratings(self, interview_ids):
+        """Recompute overall ratings for completed interviews touched by a batch, in one bulk UPDATE, and their summary rows."""
+        averages = db.session.query(Answer.interview_id, func.avg(Answer.rating)).join(
+            Interview, Answer.interview_id == Interview.id
+        ).filter(
+            Answer.interview_id.in_(interview_ids),
+            Answer.rating.isnot(None),
+            Interview.completed_at.isnot(None)
+        ).group_by(Answer.interview_id).all()
+
+        if averages:
+            db.session.execute(update(Interview), [
+                {'id': interview_id, 'overall_rating': round(average, 1)}
+                for interview_id, average in averages
+            ])
+            refresh_rating_stats([interview_id for interview_id, _ in averages])
+
+    def _stats(self, done, total, start_time):
+        elapsed = time.monotonic() - start_time
+        per_minute = done / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = max(total - done, 0)
+        return {
+            'done': done,
+            'total': total,
+            'last_answer_id': self.checkpoint.last_answer_id,
+            'updated': self.checkpoint.updated - self._initial_updated,
+            'failed': len(self.checkpoint.failed_ids) - self._initial_failed,
+            'answers_per_minute': round(per_minute, 1),
+            'eta_seconds': round(remaining / per_minute * 60) if per_minute else None
+        }
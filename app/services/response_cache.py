@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from app.services.metrics import record_cache_lookup
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model_name, contents, generation_config=None):
+    """
+    Build a content-addressed cache key for a Gemini request.
+    
+    Args:
+        model_name: Name of the model the request is sent to
+        contents: The prompt string, or a list of prompt parts (strings or inline-data dicts)
+        generation_config: Generation parameters that affect the output
+        
+    Returns:
+        A hex SHA-256 digest identifying the request
+    """
+    hasher = hashlib.sha256()
+    hasher.update(model_name.encode('utf-8'))
+    hasher.update(json.dumps(generation_config or {}, sort_keys=True, default=str).encode('utf-8'))
+    
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    for part in parts:
+        # Separate parts so ["ab", "c"] and ["a", "bc"] hash differently
+        hasher.update(b'\x00')
+        if isinstance(part, dict):
+            hasher.update(str(part.get('mime_type', '')).encode('utf-8'))
+            data = part.get('data', b'')
+            hasher.update(data if isinstance(data, bytes) else str(data).encode('utf-8'))
+        else:
+            hasher.update(str(part).encode('utf-8'))
+    
+    return hasher.hexdigest()
+
+
+class ResponseCache:
+    """Base class tracking hit/miss counters; subclasses implement storage."""
+    
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        # The counters above only cover this process; the metric is aggregated across workers
+        record_cache_lookup(self.backend_name, value is not None)
+        return value
+    
+    def set(self, key, value):
+        # Never cache failures so a retry can succeed
+        if not value or value.startswith("Error"):
+            return
+        self._set(key, value)
+    
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': self.backend_name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'entries': self.size(),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl
+            }
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache with per-entry expiry."""
+    
+    backend_name = 'memory'
+    
+    def __init__(self, ttl, max_entries):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+    
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def _set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def size(self):
+        return len(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """On-disk cache shared by all worker processes on a host, evicting least recently used entries."""
+    
+    backend_name = 'sqlite'
+    
+    def __init__(self, ttl, max_entries, path):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_last_access ON response_cache (last_access)")
+    
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps this safe across threads and forked workers
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+            return value
+    
+    def _set(self, key, value):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now)
+            )
+            conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+            conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+    
+    def size(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+    
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM response_cache")
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Return the process-wide response cache, or None if caching is disabled."""
+    global _response_cache
+    
+    backend = get_setting('GEMINI_CACHE_BACKEND', 'memory')
+    if backend == 'none':
+        return None
+    
+    with _response_cache_lock:
+        if _response_cache is None:
+            ttl = get_setting('GEMINI_CACHE_TTL', 86400)
+            max_entries = get_setting('GEMINI_CACHE_MAX_ENTRIES', 1000)
+            if backend == 'sqlite':
+                _response_cache = SQLiteResponseCache(ttl, max_entries, get_setting('GEMINI_CACHE_PATH'))
+            elif backend == 'memory':
+                _response_cache = MemoryResponseCache(ttl, max_entries)
+            else:
+                raise ValueError(f"Unknown Gemini cache backend: {backend}")
+            logger.info(f"Gemini response cache initialized ({backend}, ttl={ttl}s, max_entries={max_entries})")
+    
+    return _response_cache
@@ -0,0 +1,8 @@
+from flask import current_app, has_app_context
+from config import Config
+
+def get_setting(name, default=None):
+    """Read a config value from the active app, falling back to the Config class outside an app context."""
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return getattr(Config, name, default)
@@ -0,0 +1,269 @@
+"""
+Per-user summary counters behind the profile and history pages.
+
+`user_stats` holds one row per user and `user_rating_stats` one row per
+(user, profession, grade). Both are kept current by atomic
+`col = col + n` UPDATEs issued in the same transaction as the change they
+describe, so reading them is a primary key lookup. A user without a row
+(e.g. created before the table existed) is rebuilt from the source tables
+on first use, and `flask stats rebuild` recomputes everything if the
+counters ever drift.
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import case, delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import CV, Interview, User, UserRatingStats, UserStats
+
+logger = logging.getLogger(__name__)
+
+
+def _source_counts(user_ids=None):
+    """
+    Compute the summary rows for some or all users from the source tables.
+
+    Args:
+        user_ids: Optional list of user IDs; all users when None
+
+    Returns:
+        (user_rows, rating_rows) lists of dicts ready for bulk insert
+    """
+    def scoped(query, column):
+        return query.filter(column.in_(user_ids)) if user_ids is not None else query
+
+    # One grouped query per table rather than one per user
+    interview_counts = dict(
+        (user_id, (total, completed)) for user_id, total, completed in scoped(
+            db.session.query(Interview.user_id, func.count(Interview.id), func.count(Interview.completed_at)),
+            Interview.user_id
+        ).group_by(Interview.user_id)
+    )
+    cv_counts = dict(scoped(
+        db.session.query(CV.user_id, func.count(CV.id)), CV.user_id
+    ).group_by(CV.user_id).all())
+
+    now = datetime.utcnow()
+    user_rows = []
+    for (user_id,) in scoped(db.session.query(User.id), User.id):
+        total, completed = interview_counts.get(user_id, (0, 0))
+        user_rows.append({
+            'user_id': user_id,
+            'interview_count': total,
+            'completed_interview_count': completed,
+            'cv_count': cv_counts.get(user_id, 0),
+            'updated_at': now
+        })
+
+    rating_rows = [
+        {
+            'user_id': user_id,
+            'profession_id': profession_id,
+            'grade': grade,
+            'completed_count': count,
+            'rating_sum': rating_sum,
+            'best_rating': best_rating
+        }
+        for user_id, profession_id, grade, count, rating_sum, best_rating in scoped(
+            db.session.query(
+                Interview.user_id,
+                Interview.profession_id,
+                Interview.grade,
+                func.count(Interview.id),
+                func.sum(Interview.overall_rating),
+                func.max(Interview.overall_rating)
+            ).filter(
+                Interview.completed_at.isnot(None),
+                Interview.overall_rating.isnot(None)
+            ),
+            Interview.user_id
+        ).group_by(Interview.user_id, Interview.profession_id, Interview.grade)
+    ]
+
+    return user_rows, rating_rows
+
+
+def rebuild_user_stats(user_ids=None):
+    """
+    Replace the summary rows for some or all users with fresh counts.
+
+    Runs in the caller's transaction; the caller commits.
+
+    Args:
+        user_ids: Optional list of user IDs; all users when None
+
+    Returns:
+        The number of users rebuilt
+    """
+    # Make pending changes visible to the count queries
+    db.session.flush()
+
+    user_rows, rating_rows = _source_counts(user_ids)
+
+    for model in (UserStats, UserRatingStats):
+        statement = delete(model)
+        if user_ids is not None:
+            statement = statement.where(model.user_id.in_(user_ids))
+        db.session.execute(statement)
+
+    if user_rows:
+        db.session.execute(insert(UserStats), user_rows)
+    if rating_rows:
+        db.session.execute(insert(UserRatingStats), rating_rows)
+
+    return len(user_rows)
+
+
+def _adjust(user_id, **deltas):
+    """
+    Apply deltas to a user's counters, building the row from the source tables if it is missing.
+
+    Returns:
+        True if the deltas were applied, False if the row was rebuilt instead
+        (the rebuild already includes the change being recorded)
+    """
+    # Make the change being recorded visible in case the row has to be rebuilt
+    db.session.flush()
+
+    values = {getattr(UserStats, name): getattr(UserStats, name) + delta for name, delta in deltas.items()}
+    values[UserStats.updated_at] = datetime.utcnow()
+    statement = update(UserStats).where(UserStats.user_id == user_id).values(values)
+
+    if db.session.execute(statement).rowcount:
+        return True
+
+    try:
+        with db.session.begin_nested():
+            rebuild_user_stats([user_id])
+        logger.info(f"Built missing stats row for user {user_id}")
+        return False
+    except IntegrityError:
+        # A concurrent request created the row first
+        db.session.execute(statement)
+        return True
+
+
+def record_interview_started(user_id):
+    """Count a newly created interview."""
+    _adjust(user_id, interview_count=1)
+
+
+def record_interview_completed(user_id, profession_id, grade, rating):
+    """Count a completed interview and fold its overall rating into the profession/grade row."""
+    if not _adjust(user_id, completed_interview_count=1) or rating is None:
+        return
+
+    key = (
+        UserRatingStats.user_id == user_id,
+        UserRatingStats.profession_id == profession_id,
+        UserRatingStats.grade == grade
+    )
+    statement = update(UserRatingStats).where(*key).values({
+        UserRatingStats.completed_count: UserRatingStats.completed_count + 1,
+        UserRatingStats.rating_sum: UserRatingStats.rating_sum + rating,
+        UserRatingStats.best_rating: case(
+            (UserRatingStats.best_rating.is_(None), rating),
+            (UserRatingStats.best_rating < rating, rating),
+            else_=UserRatingStats.best_rating
+        )
+    })
+
+    if db.session.execute(statement).rowcount:
+        return
+
+    # First rated interview for this profession and grade
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(UserRatingStats).values(
+                user_id=user_id,
+                profession_id=profession_id,
+                grade=grade,
+                completed_count=1,
+                rating_sum=rating,
+                best_rating=rating
+            ))
+    except IntegrityError:
+        db.session.execute(statement)
+
+
+def record_cv_added(user_id):
+    """Count a newly uploaded CV."""
+    _adjust(user_id, cv_count=1)
+
+
+def record_cv_deleted(user_id):
+    """Uncount a deleted CV."""
+    _adjust(user_id, cv_count=-1)
+
+
+def refresh_rating_stats(interview_ids):
+    """
+    Recompute the profession/grade rating rows touched by re-rated interviews.
+
+    Sums could be adjusted by the rating difference, but a lower rating can
+    change the best rating, so the affected groups are re-aggregated.
+
+    Args:
+        interview_ids: IDs of interviews whose overall rating changed
+    """
+    if not interview_ids:
+        return
+
+    db.session.flush()
+
+    groups = db.session.query(
+        Interview.user_id, Interview.profession_id, Interview.grade
+    ).filter(
+        Interview.id.in_(interview_ids),
+        Interview.completed_at.isnot(None)
+    ).distinct().all()
+
+    for user_id, profession_id, grade in groups:
+        count, rating_sum, best_rating = db.session.query(
+            func.count(Interview.id),
+            func.sum(Interview.overall_rating),
+            func.max(Interview.overall_rating)
+        ).filter(
+            Interview.user_id == user_id,
+            Interview.profession_id == profession_id,
+            Interview.grade == grade,
+            Interview.completed_at.isnot(None),
+            Interview.overall_rating.isnot(None)
+        ).one()
+
+        db.session.execute(update(UserRatingStats).where(
+            UserRatingStats.user_id == user_id,
+            UserRatingStats.profession_id == profession_id,
+            UserRatingStats.grade == grade
+        ).values(completed_count=count, rating_sum=rating_sum or 0.0, best_rating=best_rating))
+
+    # The rating rows hang off each user's stats row, so mark those as changed too
+    user_ids = {user_id for user_id, _, _ in groups}
+    if user_ids:
+        db.session.execute(update(UserStats).where(
+            UserStats.user_id.in_(user_ids)
+        ).values(updated_at=datetime.utcnow()))
+
+
+def get_user_stats(user_id):
+    """
+    Return a user's UserStats row, building and committing it if it doesn't exist yet.
+    """
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        try:
+            rebuild_user_stats([user_id])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        stats = db.session.get(UserStats, user_id)
+    return stats
+
+
+def get_rating_stats(user_id):
+    """Return a user's per profession/grade rating rows, best average first."""
+    rows = UserRatingStats.query.options(
+        joinedload(UserRatingStats.profession)
+    ).filter_by(user_id=user_id).all()
+    return sorted(rows, key=lambda row: row.average_rating or 0, reverse=True)
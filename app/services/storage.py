@@ -0,0 +1,329 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from flask import Response, request
+from werkzeug.utils import secure_filename
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+class Storage(ABC):
+    """
+    Base class for upload storage backends.
+
+    Files are addressed by keys like "cvs/3f/a2/<uuid>_cv.pdf": a category
+    prefix, two levels of shard directories taken from a random UUID, and the
+    generated filename. Rows saved before storage keys existed hold absolute
+    paths under STORAGE_LOCAL_ROOT, which both backends map to the same keys.
+    Backends must implement every abstract method, or they can't be created.
+    """
+
+    backend_name = None
+
+    def __init__(self, local_root, chunk_size):
+        self.local_root = os.path.abspath(local_root)
+        self.chunk_size = chunk_size
+
+    def generate_key(self, category, filename):
+        """Build a new sharded key for an upload in the given category."""
+        token = uuid.uuid4().hex
+        shards = [token[i:i + 2] for i in range(0, 2 * get_setting('STORAGE_SHARD_DEPTH', 2), 2)]
+        stem, ext = os.path.splitext(secure_filename(filename) or 'upload')
+        # Cap the user-supplied part so keys fit the database columns
+        name = f"{token}_{stem[:80]}{ext[:10]}"
+        return "/".join([category, *shards, name])
+
+    def normalize_key(self, key):
+        """
+        Turn a key or legacy absolute path into a relative key.
+
+        Raises:
+            ValueError: If the key escapes the storage root
+        """
+        if os.path.isabs(key):
+            path = os.path.abspath(key)
+            if os.path.commonpath([path, self.local_root]) != self.local_root:
+                raise ValueError(f"Path outside storage root: {key}")
+            key = os.path.relpath(path, self.local_root)
+        key = key.replace(os.sep, '/')
+        if key.startswith('/') or '..' in key.split('/'):
+            raise ValueError(f"Invalid storage key: {key}")
+        return key
+
+    def read(self, key):
+        """Read a whole file into memory."""
+        return b"".join(self.iter_chunks(key))
+
+    @abstractmethod
+    def save(self, key, stream):
+        """Write a readable binary stream to key, chunk by chunk."""
+
+    @abstractmethod
+    def iter_chunks(self, key, start=0, end=None):
+        """
+        Stream bytes [start, end) of a file in chunk_size pieces.
+
+        Raises:
+            FileNotFoundError: If the key doesn't exist
+        """
+
+    @abstractmethod
+    def size(self, key):
+        """Return the size in bytes. Raises FileNotFoundError if the key doesn't exist."""
+
+    def exists(self, key):
+        try:
+            self.size(key)
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    @abstractmethod
+    def delete(self, key):
+        """Delete a file; missing files are ignored."""
+
+    @abstractmethod
+    @contextmanager
+    def local_path(self, key):
+        """Yield a local filesystem path with the file's contents, for libraries that need one."""
+
+
+class LocalStorage(Storage):
+    """Stores files under STORAGE_LOCAL_ROOT on the local disk."""
+
+    backend_name = 'local'
+
+    def _path(self, key):
+        return os.path.join(self.local_root, *self.normalize_key(key).split('/'))
+
+    def save(self, key, stream):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file beside the target so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                shutil.copyfileobj(stream, out, self.chunk_size)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def iter_chunks(self, key, start=0, end=None):
+        path = self._path(key)
+        remaining = (end if end is not None else os.path.getsize(path)) - start
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def size(self, key):
+        return os.path.getsize(self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @contextmanager
+    def local_path(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        yield path
+
+
+class S3Storage(Storage):
+    """
+    Stores files in an S3-compatible bucket (AWS S3, MinIO, Ceph, ...).
+
+    Set STORAGE_S3_ENDPOINT_URL to point at a local stand-in such as MinIO.
+    Credentials come from the usual boto3 sources (AWS_ACCESS_KEY_ID and
+    AWS_SECRET_ACCESS_KEY, a profile, or an instance role).
+    """
+
+    backend_name = 's3'
+
+    def __init__(self, local_root, chunk_size, bucket, prefix='', endpoint_url=None, region=None, client=None):
+        super().__init__(local_root, chunk_size)
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+
+        try:
+            from botocore.exceptions import ClientError
+            self._client_errors = (ClientError,)
+        except ImportError:
+            # Only possible with an injected client, which won't raise botocore errors
+            self._client_errors = ()
+
+    def _object_key(self, key):
+        key = self.normalize_key(key)
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _is_missing(self, error):
+        code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    def save(self, key, stream):
+        # upload_fileobj reads the stream in parts and switches to a multipart upload for large files
+        self.client.upload_fileobj(stream, self.bucket, self._object_key(key))
+
+    def iter_chunks(self, key, start=0, end=None):
+        kwargs = {'Bucket': self.bucket, 'Key': self._object_key(key)}
+        if start or end is not None:
+            kwargs['Range'] = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            body = self.client.get_object(**kwargs)['Body']
+        except Exception as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        try:
+            for chunk in body.iter_chunks(self.chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))['ContentLength']
+        except Exception as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def delete(self, key):
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ValueError:
+            pass
+        except self._client_errors as e:
+            # Callers delete while cleaning up; a denied or failed delete only leaves an orphaned object
+            if not self._is_missing(e):
+                logger.warning(f"Could not delete {key} from bucket {self.bucket}: {e}")
+
+    @contextmanager
+    def local_path(self, key):
+        # Download to a temporary file that is removed when the caller is done
+        suffix = os.path.splitext(key)[1]
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in self.iter_chunks(key):
+                    out.write(chunk)
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Return the process-wide storage backend selected by STORAGE_BACKEND."""
+    global _storage
+
+    with _storage_lock:
+        if _storage is None:
+            backend = get_setting('STORAGE_BACKEND', 'local')
+            local_root = get_setting('STORAGE_LOCAL_ROOT') or get_setting('UPLOAD_FOLDER')
+            chunk_size = get_setting('STORAGE_CHUNK_SIZE', 1024 * 1024)
+            if backend == 'local':
+                _storage = LocalStorage(local_root, chunk_size)
+            elif backend == 's3':
+                _storage = S3Storage(
+                    local_root,
+                    chunk_size,
+                    bucket=get_setting('STORAGE_S3_BUCKET'),
+                    prefix=get_setting('STORAGE_S3_PREFIX', ''),
+                    endpoint_url=get_setting('STORAGE_S3_ENDPOINT_URL'),
+                    region=get_setting('STORAGE_S3_REGION')
+                )
+            else:
+                raise ValueError(f"Unknown storage backend: {backend}")
+            logger.info(f"Upload storage initialized ({backend})")
+
+    return _storage
+
+
+def send_stored_file(key, download_name=None, as_attachment=False, mimetype=None, max_age=None):
+    """
+    Stream a stored file to the client, honouring single-range Range requests.
+
+    Requests for several ranges get the whole file with a 200, which HTTP
+    allows, rather than a multipart response.
+
+    Works the same for every backend: the file is never loaded into memory,
+    and for S3 only the requested byte range is fetched from the bucket.
+
+    Args:
+        key: Storage key of the file
+        download_name: Filename for Content-Disposition (defaults to the key's basename)
+        as_attachment: Send as a download rather than inline
+        mimetype: Content type (guessed from download_name if omitted)
+        max_age: Optional Cache-Control max-age in seconds
+
+    Returns:
+        A 200, 206, 304 or 416 Response
+
+    Raises:
+        FileNotFoundError: If the key doesn't exist
+    """
+    storage = get_storage()
+    size = storage.size(key)
+    download_name = download_name or key.rsplit('/', 1)[-1]
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    # Keys are never reused for different content, so the key and size identify the bytes
+    etag = hashlib.sha1(f"{key}:{size}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    start, end = 0, size
+    status = 200
+    if request.range is not None and request.range.units == 'bytes' and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(size)
+        # The only range lies outside the file
+        if byte_range is None:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f"bytes */{size}"
+            return response
+        start, end = byte_range
+        status = 206
+
+    chunks = storage.iter_chunks(key, start, end) if status == 206 else storage.iter_chunks(key)
+    response = Response(chunks, status=status, mimetype=mimetype, direct_passthrough=True)
+    response.content_length = end - start
+    response.headers['Accept-Ranges'] = 'bytes'
+    if status == 206:
+        response.headers['Content-Range'] = f"bytes {start}-{end - 1}/{size}"
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', filename=download_name)
+    response.set_etag(etag)
+    if max_age is not None:
+        response.cache_control.max_age = max_age
+        response.cache_control.public = True
+    return response
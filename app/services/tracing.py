@@ -0,0 +1,503 @@
+"""
+Lightweight request tracing with OpenTelemetry-compatible export.
+
+A trace is a tree of spans: the request (or background job) at the root,
+with children for service methods, Gemini calls, file I/O, SQL statements
+and session commits. Spans are kept in memory while the trace runs and are
+handed to a background exporter thread when its root span ends.
+
+A request is traced when TRACE_SAMPLE_RATE picks it, when it sends the
+TRACE_HEADER header (e.g. "X-Trace: 1"), or when it carries a W3C
+traceparent with the sampled flag. Sampled traces are written as OTLP/JSON
+(one ExportTraceServiceRequest per line) to TRACE_EXPORT_FILE and/or POSTed
+to an OTLP/HTTP collector at TRACE_EXPORT_URL. When TRACE_SLOW_SECONDS is
+set every request is recorded, sampled or not, and any trace slower than
+the threshold is dumped to TRACE_SLOW_DIR and the log.
+
+Answer and CV jobs continue the trace of the request that enqueued them, so
+a submit_answer trace shows the upload and the job's transcription and
+review under one trace id.
+"""
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, request
+from sqlalchemy import event
+from app import db
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = os.environ.get('OTEL_SERVICE_NAME') or 'ai-interview'
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# SQL statements are cut to this many characters in span attributes
+MAX_STATEMENT_LENGTH = 500
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# The span new spans are created under; None when the current work isn't traced
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Trace:
+    """The spans recorded so far for one request or job."""
+
+    def __init__(self, trace_id, sampled, max_spans):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        # Spans can be recorded from the request thread and the Gemini event loop thread at once
+        with self._lock:
+            if self.finished or len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return False
+            self.spans.append(span)
+            return True
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, trace, name, parent_id=None, kind=KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64) or 1:016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = None
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        trace.add(self)
+        self._token = None  # Context token of a root span, reset by finish_trace
+
+    @property
+    def traceparent(self):
+        """W3C traceparent header value identifying this span."""
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.status = STATUS_ERROR
+        self.status_message = message[:200]
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def duration(self):
+        """Seconds from start to end (or to now while still running)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self):
+        data = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        if self.status is not None:
+            data['status'] = {'code': self.status}
+            if self.status_message:
+                data['status']['message'] = self.status_message
+        return data
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def otlp_payload(spans):
+    """Wrap spans in an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', SERVICE_NAME)]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+def format_trace(trace):
+    """Render a trace as an indented tree of durations, for the log."""
+    children = {}
+    for span in trace.spans:
+        children.setdefault(span.parent_id, []).append(span)
+
+    span_ids = {span.span_id for span in trace.spans}
+    lines = []
+
+    def walk(span, depth):
+        detail = " ".join(span.attributes.get('db.statement', '').split())
+        status = ' ERROR' if span.status == STATUS_ERROR else ''
+        lines.append(f"{'  ' * depth}{span.duration * 1000:9.1f}ms  {span.name}{status}  {detail[:120]}".rstrip())
+        for child in sorted(children.get(span.span_id, []), key=lambda s: s.start_ns):
+            walk(child, depth + 1)
+
+    # Roots are spans whose parent was recorded elsewhere (the enqueuing request, a remote caller) or not at all
+    for span in sorted(trace.spans, key=lambda s: s.start_ns):
+        if span.parent_id not in span_ids:
+            walk(span, 0)
+    if trace.dropped:
+        lines.append(f"({trace.dropped} spans dropped)")
+    return "\n".join(lines)
+
+
+class TraceExporter:
+    """Writes finished traces from a background thread so requests never wait on file or network I/O."""
+
+    def __init__(self, export_file=None, export_url=None, slow_dir=None, max_queue=1000):
+        self.export_file = export_file
+        self.export_url = export_url
+        self.slow_dir = slow_dir
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._work, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def submit(self, trace, export, slow):
+        try:
+            self._queue.put_nowait((trace, export, slow))
+        except queue.Full:
+            logger.warning(f"Trace export queue full; dropping trace {trace.trace_id}")
+
+    def close(self, timeout=5.0):
+        """Export what is queued, then stop the thread."""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            trace, export, slow = item
+            try:
+                payload = otlp_payload(trace.spans)
+                if export:
+                    self._export(payload)
+                if slow:
+                    self._dump_slow(trace, payload)
+            except Exception as e:
+                logger.error(f"Failed to export trace {trace.trace_id}: {e}")
+
+    def _export(self, payload):
+        if self.export_file:
+            with open(self.export_file, 'a') as f:
+                f.write(json.dumps(payload, separators=(',', ':')) + "\n")
+        if self.export_url:
+            req = urllib.request.Request(
+                self.export_url,
+                data=json.dumps(payload).encode(),
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+            urllib.request.urlopen(req, timeout=5).close()
+
+    def _dump_slow(self, trace, payload):
+        root = min(trace.spans, key=lambda s: s.start_ns)
+        logger.warning(f"Slow trace {trace.trace_id} ({root.name}, {root.duration:.2f}s):\n{format_trace(trace)}")
+        if self.slow_dir:
+            os.makedirs(self.slow_dir, exist_ok=True)
+            filename = f"{datetime.utcnow():%Y%m%dT%H%M%S}_{trace.trace_id}.json"
+            with open(os.path.join(self.slow_dir, filename), 'w') as f:
+                json.dump(payload, f, indent=2)
+
+
+_exporter = None
+_exporter_pid = None
+_exporter_lock = threading.Lock()
+
+def get_trace_exporter():
+    """Return the process-wide trace exporter, drained at interpreter exit."""
+    global _exporter, _exporter_pid
+
+    with _exporter_lock:
+        # A forked worker inherits the exporter object but not its thread
+        if _exporter is None or _exporter_pid != os.getpid():
+            _exporter = TraceExporter(
+                export_file=get_setting('TRACE_EXPORT_FILE'),
+                export_url=get_setting('TRACE_EXPORT_URL'),
+                slow_dir=get_setting('TRACE_SLOW_DIR')
+            )
+            _exporter_pid = os.getpid()
+            atexit.register(_exporter.close)
+
+    return _exporter
+
+
+def current_span():
+    """The span new spans are created under, or None if the current work isn't traced."""
+    return _current_span.get()
+
+
+@contextmanager
+def use_span(parent):
+    """Make parent the current span inside the block, e.g. in a thread doing work for a traced request."""
+    token = _current_span.set(parent)
+    try:
+        yield parent
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """
+    Record the block as a child of the current span.
+
+    Yields the new Span, or None without doing any work when nothing is
+    being traced. An exception escaping the block marks the span as failed.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name=None):
+    """
+    Decorator recording each call of a function or coroutine function as a span.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _parse_traceparent(value):
+    """Return (trace_id, parent_span_id, sampled) from a traceparent header, or None if it's invalid."""
+    match = TRACEPARENT_RE.match((value or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def start_trace(name, kind=KIND_INTERNAL, traceparent=None, force=False, attributes=None):
+    """
+    Start a trace for a request or job if it is sampled or slow traces are being collected.
+
+    Args:
+        name: Root span name
+        kind: OTLP span kind of the root span
+        traceparent: W3C traceparent of the caller, whose trace is continued and whose sampling decision is kept
+        force: Sample the trace regardless of TRACE_SAMPLE_RATE
+        attributes: Root span attributes
+
+    Returns:
+        The root Span (to pass to finish_trace), or None if the work isn't traced
+    """
+    if not get_setting('TRACING_ENABLED', False):
+        return None
+
+    parent_id = None
+    parent = _parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+        sampled = sampled or force
+    else:
+        trace_id = f"{random.getrandbits(128) or 1:032x}"
+        sampled = force or random.random() < get_setting('TRACE_SAMPLE_RATE', 0.0)
+
+    # Unsampled work is still recorded when slow traces are collected, since slowness is only known at the end
+    if not sampled and not get_setting('TRACE_SLOW_SECONDS', 0):
+        return None
+
+    trace = Trace(trace_id, sampled, get_setting('TRACE_MAX_SPANS', 2000))
+    root = Span(trace, name, parent_id, kind, attributes)
+    root._token = _current_span.set(root)
+    return root
+
+
+def finish_trace(root, error=None):
+    """End a trace's root span and hand the trace to the exporter if it is sampled or slow."""
+    if root is None:
+        return
+
+    if error is not None:
+        root.set_error(f"{type(error).__name__}: {error}")
+    root.end()
+    try:
+        _current_span.reset(root._token)
+    except ValueError:
+        # Reset from a different context than the one that started the trace
+        _current_span.set(None)
+
+    trace = root.trace
+    with trace._lock:
+        trace.finished = True
+        for span_ in trace.spans:
+            if span_.end_ns is None:
+                # Never ended, e.g. a commit whose transaction failed
+                span_.set_error('unfinished')
+                span_.end_ns = root.end_ns
+
+    slow_seconds = get_setting('TRACE_SLOW_SECONDS', 0)
+    slow = bool(slow_seconds) and root.duration >= slow_seconds
+    if trace.sampled or slow:
+        get_trace_exporter().submit(trace, export=trace.sampled, slow=slow)
+
+
+def init_tracing(app):
+    """Install request hooks and SQLAlchemy listeners if TRACING_ENABLED is set."""
+    if not app.config.get('TRACING_ENABLED'):
+        return
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    with app.app_context():
+        engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+        if not event.contains(db.session, 'before_commit', _before_commit):
+            event.listen(db.session, 'before_commit', _before_commit)
+            event.listen(db.session, 'after_commit', _after_commit)
+
+    logger.info(f"Request tracing enabled (sample rate {app.config.get('TRACE_SAMPLE_RATE', 0.0)}, "
+                f"slow threshold {app.config.get('TRACE_SLOW_SECONDS', 0)}s)")
+
+
+def _before_request():
+    if request.endpoint in ('static', 'metrics'):
+        return
+
+    header = request.headers.get(get_setting('TRACE_HEADER', 'X-Trace'), '')
+    g._trace_root = start_trace(
+        f"{request.method} {request.endpoint or 'unmatched'}",
+        kind=KIND_SERVER,
+        traceparent=request.headers.get('traceparent'),
+        force=header.lower() in ('1', 'true', 'yes'),
+        attributes={
+            'http.method': request.method,
+            'http.route': request.url_rule.rule if request.url_rule else '',
+            'http.target': request.full_path.rstrip('?'),
+        }
+    )
+
+
+def _after_request(response):
+    root = g.get('_trace_root')
+    if root is not None:
+        root.set_attribute('http.status_code', response.status_code)
+        if response.status_code >= 500:
+            root.set_error(f"HTTP {response.status_code}")
+        if root.trace.sampled:
+            # Lets the caller look the trace up in the export
+            response.headers['X-Trace-Id'] = root.trace.trace_id
+    return response
+
+
+def _teardown_request(error):
+    finish_trace(g.pop('_trace_root', None), error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is None:
+        return
+    context._trace_span = Span(parent.trace, 'db.query', parent.span_id, KIND_CLIENT, {
+        'db.system': conn.dialect.name,
+        'db.statement': statement[:MAX_STATEMENT_LENGTH],
+    })
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_span = getattr(context, '_trace_span', None)
+    if query_span is not None:
+        query_span.end()
+
+
+def _handle_error(exception_context):
+    query_span = getattr(exception_context.execution_context, '_trace_span', None)
+    if query_span is not None:
+        query_span.set_error(str(exception_context.original_exception))
+        query_span.end()
+
+
+def _before_commit(session):
+    parent = _current_span.get()
+    if parent is not None:
+        # Not made current: the flush's statements appear beside it, inside its time range
+        session.info['_trace_commit'] = Span(parent.trace, 'db.commit', parent.span_id)
+
+
+def _after_commit(session):
+    commit_span = session.info.pop('_trace_commit', None)
+    if commit_span is not None:
+        commit_span.end()
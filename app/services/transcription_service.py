@@ -1,86 +1,241 @@
+import hashlib
 import os
 import logging
+from datetime import datetime
 import google.generativeai as genai
+from flask import has_app_context
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import AudioTranscript
 from app.services.gemini_service import configure_gemini
+from app.services.settings import get_setting
+from app.services.storage import get_storage
+from app.services.audio_preprocessing import compact_audio
+from app.services.rate_limiter import get_rate_limiter, estimate_tokens
+from app.services.tracing import traced
+from app.services.usage_service import track_usage, CALL_TRANSCRIPTION
 
 logger = logging.getLogger(__name__)
 
+AUDIO_MIME_TYPES = {
+    '.webm': 'audio/webm',
+    '.m4a': 'audio/m4a',
+    '.mp3': 'audio/mp3',
+    '.wav': 'audio/wav',
+    '.ogg': 'audio/ogg',
+    '.flac': 'audio/flac',
+}
+
+def get_audio_mime_type(audio_path):
+    """Return the MIME type for an audio file based on its extension."""
+    file_ext = os.path.splitext(audio_path)[1].lower()
+    # Default to octet-stream for unknown extensions
+    return AUDIO_MIME_TYPES.get(file_ext, 'application/octet-stream')
+
 class TranscriptionService:
     def __init__(self):
         # Configure Gemini if needed
         configure_gemini()
-        self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
+        self.model_name = get_setting('GEMINI_MODEL', 'gemini-1.5-flash-latest')
+        self.model = genai.GenerativeModel(self.model_name)
+    
+    # Per-process dedup counters; persisted totals are available from dedup_stats()
+    cache_hits = 0
+    cache_misses = 0
+    
+    # Per-process byte counters for recordings sent to the API, before and after preprocessing
+    bytes_original = 0
+    bytes_sent = 0
     
-    def transcribe(self, audio_path):
+    @traced()
+    def transcribe(self, audio_path, audio_hash=None):
         """
         Transcribe audio file to text using Gemini directly.
         
+        Recordings whose bytes were transcribed before are served from the
+        audio_transcript table without an API call.
+        
         Args:
-            audio_path: Path to the audio file
+            audio_path: Storage key (or legacy local path) of the audio file
+            audio_hash: SHA-256 of the file if already computed at upload time
             
         Returns:
             The transcribed text as a string
         """
         try:
-            # For debugging
-            logger.info(f"Starting transcription of audio file: {audio_path}")
-            
-            # Check if the audio file exists and has content
-            if not os.path.exists(audio_path):
-                logger.error(f"Audio file does not exist: {audio_path}")
-                return "Error: Audio file not found."
-                
-            if os.path.getsize(audio_path) == 0:
-                logger.error(f"Audio file is empty: {audio_path}")
-                return "Error: Audio file is empty."
-            
-            # Get file extension for the MIME type
-            file_ext = os.path.splitext(audio_path)[1].lower()
-            
-            # Determine the MIME type
-            if file_ext == '.webm':
-                mime_type = "audio/webm"
-            elif file_ext == '.m4a':
-                mime_type = "audio/m4a"
-            elif file_ext == '.mp3':
-                mime_type = "audio/mp3"
-            elif file_ext == '.wav':
-                mime_type = "audio/wav"
-            elif file_ext == '.ogg':
-                mime_type = "audio/ogg"
-            elif file_ext == '.flac':
-                mime_type = "audio/flac"
-            else:
-                # Default to octet-stream
-                mime_type = "application/octet-stream"
-            
-            # Read the file
-            logger.info(f"Reading audio file with MIME type: {mime_type}")
-            with open(audio_path, 'rb') as f:
-                audio_data = f.read()
-            
-            # Create a prompt for transcription only
-            prompt = """
-            Please transcribe the audio content accurately.
-            Return ONLY the transcribed text, without any additional commentary.
-            """
+            prepared = self._prepare_request(audio_path, audio_hash)
+            if isinstance(prepared, str):
+                return prepared
+            audio_data, audio_hash, mime_type = prepared
+            contents, sent_bytes = self._build_contents(audio_path, audio_data, mime_type)
             
             # Send to Gemini
             logger.info("Sending to Gemini for transcription...")
-            response = self.model.generate_content([prompt, {"mime_type": mime_type, "data": audio_data}])
+            with track_usage(CALL_TRANSCRIPTION, self.model_name, contents) as usage:
+                response = get_rate_limiter().call(
+                    self.model.generate_content,
+                    contents,
+                    estimated_tokens=estimate_tokens(contents),
+                    usage=usage
+                )
+                usage.response = response
             
-            # Extract just the transcription
-            transcription = response.text.strip()
-            logger.info(f"Transcription received: {transcription[:50]}...")
-            
-            # If we got a very short or empty transcription, use a fallback response
-            if len(transcription) < 5:
-                logger.warning("Transcription is too short, using fallback")
-                return "I couldn't properly hear the audio. Please speak clearly and try again."
-            
-            return transcription
+            return self._handle_response(response, audio_hash, mime_type, len(audio_data), sent_bytes)
             
         except Exception as e:
             logger.error(f"Error transcribing audio file: {e}")
             # Return a friendly error message
-            return "I'm having trouble processing the audio. Please try again or speak more clearly."
\ No newline at end of file
+            return "I'm having trouble processing the audio. Please try again or speak more clearly."
+    
+    def _prepare_request(self, audio_path, audio_hash=None):
+        """
+        Validate and read an audio file, checking the transcript store first.
+        
+        Returns:
+            A final transcript or error string if no API call is needed, otherwise
+            a tuple of (audio_data, audio_hash, mime_type)
+        """
+        # For debugging
+        logger.info(f"Starting transcription of audio file: {audio_path}")
+        
+        # Check if the audio file exists and has content
+        storage = get_storage()
+        if not storage.exists(audio_path):
+            logger.error(f"Audio file does not exist: {audio_path}")
+            return "Error: Audio file not found."
+        
+        # Read the file once; the hash below reuses these bytes
+        audio_data = storage.read(audio_path)
+        if not audio_data:
+            logger.error(f"Audio file is empty: {audio_path}")
+            return "Error: Audio file is empty."
+        
+        # Determine the MIME type
+        mime_type = get_audio_mime_type(audio_path)
+        logger.info(f"Read audio file with MIME type: {mime_type}")
+        
+        # Return the stored transcript if this exact recording was transcribed before
+        if self._cache_enabled():
+            audio_hash = audio_hash or hashlib.sha256(audio_data).hexdigest()
+            cached_transcript = self._get_cached_transcript(audio_hash)
+            if cached_transcript is not None:
+                logger.info(f"Transcript cache hit for {audio_path} ({audio_hash[:12]})")
+                with track_usage(CALL_TRANSCRIPTION, self.model_name) as usage:
+                    usage.cache_hit = True
+                return cached_transcript
+        
+        return audio_data, audio_hash, mime_type
+    
+    def _build_contents(self, audio_path, audio_data, mime_type):
+        """
+        Build the transcription request, compacting the audio first if preprocessing is enabled.
+        
+        Returns:
+            A tuple of (contents, sent_bytes)
+        """
+        data, sent_mime_type = compact_audio(audio_data, audio_path, mime_type)
+        TranscriptionService.bytes_original += len(audio_data)
+        TranscriptionService.bytes_sent += len(data)
+        
+        # Create a prompt for transcription only
+        prompt = """
+        Please transcribe the audio content accurately.
+        Return ONLY the transcribed text, without any additional commentary.
+        """
+        
+        contents = [prompt, {"mime_type": sent_mime_type, "data": data}]
+        return contents, len(data)
+    
+    def _handle_response(self, response, audio_hash, mime_type, size_bytes, sent_bytes=None):
+        """Extract the transcript from a response and store it for duplicate recordings."""
+        # Extract just the transcription
+        transcription = response.text.strip()
+        logger.info(f"Transcription received: {transcription[:50]}...")
+        
+        # If we got a very short or empty transcription, use a fallback response
+        if len(transcription) < 5:
+            logger.warning("Transcription is too short, using fallback")
+            return "I couldn't properly hear the audio. Please speak clearly and try again."
+        
+        if audio_hash and self._cache_enabled():
+            self._store_transcript(audio_hash, transcription, mime_type, size_bytes, sent_bytes)
+        
+        return transcription
+    
+    def _cache_enabled(self):
+        # The cache lives in the database, so it needs an app context
+        return has_app_context() and get_setting('TRANSCRIPT_CACHE_ENABLED', True)
+    
+    def _get_cached_transcript(self, audio_hash):
+        """
+        Return the stored transcript for an audio hash and record the hit, or None.
+        
+        The hit is written in the caller's transaction, which the caller commits
+        along with the answer it is processing.
+        """
+        cached = AudioTranscript.query.get(audio_hash)
+        if cached is None:
+            TranscriptionService.cache_misses += 1
+            return None
+        
+        TranscriptionService.cache_hits += 1
+        AudioTranscript.query.filter_by(audio_hash=audio_hash).update({
+            'hit_count': AudioTranscript.hit_count + 1,
+            'last_used_at': datetime.utcnow()
+        }, synchronize_session=False)
+        return cached.transcript
+    
+    def _store_transcript(self, audio_hash, transcript, mime_type, size_bytes, sent_bytes=None):
+        """
+        Add a successful transcript to the caller's transaction; a concurrent insert of the same recording is ignored.
+        
+        The savepoint keeps a duplicate key from rolling back the caller's
+        pending changes, which are committed by the caller, not here.
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.add(AudioTranscript(
+                    audio_hash=audio_hash,
+                    transcript=transcript,
+                    mime_type=mime_type,
+                    size_bytes=size_bytes,
+                    sent_bytes=sent_bytes
+                ))
+        except IntegrityError:
+            logger.info(f"Transcript for {audio_hash[:12]} was stored concurrently")
+    
+    @staticmethod
+    def dedup_stats():
+        """
+        Summarise how often duplicate recordings skip the transcription API.
+        
+        Each stored transcript was one API call; every hit on it is a call saved.
+        
+        Returns:
+            A dict with persisted totals and this process's hit/miss counters
+        """
+        entries, hits, saved_bytes, original_bytes, sent_bytes = db.session.query(
+            func.count(AudioTranscript.audio_hash),
+            func.coalesce(func.sum(AudioTranscript.hit_count), 0),
+            func.coalesce(func.sum(
+                func.coalesce(AudioTranscript.sent_bytes, AudioTranscript.size_bytes) * AudioTranscript.hit_count
+            ), 0),
+            func.coalesce(func.sum(AudioTranscript.size_bytes), 0),
+            func.coalesce(func.sum(func.coalesce(AudioTranscript.sent_bytes, AudioTranscript.size_bytes)), 0)
+        ).one()
+        requests = entries + hits
+        
+        return {
+            'stored_transcripts': entries,
+            'duplicate_hits': hits,
+            'hit_rate': round(hits / requests, 3) if requests else 0.0,
+            'bytes_not_uploaded': int(saved_bytes),
+            'original_bytes': int(original_bytes),
+            'sent_bytes': int(sent_bytes),
+            'compression_ratio': round(sent_bytes / original_bytes, 3) if original_bytes else 1.0,
+            'process_hits': TranscriptionService.cache_hits,
+            'process_misses': TranscriptionService.cache_misses,
+            'process_bytes_original': TranscriptionService.bytes_original,
+            'process_bytes_sent': TranscriptionService.bytes_sent
+        }
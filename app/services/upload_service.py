@@ -0,0 +1,93 @@
+import hashlib
+import logging
+from collections import namedtuple
+from app.services.metrics import record_upload
+from app.services.settings import get_setting
+from app.services.storage import get_storage
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+StoredUpload = namedtuple('StoredUpload', ['key', 'filename', 'original_filename', 'size', 'sha256'])
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds its per-type size limit."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        if max_bytes >= 1024 * 1024:
+            limit = f"{max_bytes // (1024 * 1024)}MB"
+        else:
+            limit = f"{max_bytes // 1024}KB"
+        super().__init__(f"File too large (max {limit})")
+
+
+def hash_stored_file(key):
+    """Compute the SHA-256 of a file in upload storage, streaming it in chunks."""
+    hasher = hashlib.sha256()
+    for chunk in get_storage().iter_chunks(key):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class _MeteredStream:
+    """Wraps an upload stream, hashing and counting bytes as the storage backend reads them."""
+
+    def __init__(self, stream, max_bytes, chunk_size):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        # Never pull more than one chunk from the request at a time
+        if size is None or size < 0 or size > self.chunk_size:
+            size = self.chunk_size
+        chunk = self.stream.read(size)
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        self.hasher.update(chunk)
+        return chunk
+
+
+@traced()
+def save_upload(file, category, max_bytes, chunk_size=None):
+    """
+    Stream an uploaded file to upload storage in fixed-size chunks.
+
+    The size and SHA-256 are computed in the same pass, so callers never need
+    to re-read the file just to identify it. The partial file is removed as
+    soon as the limit is exceeded.
+
+    Args:
+        file: The werkzeug FileStorage from request.files
+        category: Storage key prefix ('audio', 'cvs' or 'profile_pics')
+        max_bytes: Maximum allowed size in bytes
+        chunk_size: Bytes read per iteration (defaults to UPLOAD_CHUNK_SIZE)
+
+    Returns:
+        A StoredUpload with the storage key, generated filename, size and hash
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than max_bytes
+    """
+    chunk_size = chunk_size or get_setting('UPLOAD_CHUNK_SIZE', 64 * 1024)
+    storage = get_storage()
+
+    # Generate a unique, sharded key
+    key = storage.generate_key(category, file.filename)
+    filename = key.rsplit('/', 1)[-1]
+
+    stream = _MeteredStream(file.stream, max_bytes, chunk_size)
+    try:
+        storage.save(key, stream)
+    except Exception:
+        storage.delete(key)
+        raise
+
+    logger.info(f"Saved upload {key} ({stream.size} bytes)")
+    record_upload(category, stream.size)
+    return StoredUpload(key, filename, file.filename, stream.size, stream.hasher.hexdigest())
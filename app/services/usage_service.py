@@ -0,0 +1,327 @@
+"""
+Usage ledger for Gemini calls.
+
+Every logical model call (retries included) is described by a UsageRecord:
+call type, model, user, input/output/audio tokens, latency, retries and
+whether it was served from a cache. Token counts come from the response's
+usage_metadata when the SDK reports it and are estimated otherwise.
+
+Rows are buffered in memory and written in batches on their own connection,
+so recording never joins or commits the caller's transaction. A background
+thread writes partial batches every USAGE_LEDGER_FLUSH_SECONDS. `flask usage
+report` and /admin/usage aggregate the ledger by day, user and call type.
+"""
+import atexit
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context, has_request_context
+from sqlalchemy import case, func, insert
+from app import db
+from app.models import GeminiUsage
+from app.services.metrics import record_gemini_call
+from app.services.rate_limiter import estimate_tokens
+from app.services.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+CALL_TRANSCRIPTION = 'transcription'
+CALL_ANSWER_REVIEW = 'answer_review'
+CALL_FUSED_ANSWER_REVIEW = 'fused_answer_review'
+CALL_CV_REVIEW = 'cv_review'
+
+# Columns the report can group by
+GROUP_COLUMNS = {
+    'day': func.date(GeminiUsage.created_at),
+    'user': GeminiUsage.user_id,
+    'call_type': GeminiUsage.call_type,
+    'model': GeminiUsage.model,
+}
+
+# User the current calls are made for, when there is no logged-in request user (jobs, CLI)
+_usage_user = contextvars.ContextVar('usage_user', default=None)
+
+
+@contextmanager
+def usage_user(user_id):
+    """Attribute Gemini calls made inside the block to a user."""
+    token = _usage_user.set(user_id)
+    try:
+        yield
+    finally:
+        _usage_user.reset(token)
+
+
+def current_usage_user():
+    """The user Gemini calls are currently made for: the usage_user() block, else the logged-in user."""
+    user_id = _usage_user.get()
+    if user_id is None and has_request_context():
+        from flask_login import current_user
+        if current_user.is_authenticated:
+            user_id = current_user.id
+    return user_id
+
+
+class UsageRecord:
+    """What one logical Gemini call cost; the caller fills it in and track_usage writes it to the ledger."""
+
+    def __init__(self, call_type, model, contents=None):
+        self.call_type = call_type
+        self.model = model
+        self.contents = contents
+        self.user_id = current_usage_user()
+        self.response = None
+        self.output_text = None  # Set for streamed responses, whose final object has no full text
+        self.retries = 0  # Incremented by the rate limiter
+        self.cache_hit = False
+        self.success = True
+        self._start = time.perf_counter()
+
+    def token_counts(self):
+        """
+        Return (input_tokens, output_tokens, audio_tokens, estimated).
+
+        google-generativeai 0.3 responses carry no usage_metadata, so counts
+        are estimated from the request and response text in that case.
+        """
+        if self.cache_hit:
+            return 0, 0, 0, False
+
+        metadata = getattr(self.response, 'usage_metadata', None)
+        if metadata is not None and getattr(metadata, 'prompt_token_count', None):
+            audio_tokens = sum(
+                getattr(detail, 'token_count', 0) or 0
+                for detail in getattr(metadata, 'prompt_tokens_details', None) or []
+                if 'AUDIO' in str(getattr(detail, 'modality', '')).upper()
+            )
+            return metadata.prompt_token_count, getattr(metadata, 'candidates_token_count', 0) or 0, audio_tokens, False
+
+        if self.response is None and self.output_text is None:
+            # The request never produced a response, so nothing is known to be billed
+            return 0, 0, 0, True
+
+        parts = self.contents if isinstance(self.contents, (list, tuple)) else [self.contents]
+        input_tokens = estimate_tokens(self.contents) if self.contents is not None else 0
+        audio_tokens = estimate_tokens([part for part in parts if isinstance(part, dict)])
+
+        text = self.output_text
+        if text is None:
+            try:
+                text = self.response.text or ''
+            except (AttributeError, ValueError):
+                # Blocked responses raise on .text
+                text = ''
+        return input_tokens, len(text) // 4, audio_tokens, True
+
+    def finish(self):
+        """Write the record to the ledger and the latency metrics."""
+        latency = time.perf_counter() - self._start
+        status = 'cache_hit' if self.cache_hit else ('ok' if self.success else 'error')
+        record_gemini_call(self.call_type, self.model, status, latency, self.retries)
+
+        input_tokens, output_tokens, audio_tokens, estimated = self.token_counts()
+        get_usage_ledger().add({
+            'created_at': datetime.utcnow(),
+            'call_type': self.call_type,
+            'model': self.model,
+            'user_id': self.user_id,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'audio_tokens': audio_tokens,
+            'estimated': estimated,
+            'latency_ms': int(latency * 1000),
+            'retries': self.retries,
+            'cache_hit': self.cache_hit,
+            'success': self.success,
+        })
+
+
+@contextmanager
+def track_usage(call_type, model, contents=None):
+    """
+    Record a Gemini call in the usage ledger.
+
+    Yields a UsageRecord; set its response (or output_text), cache_hit and
+    success as the call proceeds, and pass it to the rate limiter as usage=
+    so retries are counted. An exception escaping the block marks the call
+    as failed.
+
+    Args:
+        call_type: One of the CALL_* constants
+        model: Model name the call is sent to
+        contents: The request contents, used to estimate tokens
+    """
+    usage = UsageRecord(call_type, model, contents)
+    try:
+        yield usage
+    except BaseException:
+        usage.success = False
+        raise
+    finally:
+        try:
+            usage.finish()
+        except Exception as e:
+            logger.error(f"Failed to record Gemini usage: {e}")
+
+
+class UsageLedger:
+    """
+    Buffers usage rows in memory and inserts them in batches on a separate connection.
+
+    Batches are written when full, and a daemon thread writes whatever is
+    buffered every flush_interval seconds, so rows from a quiet process
+    don't wait for the next call or for interpreter exit.
+    """
+
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._app = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+        self._stop_event = threading.Event()
+
+    def add(self, row):
+        """Buffer a row, flushing when the batch is full or the flush interval has passed."""
+        if not get_setting('USAGE_LEDGER_ENABLED', True):
+            return
+        if not has_app_context():
+            # Without an app there is no database to write to (e.g. standalone benchmarks)
+            logger.debug(f"Dropping {row['call_type']} usage row recorded outside an app context")
+            return
+
+        with self._lock:
+            self._rows.append(row)
+            self._app = current_app._get_current_object()
+            due = len(self._rows) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval
+            self._start_flusher()
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows. Returns the number written."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            app = self._app
+            self._last_flush = time.monotonic()
+
+        if not rows or app is None:
+            return 0
+
+        try:
+            # A connection of its own, so the caller's session and transaction are untouched
+            with app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(insert(GeminiUsage), rows)
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} usage ledger rows: {e}")
+            return 0
+
+        return len(rows)
+
+    def _start_flusher(self):
+        """Start the flush thread if this process doesn't have one yet, e.g. after a fork. Call with the lock held."""
+        if self._flusher_pid == os.getpid() or not self.flush_interval:
+            return
+        self._flusher = threading.Thread(target=self._flush_periodically, name='usage-ledger-flush', daemon=True)
+        self._flusher_pid = os.getpid()
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stop_event.wait(self.flush_interval):
+            if self._rows:
+                self.flush()
+
+    def stop(self):
+        """Stop the flush thread and write what is left."""
+        self._stop_event.set()
+        return self.flush()
+
+
+_usage_ledger = None
+_usage_ledger_lock = threading.Lock()
+
+def get_usage_ledger():
+    """Return the process-wide usage ledger, stopped and flushed at interpreter exit."""
+    global _usage_ledger
+
+    with _usage_ledger_lock:
+        if _usage_ledger is None:
+            _usage_ledger = UsageLedger(
+                batch_size=get_setting('USAGE_LEDGER_BATCH_SIZE', 20),
+                flush_interval=get_setting('USAGE_LEDGER_FLUSH_SECONDS', 5.0)
+            )
+            atexit.register(_usage_ledger.stop)
+
+    return _usage_ledger
+
+
+def estimate_cost(input_tokens, output_tokens, audio_tokens):
+    """Estimated cost in USD from the GEMINI_PRICE_* settings (per million tokens)."""
+    text_tokens = max(input_tokens - audio_tokens, 0)
+    return (
+        text_tokens * get_setting('GEMINI_PRICE_INPUT_PER_1M', 0.075)
+        + audio_tokens * get_setting('GEMINI_PRICE_AUDIO_PER_1M', 0.075)
+        + output_tokens * get_setting('GEMINI_PRICE_OUTPUT_PER_1M', 0.30)
+    ) / 1_000_000
+
+
+def usage_report(group_by=('day', 'call_type'), days=7, user_id=None):
+    """
+    Aggregate the usage ledger.
+
+    Args:
+        group_by: Names from GROUP_COLUMNS to group by, in order
+        days: Only include calls from the last this many days (None for all)
+        user_id: Only include calls made for this user
+
+    Returns:
+        A list of dicts, one per group, with call, cache hit, failure, retry
+        and token totals, average and maximum latency and an estimated cost
+    """
+    # Include rows still buffered in this process
+    get_usage_ledger().flush()
+
+    columns = [GROUP_COLUMNS[name].label(name) for name in group_by]
+    query = db.session.query(
+        *columns,
+        func.count(GeminiUsage.id).label('calls'),
+        func.count(case((GeminiUsage.cache_hit.is_(True), 1))).label('cache_hits'),
+        func.count(case((GeminiUsage.success.is_(False), 1))).label('failures'),
+        func.coalesce(func.sum(GeminiUsage.retries), 0).label('retries'),
+        func.coalesce(func.sum(GeminiUsage.input_tokens), 0).label('input_tokens'),
+        func.coalesce(func.sum(GeminiUsage.output_tokens), 0).label('output_tokens'),
+        func.coalesce(func.sum(GeminiUsage.audio_tokens), 0).label('audio_tokens'),
+        func.avg(GeminiUsage.latency_ms).label('avg_latency_ms'),
+        func.max(GeminiUsage.latency_ms).label('max_latency_ms')
+    )
+    if days is not None:
+        query = query.filter(GeminiUsage.created_at >= datetime.utcnow() - timedelta(days=days))
+    if user_id is not None:
+        query = query.filter(GeminiUsage.user_id == user_id)
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+
+    report = []
+    for row in query.all():
+        entry = row._asdict()
+        if 'day' in entry and entry['day'] is not None:
+            # SQLite returns a string, PostgreSQL a date
+            entry['day'] = str(entry['day'])
+        for key in ('retries', 'input_tokens', 'output_tokens', 'audio_tokens'):
+            entry[key] = int(entry[key])
+        entry['avg_latency_ms'] = round(entry['avg_latency_ms'] or 0)
+        entry['estimated_cost_usd'] = round(
+            estimate_cost(entry['input_tokens'], entry['output_tokens'], entry['audio_tokens']), 6
+        )
+        report.append(entry)
+
+    return report
@@ -0,0 +1,167 @@
+"""
+Measure audio preprocessing byte savings and end-to-end transcription latency.
+
+Generates speech-like clips with leading and trailing silence in every
+format the answer upload accepts (mp3, wav, ogg, flac, webm, m4a), runs them
+through the preprocessing stage, and compares sending the original with
+sending the compacted audio.
+
+By default the upload and transcription are simulated as
+overhead + bytes / bandwidth, so the benchmark runs offline and costs
+nothing; the preprocessing itself always runs for real. Pass --live to send
+both versions of each clip to the real API (needs GOOGLE_API_KEY).
+
+Requires ffmpeg on PATH (or AUDIO_FFMPEG_PATH).
+
+Usage:
+    python benchmarks/bench_audio_preprocess.py
+    python benchmarks/bench_audio_preprocess.py --speech 60 --silence 5 --bandwidth 2
+    python benchmarks/bench_audio_preprocess.py --live --formats webm m4a --repeat 1
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Every run must reach the model, so the response cache is always off
+os.environ['GEMINI_CACHE_BACKEND'] = 'none'
+
+# Encoder arguments for each allowed upload format, close to what browsers and phones produce
+SOURCE_ENCODERS = {
+    'mp3': ['-c:a', 'libmp3lame', '-b:a', '128k'],
+    'wav': ['-c:a', 'pcm_s16le'],
+    'ogg': ['-c:a', 'libvorbis', '-q:a', '4'],
+    'flac': ['-c:a', 'flac'],
+    'webm': ['-c:a', 'libopus', '-b:a', '64k'],
+    'm4a': ['-c:a', 'aac', '-b:a', '128k'],
+}
+
+
+def make_clip(ffmpeg, fmt, speech, silence, directory):
+    """
+    Generate a stereo 44.1 kHz clip: silence, a syllable-rate modulated voiced tone with noise, silence.
+
+    Returns:
+        The clip's bytes
+    """
+    voice = ("(0.3*sin(2*PI*140*t)+0.15*sin(2*PI*280*t)+0.08*sin(2*PI*420*t)+0.03*(random(0)-0.5))"
+             "*(0.55+0.45*sin(2*PI*4*t))")
+    path = os.path.join(directory, f"clip.{fmt}")
+    subprocess.run([
+        ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f"aevalsrc='{voice}|{voice}':s=44100:d={speech}",
+        '-af', f"adelay={int(silence * 1000)}:all=1,apad=pad_dur={silence}",
+        *SOURCE_ENCODERS[fmt],
+        path
+    ], check=True, capture_output=True)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def simulated_seconds(size, args):
+    """Simulated upload plus transcription time for a request carrying size bytes."""
+    return args.overhead + size * 8 / (args.bandwidth * 1_000_000)
+
+
+def live_seconds(model, data, mime_type, repeat):
+    """Median wall time of transcribing data with the real API."""
+    from app.services.rate_limiter import get_rate_limiter, estimate_tokens
+
+    prompt = "Please transcribe the audio content accurately. Return ONLY the transcribed text."
+    contents = [prompt, {"mime_type": mime_type, "data": data}]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        get_rate_limiter().call(model.generate_content, contents, estimated_tokens=estimate_tokens(contents))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--formats', nargs='+', default=list(SOURCE_ENCODERS), choices=list(SOURCE_ENCODERS),
+                        help='Source formats to test')
+    parser.add_argument('--speech', type=float, default=30, help='Seconds of speech-like audio per clip')
+    parser.add_argument('--silence', type=float, default=3, help='Seconds of silence before and after the speech')
+    parser.add_argument('--output-format', choices=['ogg', 'mp3', 'flac'], default=None,
+                        help='Preprocessing output format (defaults to AUDIO_PREPROCESS_FORMAT)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per clip (median reported)')
+    parser.add_argument('--live', action='store_true', help='Call the real Gemini API')
+    parser.add_argument('--bandwidth', type=float, default=5.0, help='Simulated upload bandwidth in Mbit/s')
+    parser.add_argument('--overhead', type=float, default=1.5, help='Simulated fixed seconds per transcription')
+    args = parser.parse_args()
+
+    if not args.live:
+        os.environ.setdefault('GOOGLE_API_KEY', 'simulated')
+
+    from app.services.audio_preprocessing import find_ffmpeg, preprocess_audio
+    from app.services.transcription_service import get_audio_mime_type
+    from app.services.settings import get_setting
+
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        sys.exit("ffmpeg not found; install it or set AUDIO_FFMPEG_PATH to run this benchmark")
+
+    model = None
+    if args.live:
+        import google.generativeai as genai
+        from app.services.gemini_service import configure_gemini
+
+        configure_gemini()
+        model = genai.GenerativeModel(get_setting('GEMINI_MODEL', 'gemini-1.5-flash-latest'))
+
+    output_format = args.output_format or get_setting('AUDIO_PREPROCESS_FORMAT', 'ogg')
+    print(f"{args.speech:g}s speech with {args.silence:g}s silence each side, output {output_format} "
+          f"at {get_setting('AUDIO_PREPROCESS_BITRATE', '24k')}, "
+          f"{'live API' if args.live else f'simulated {args.bandwidth:g} Mbit/s + {args.overhead:g}s'}\n")
+    print(f"{'Format':>7} {'Original':>10} {'Processed':>10} {'Ratio':>7} {'Prep (s)':>9} "
+          f"{'Raw E2E (s)':>12} {'Prep E2E (s)':>13} {'Speedup':>8}")
+    print('-' * 84)
+
+    totals = [0, 0]
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in args.formats:
+            try:
+                original = make_clip(ffmpeg, fmt, args.speech, args.silence, directory)
+            except subprocess.CalledProcessError as e:
+                print(f"{fmt:>7}  could not generate clip: {e.stderr.decode(errors='replace').strip()[:60]}")
+                continue
+
+            timings = []
+            processed = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                processed = preprocess_audio(original, f".{fmt}", output_format=output_format)
+                timings.append(time.perf_counter() - start)
+            prep_seconds = statistics.median(timings)
+
+            if processed is None:
+                # Not smaller or failed; the pipeline sends the original in this case
+                data, mime_type = original, get_audio_mime_type(f"clip.{fmt}")
+            else:
+                data, mime_type = processed.data, processed.mime_type
+
+            if args.live:
+                raw_e2e = live_seconds(model, original, get_audio_mime_type(f"clip.{fmt}"), args.repeat)
+                prep_e2e = prep_seconds + live_seconds(model, data, mime_type, args.repeat)
+            else:
+                raw_e2e = simulated_seconds(len(original), args)
+                prep_e2e = prep_seconds + simulated_seconds(len(data), args)
+
+            totals[0] += len(original)
+            totals[1] += len(data)
+            print(f"{fmt:>7} {len(original):>10} {len(data):>10} {len(data) / len(original):>7.3f} "
+                  f"{prep_seconds:>9.3f} {raw_e2e:>12.2f} {prep_e2e:>13.2f} {raw_e2e / prep_e2e:>7.2f}x"
+                  f"{'' if processed else '  (original kept)'}")
+
+    if totals[0]:
+        print(f"\nTotal {totals[0]} -> {totals[1]} bytes ({1 - totals[1] / totals[0]:.1%} saved)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Compare single-prompt and chunked (map-reduce) CV review latency across CV lengths.
+
+By default the Gemini model is replaced with a simulated one whose latency
+grows with prompt size and output budget, so the benchmark runs offline and
+costs nothing. Pass --live to call the real API (needs GOOGLE_API_KEY; each
+run sends several long prompts).
+
+Usage:
+    python benchmarks/bench_cv_review.py
+    python benchmarks/bench_cv_review.py --lengths 4000 16000 64000 --scale 0.1
+    python benchmarks/bench_cv_review.py --live --lengths 8000 32000 --repeat 1
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Every run must reach the model, so the response cache is always off
+os.environ['GEMINI_CACHE_BACKEND'] = 'none'
+
+SECTION_TITLES = ['Experience', 'Education', 'Publications', 'Projects', 'Teaching', 'Grants', 'Talks', 'Skills']
+WORDS = ['designed', 'implemented', 'distributed', 'Python', 'Kubernetes', 'latency', 'pipeline', 'team',
+         'research', 'published', 'reduced', 'costs', 'by', '30%', 'machine', 'learning', 'PostgreSQL', 'led']
+
+
+class SimulatedModel:
+    """Stands in for genai.GenerativeModel with latency = overhead + prefill + decode time."""
+
+    def __init__(self, args):
+        self.args = args
+
+    def latency(self, contents, generation_config):
+        from app.services.rate_limiter import estimate_tokens
+
+        input_tokens = estimate_tokens(contents)
+        output_tokens = (generation_config or {}).get('max_output_tokens', 2048) * self.args.output_fill
+        latency = self.args.overhead + input_tokens / self.args.prefill_rate + output_tokens / self.args.decode_rate
+        return latency * self.args.scale
+
+    def generate_content(self, contents, generation_config=None, **kwargs):
+        time.sleep(self.latency(contents, generation_config))
+        return SimpleNamespace(text="**Overall Impression:** Simulated review.", prompt_feedback=None)
+
+    async def generate_content_async(self, contents, generation_config=None, **kwargs):
+        await asyncio.sleep(self.latency(contents, generation_config))
+        return SimpleNamespace(text="**Overall Impression:** Simulated review.", prompt_feedback=None)
+
+
+def make_cv_text(tokens, rng):
+    """Build CV-like text of roughly the given estimated token count."""
+    paragraphs = []
+    chars = 0
+    while chars < tokens * 4:
+        lines = [f"{rng.choice(SECTION_TITLES)} {len(paragraphs) + 1}"]
+        for _ in range(rng.randint(3, 8)):
+            lines.append("- " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))))
+        paragraph = "\n".join(lines)
+        paragraphs.append(paragraph)
+        chars += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def time_call(func, repeat):
+    """Return the median wall time in seconds and the last result."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lengths', type=int, nargs='+', default=[2000, 8000, 16000, 32000, 64000],
+                        help='CV lengths in estimated tokens')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path and length (median reported)')
+    parser.add_argument('--live', action='store_true', help='Call the real Gemini API')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply simulated latencies (e.g. 0.1 for a quick run)')
+    parser.add_argument('--overhead', type=float, default=0.6, help='Simulated fixed seconds per request')
+    parser.add_argument('--prefill-rate', type=float, default=20000, help='Simulated input tokens processed per second')
+    parser.add_argument('--decode-rate', type=float, default=150, help='Simulated output tokens generated per second')
+    parser.add_argument('--output-fill', type=float, default=0.6, help='Simulated fraction of max_output_tokens used')
+    args = parser.parse_args()
+
+    if not args.live:
+        # Keep the limiter's concurrency cap but drop the per-minute budgets, which would dominate offline runs
+        os.environ.setdefault('GEMINI_RPM', '0')
+        os.environ.setdefault('GEMINI_TPM', '0')
+        os.environ.setdefault('GOOGLE_API_KEY', 'simulated')
+
+    from app.services.gemini_service import GeminiService, AsyncGeminiService, configure_gemini
+    from app.services.rate_limiter import estimate_tokens
+    from app.services.settings import get_setting
+
+    if args.live:
+        configure_gemini()
+        service = GeminiService()
+    else:
+        # Chunked reviews fan out through the async service, so both need the simulated model
+        service = GeminiService.__new__(GeminiService)
+        service._async_service = AsyncGeminiService.__new__(AsyncGeminiService)
+        for instance in (service, service._async_service):
+            instance.model_name = 'simulated'
+            instance._model = SimulatedModel(args)
+
+    rng = random.Random(42)
+    print(f"Section size {get_setting('CV_CHUNK_TARGET_TOKENS', 3000)} tokens, "
+          f"concurrency {get_setting('CV_CHUNK_CONCURRENCY', 4)}, "
+          f"{'live API' if args.live else 'simulated model'}\n")
+    print(f"{'CV tokens':>10} {'Sections':>9} {'Single (s)':>11} {'Chunked (s)':>12} {'Speedup':>9}  Errors")
+    print('-' * 66)
+
+    for length in args.lengths:
+        cv_text = make_cv_text(length, rng)
+        sections = len(service.split_cv_text(cv_text, get_setting('CV_CHUNK_TARGET_TOKENS', 3000)))
+
+        single, single_review = time_call(
+            lambda: service.generate_review(service.create_cv_review_prompt(cv_text)), args.repeat)
+        chunked, chunked_review = time_call(lambda: service.review_cv_chunked(cv_text), args.repeat)
+
+        errors = [name for name, review in (('single', single_review), ('chunked', chunked_review))
+                  if review.startswith("Error")]
+        print(f"{estimate_tokens(cv_text):>10} {sections:>9} {single:>11.2f} {chunked:>12.2f} "
+              f"{single / chunked:>8.2f}x  {', '.join(errors) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
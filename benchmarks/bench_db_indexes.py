@@ -0,0 +1,186 @@
+"""
+Benchmark the hot route queries against a large SQLite database, before and
+after the composite indexes from migration 5e0a9d3b7c21 (and the history
+index as extended by 7c3e9a15d2f8) are created.
+
+Usage:
+    python benchmarks/bench_db_indexes.py
+    python benchmarks/bench_db_indexes.py --interviews 10000 --answers 100000 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+from app import db
+from app.models import User, Profession, Question, Interview, Answer, CV
+
+GRADES = ['Junior', 'Middle', 'Senior']
+
+# Indexes added by the migration, dropped for the "before" run
+INDEXES = [
+    'ix_question_profession_id_grade',
+    'ix_interview_user_id_created_at_id',
+    'ix_interview_user_id_profession_id_grade',
+    'ix_answer_interview_id',
+    'ix_cv_user_id_uploaded_at',
+    'ix_cv_file_path',
+]
+
+def seed(engine, args):
+    """Bulk-insert synthetic rows with raw executemany for speed."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {'id': i, 'full_name': f'User {i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(1, args.users + 1)
+        ])
+        conn.execute(Profession.__table__.insert(), [
+            {'id': i, 'name': f'Profession {i}'} for i in range(1, args.professions + 1)
+        ])
+        conn.execute(Question.__table__.insert(), [
+            {'id': i, 'profession_id': rng.randint(1, args.professions), 'grade': rng.choice(GRADES),
+             'question_text': f'Question {i}?'}
+            for i in range(1, args.questions + 1)
+        ])
+
+        print(f"Seeding {args.interviews} interviews...")
+        conn.execute(Interview.__table__.insert(), [
+            {'id': i, 'user_id': rng.randint(1, args.users), 'profession_id': rng.randint(1, args.professions),
+             'grade': rng.choice(GRADES), 'overall_rating': round(rng.uniform(1, 5), 1),
+             'created_at': now - timedelta(minutes=rng.randint(0, 500000))}
+            for i in range(1, args.interviews + 1)
+        ])
+
+        print(f"Seeding {args.answers} answers...")
+        batch = []
+        for i in range(1, args.answers + 1):
+            batch.append({'id': i, 'interview_id': rng.randint(1, args.interviews),
+                          'question_id': rng.randint(1, args.questions), 'rating': round(rng.uniform(1, 5), 1),
+                          'feedback': 'Feedback'})
+            if len(batch) == 50000:
+                conn.execute(Answer.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Answer.__table__.insert(), batch)
+
+        print(f"Seeding {args.cvs} CVs...")
+        conn.execute(CV.__table__.insert(), [
+            {'id': i, 'user_id': rng.randint(1, args.users), 'filename': f'cv{i}.pdf',
+             'file_path': f'/uploads/cvs/{i}_cv.pdf', 'uploaded_at': now - timedelta(minutes=rng.randint(0, 500000))}
+            for i in range(1, args.cvs + 1)
+        ])
+
+def route_queries(args):
+    """Query shapes issued by the catalog, interview, history, cv and profile routes."""
+    rng = random.Random(7)
+
+    def user():
+        return rng.randint(1, args.users)
+
+    def profession():
+        return rng.randint(1, args.professions)
+
+    return {
+        'catalog.index counts': lambda: select(
+            Question.profession_id, Question.grade, func.count(Question.id)
+        ).group_by(Question.profession_id, Question.grade),
+        'interview.start questions': lambda: select(Question.id).where(
+            Question.profession_id == profession(), Question.grade == rng.choice(GRADES)),
+        'interview.details answers': lambda: select(Answer).where(
+            Answer.interview_id == rng.randint(1, args.interviews)),
+        'history.index page': lambda: select(Interview, Profession.name).join(
+            Profession, Interview.profession_id == Profession.id).where(
+            Interview.user_id == user()).order_by(Interview.created_at.desc(), Interview.id.desc()).limit(11),
+        'history.index deep page': lambda: select(Interview, Profession.name).join(
+            Profession, Interview.profession_id == Profession.id).where(
+            Interview.user_id == user(), Interview.created_at < datetime.utcnow() - timedelta(days=300)
+        ).order_by(Interview.created_at.desc(), Interview.id.desc()).limit(11),
+        'history.index filtered count': lambda: select(func.count(Interview.id)).where(
+            Interview.user_id == user(), Interview.overall_rating >= 4.0),
+        'catalog.profession_detail recent': lambda: select(Interview).where(
+            Interview.user_id == user(), Interview.profession_id == profession(),
+            Interview.grade == rng.choice(GRADES)).order_by(Interview.created_at.desc()).limit(5),
+        'catalog.profession_detail count': lambda: select(func.count(Interview.id)).where(
+            Interview.user_id == user(), Interview.profession_id == profession(),
+            Interview.grade == rng.choice(GRADES)),
+        'profile.index interview count': lambda: select(func.count(Interview.id)).where(
+            Interview.user_id == user()),
+        'cv.index list': lambda: select(CV).where(CV.user_id == user()).order_by(CV.uploaded_at.desc()),
+        'profile.download_cv lookup': lambda: select(CV).where(
+            CV.file_path == f'/uploads/cvs/{rng.randint(1, args.cvs)}_cv.pdf').limit(1),
+    }
+
+def run_queries(engine, args):
+    """Return the median latency in ms for each route query."""
+    results = {}
+    with Session(engine) as session:
+        for name, build in route_queries(args).items():
+            timings = []
+            for _ in range(args.repeat):
+                statement = build()
+                start = time.perf_counter()
+                session.execute(statement).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--professions', type=int, default=8)
+    parser.add_argument('--questions', type=int, default=50000)
+    parser.add_argument('--interviews', type=int, default=100000)
+    parser.add_argument('--answers', type=int, default=1000000)
+    parser.add_argument('--cvs', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=50, help='Executions per query (median reported)')
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    engine = create_engine(f'sqlite:///{db_path}')
+
+    # Create the schema as the models declare it, then drop the new indexes for the baseline
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for index in INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS {index}'))
+
+    start = time.perf_counter()
+    seed(engine, args)
+    print(f"Seeded {db_path} in {time.perf_counter() - start:.1f}s\n")
+
+    before = run_queries(engine, args)
+
+    with engine.begin() as conn:
+        for table in ('question', 'interview', 'answer', 'cv'):
+            for index in db.metadata.tables[table].indexes:
+                if index.name in INDEXES:
+                    index.create(conn)
+        conn.execute(text('ANALYZE'))
+
+    after = run_queries(engine, args)
+
+    print(f"{'Query':<36} {'Before (ms)':>12} {'After (ms)':>12} {'Speedup':>9}")
+    print('-' * 72)
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<36} {before[name]:>12.3f} {after[name]:>12.3f} {speedup:>8.1f}x")
+
+    if not args.db:
+        os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
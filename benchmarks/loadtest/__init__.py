@@ -0,0 +1,5 @@
+"""
+Load-test suite: a simulated Gemini (fake_gemini), scripted user journeys
+(journeys) and a per-endpoint latency report (report). Run it with
+`python -m benchmarks.loadtest --help` from the repository root.
+"""
@@ -0,0 +1,265 @@
+"""
+End-to-end load test against the app with a simulated Gemini.
+
+For each worker/thread configuration, starts gunicorn on a fresh copy of a
+seeded SQLite database with Gemini replaced by the simulated model in
+fake_gemini (latency distributions, error rate and 429 bursts are set with
+the flags below), runs virtual users through the scripted journey in
+journeys.py for --duration seconds, and reports throughput, p50/p95/p99
+latency and error rates per endpoint, plus how long answer and CV jobs took
+from submission to completion.
+
+The app's own settings (GEMINI_RPM, GEMINI_MAX_CONCURRENCY, JOB_QUEUE_WORKERS,
+INTERVIEW_PIPELINE_MODE, ...) are read from the environment as usual, so
+export them to test a particular deployment. The response cache is off
+unless GEMINI_CACHE_BACKEND is set.
+
+Usage:
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --configs 1x1 1x4 2x4 4x4 --users 20 --duration 120
+    python -m benchmarks.loadtest --latency lognormal:3,0.5 --error-rate 0.02 --burst-every 60 --burst-duration 10
+    python -m benchmarks.loadtest --url http://staging:8000 --users 5 --duration 60
+
+Run from the repository root. With --url no server is started; run the
+target with `gunicorn benchmarks.loadtest.wsgi:app` so it uses the
+simulated model, or point it at a deployment you are willing to bill.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.loadtest.fake_gemini import LatencyDistribution  # noqa: E402
+from benchmarks.loadtest.journeys import Client, Journey, JourneyError  # noqa: E402
+from benchmarks.loadtest.report import Recorder, print_comparison, print_summary  # noqa: E402
+
+
+def parse_config(value):
+    """Parse "WORKERSxTHREADS", e.g. "2x4"."""
+    try:
+        workers, threads = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WORKERSxTHREADS (e.g. 2x4), got {value}")
+    return workers, threads
+
+
+def seed_database(path):
+    """Create the schema and load data/questions.json into a new SQLite database. Returns the profession count."""
+    from app import create_app, db
+    from app.models import Profession, Question
+    from config import Config
+
+    class SeedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        with open(os.path.join(ROOT, 'data', 'questions.json')) as f:
+            questions = json.load(f)
+        professions = {}
+        for name in sorted({q['profession'] for q in questions}):
+            profession = Profession(name=name)
+            db.session.add(profession)
+            db.session.flush()
+            professions[name] = profession.id
+        db.session.add_all(
+            Question(profession_id=professions[q['profession']], grade=q['grade'], question_text=q['question_text'])
+            for q in questions
+        )
+        db.session.commit()
+    return len(professions)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(f"{url}/login", timeout=2).close()
+            return
+        except Exception:
+            time.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+def start_server(workers, threads, directory, template_db, args):
+    """Start gunicorn on a copy of the seeded database. Returns (process, url, log file)."""
+    db_path = os.path.join(directory, f"loadtest_{workers}x{threads}.db")
+    shutil.copyfile(template_db, db_path)
+    port = free_port()
+
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{db_path}",
+        'STORAGE_LOCAL_ROOT': os.path.join(directory, f"uploads_{workers}x{threads}"),
+        'CATALOG_VERSION_FILE': os.path.join(directory, '.catalog_version'),
+        'FAKE_GEMINI_LATENCY': args.latency,
+        'FAKE_GEMINI_AUDIO_LATENCY': args.audio_latency,
+        'FAKE_GEMINI_SCALE': str(args.scale),
+        'FAKE_GEMINI_ERROR_RATE': str(args.error_rate),
+        'FAKE_GEMINI_429_EVERY': str(args.burst_every),
+        'FAKE_GEMINI_429_DURATION': str(args.burst_duration),
+        'FAKE_GEMINI_429_RATE': str(args.burst_rate),
+    })
+    env.setdefault('GEMINI_CACHE_BACKEND', 'none')
+
+    log = open(os.path.join(directory, f"gunicorn_{workers}x{threads}.log"), 'w')
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--bind', f"127.0.0.1:{port}",
+        '--timeout', '300',
+        'benchmarks.loadtest.wsgi:app'
+    ], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(url, process)
+    except Exception:
+        stop_server(process)
+        log.close()
+        raise
+    return process, url, log
+
+
+def stop_server(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def run_load(url, args):
+    """Run --users virtual users against url for --duration seconds. Returns the Recorder."""
+    recorder = Recorder()
+    deadline = time.time() + args.duration
+
+    def user(index):
+        rng = random.Random(args.seed * 1000 + index if args.seed is not None else None)
+        # Stagger the start so users don't all register in the same instant
+        time.sleep(args.ramp * index / max(args.users, 1))
+        while time.time() < deadline:
+            journey = Journey(Client(url, recorder, timeout=args.request_timeout), args, rng)
+            try:
+                journey.run()
+                recorder.journey_done()
+            except JourneyError as e:
+                recorder.journey_done(str(e))
+            except Exception as e:
+                recorder.journey_done(f"{type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=user, args=(i,), name=f"user-{i}", daemon=True) for i in range(args.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # Journeys in flight at the deadline are allowed to finish, within a grace period
+        thread.join(max(deadline + args.grace - time.time(), 0))
+    recorder.stop(abandoned=sum(thread.is_alive() for thread in threads))
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', type=parse_config, nargs='+', default=[(1, 4), (2, 4), (4, 4)],
+                        help='gunicorn WORKERSxTHREADS configurations to test (default: 1x4 2x4 4x4)')
+    parser.add_argument('--url', help='Load an already running server instead of starting gunicorn')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to start new journeys for')
+    parser.add_argument('--ramp', type=float, default=5, help='Seconds over which users start')
+    parser.add_argument('--grace', type=float, default=120, help='Seconds journeys in flight may run past --duration')
+    parser.add_argument('--think', type=float, default=0.0, help='Mean think time in seconds between steps')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='Seconds between CV status polls')
+    parser.add_argument('--job-timeout', type=float, default=180, help='Seconds before a CV job counts as timed out')
+    parser.add_argument('--request-timeout', type=float, default=120, help='Seconds before a request counts as failed')
+    parser.add_argument('--audio-kb', type=int, default=48, help='Size of each uploaded answer recording')
+    parser.add_argument('--professions', type=int, default=None,
+                        help='Number of professions to pick from (default: all seeded ones; needed with --url)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for the journeys')
+    parser.add_argument('--json', dest='json_path', help='Also write the summaries to this file')
+
+    fake = parser.add_argument_group('simulated Gemini (see fake_gemini.py)')
+    fake.add_argument('--latency', default='lognormal:1.5,0.4', help='Text request latency distribution')
+    fake.add_argument('--audio-latency', default='lognormal:2.5,0.4', help='Latency distribution of requests with audio')
+    fake.add_argument('--scale', type=float, default=1.0, help='Multiply every simulated latency')
+    fake.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls failing with a 503')
+    fake.add_argument('--burst-every', type=float, default=0.0, help='Seconds between 429 bursts (0 disables)')
+    fake.add_argument('--burst-duration', type=float, default=5.0, help='Length of each 429 burst in seconds')
+    fake.add_argument('--burst-rate', type=float, default=1.0, help='Fraction of calls rejected during a burst')
+    args = parser.parse_args()
+
+    # Fail on a bad spec here rather than in every worker
+    for spec in (args.latency, args.audio_latency):
+        try:
+            LatencyDistribution(spec)
+        except (ValueError, IndexError) as e:
+            parser.error(f"Invalid latency distribution {spec}: {e}")
+
+    results = []
+    if args.url:
+        args.professions = args.professions or 1
+        print(f"Loading {args.url} with {args.users} users for {args.duration:g}s")
+        recorder = run_load(args.url, args)
+        results.append((args.url, recorder.summary()))
+        print_summary(args.url, results[-1][1])
+    else:
+        os.environ.setdefault('GOOGLE_API_KEY', 'simulated')
+        directory = tempfile.mkdtemp(prefix='loadtest-')
+        template_db = os.path.join(directory, 'template.db')
+        seeded = seed_database(template_db)
+        args.professions = min(args.professions or seeded, seeded)
+        print(f"Simulated Gemini: text {args.latency}, audio {args.audio_latency}, scale {args.scale:g}, "
+              f"error rate {args.error_rate:g}, "
+              f"{f'429 bursts of {args.burst_duration:g}s every {args.burst_every:g}s' if args.burst_every else 'no 429 bursts'}")
+        print(f"{args.users} users for {args.duration:g}s per configuration; logs in {directory}")
+
+        for workers, threads in args.configs:
+            name = f"{workers}x{threads}"
+            print(f"\nStarting gunicorn with {workers} workers x {threads} threads...")
+            try:
+                process, url, log = start_server(workers, threads, directory, template_db, args)
+            except RuntimeError as e:
+                print(f"  {e}; see {directory}")
+                continue
+            try:
+                recorder = run_load(url, args)
+            finally:
+                stop_server(process)
+                log.close()
+            results.append((name, recorder.summary()))
+            print_summary(name, results[-1][1])
+
+    if len(results) > 1:
+        print_comparison(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump([{'config': name, **summary} for name, summary in results], f, indent=2)
+        print(f"\nWrote {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
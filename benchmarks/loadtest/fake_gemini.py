@@ -0,0 +1,200 @@
+"""
+Simulated Gemini model for load tests.
+
+install() replaces genai.GenerativeModel with FakeGenerativeModel in the app
+under test, so every request goes through the real services, rate limiter,
+retries, caches and usage ledger but never leaves the machine. The fake
+answers each kind of prompt the app sends (transcription, fused, markdown
+and structured reviews, CV reviews) with text the app can parse.
+
+Behaviour is read from FAKE_GEMINI_* environment variables, so every
+gunicorn worker is configured the same way:
+
+    FAKE_GEMINI_LATENCY        Latency of text requests (default lognormal:1.5,0.4)
+    FAKE_GEMINI_AUDIO_LATENCY  Latency of requests carrying audio (default lognormal:2.5,0.4)
+    FAKE_GEMINI_SCALE          Multiplier applied to every latency (default 1)
+    FAKE_GEMINI_ERROR_RATE     Fraction of calls failing with a 503 (default 0)
+    FAKE_GEMINI_429_EVERY      Seconds between 429 bursts (default 0, no bursts)
+    FAKE_GEMINI_429_DURATION   Length of each burst in seconds (default 5)
+    FAKE_GEMINI_429_RATE       Fraction of calls rejected during a burst (default 1)
+
+Latencies are given as fixed:S, uniform:LOW,HIGH, normal:MEAN,SD,
+lognormal:MEDIAN,SIGMA or exponential:MEAN, in seconds. Bursts are aligned
+to the wall clock, so all worker processes reject calls in the same windows,
+the way a shared project quota runs out.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+from google.api_core import exceptions as google_exceptions
+
+WORDS = ['REST', 'cache', 'index', 'latency', 'thread', 'queue', 'transaction', 'schema', 'endpoint', 'deploy',
+         'container', 'replica', 'consistency', 'idempotent', 'pagination', 'profiling', 'test', 'rollback']
+
+
+class LatencyDistribution:
+    """A latency distribution parsed from a spec such as "lognormal:1.5,0.4"."""
+
+    KINDS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+    def __init__(self, spec, scale=1.0):
+        kind, _, params = spec.partition(':')
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {spec} (expected one of {', '.join(self.KINDS)})")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',') if p.strip()]
+        self.scale = scale
+        self.spec = spec
+
+    def sample(self, rng):
+        """Draw a latency in seconds (never negative)."""
+        p = self.params
+        if self.kind == 'fixed':
+            value = p[0]
+        elif self.kind == 'uniform':
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == 'normal':
+            value = rng.gauss(p[0], p[1])
+        elif self.kind == 'lognormal':
+            value = rng.lognormvariate(math.log(p[0]), p[1])
+        else:
+            value = rng.expovariate(1 / p[0])
+        return max(value, 0.0) * self.scale
+
+
+class FaultPlan:
+    """Decides which calls fail: a steady error rate plus periodic 429 bursts."""
+
+    def __init__(self, error_rate=0.0, burst_every=0.0, burst_duration=5.0, burst_rate=1.0):
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_duration = burst_duration
+        self.burst_rate = burst_rate
+
+    def in_burst(self, now=None):
+        if not self.burst_every:
+            return False
+        return (now or time.time()) % self.burst_every < self.burst_duration
+
+    def check(self, rng):
+        """Raise the error the real client would raise for this call, if any."""
+        if self.in_burst() and rng.random() < self.burst_rate:
+            remaining = self.burst_duration - time.time() % self.burst_every
+            raise google_exceptions.ResourceExhausted(
+                f"429 Resource has been exhausted (e.g. check quota). retry_delay {{ seconds: {max(int(remaining), 1)} }}"
+            )
+        if self.error_rate and rng.random() < self.error_rate:
+            raise google_exceptions.ServiceUnavailable("503 The service is currently unavailable.")
+
+
+class FakeResponse:
+    """The parts of a GenerateContentResponse the app reads."""
+
+    def __init__(self, text):
+        self.text = text
+        self.prompt_feedback = None
+
+    def __iter__(self):
+        # Streamed responses arrive as a handful of chunks
+        step = max(len(self.text) // 8, 1)
+        for i in range(0, len(self.text), step):
+            yield FakeResponse(self.text[i:i + step])
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel with simulated latency, errors and 429 bursts."""
+
+    # Counters shared by every instance in the process
+    calls = 0
+    failures = 0
+    _counter_lock = threading.Lock()
+
+    def __init__(self, model_name='gemini-1.5-flash-latest', **kwargs):
+        self.model_name = model_name
+        self.config = load_config()
+        self._rng = random.Random()
+
+    def _plan_call(self, contents):
+        """Count the call, pick its latency and raise its injected error, if any."""
+        has_audio = isinstance(contents, (list, tuple)) and any(isinstance(part, dict) for part in contents)
+        latency = (self.config['audio_latency'] if has_audio else self.config['latency']).sample(self._rng)
+        with self._counter_lock:
+            FakeGenerativeModel.calls += 1
+        try:
+            self.config['faults'].check(self._rng)
+        except Exception:
+            with self._counter_lock:
+                FakeGenerativeModel.failures += 1
+            # Rejections come back quickly, as they do from the real API
+            time.sleep(min(latency, 0.05))
+            raise
+        return latency
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        time.sleep(self._plan_call(contents))
+        return FakeResponse(self._answer(contents))
+
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        await asyncio.sleep(self._plan_call(contents))
+        return FakeResponse(self._answer(contents))
+
+    def _answer(self, contents):
+        """Reply to the kind of prompt the app sent, in the format it parses."""
+        if isinstance(contents, (list, tuple)):
+            prompt = next((part for part in contents if isinstance(part, str)), '')
+            has_audio = any(isinstance(part, dict) for part in contents)
+        else:
+            prompt, has_audio = str(contents), False
+
+        score = round(self._rng.uniform(2.0, 5.0), 1)
+        transcript = "My answer covers " + ", ".join(self._rng.sample(WORDS, 6)) + "."
+        feedback = (
+            f"**Overall Assessment:** A reasonable answer.\n"
+            f"**Strengths:**\n- Mentions {self._rng.choice(WORDS)}.\n"
+            f"**Areas for Improvement:**\n- Could go deeper on {self._rng.choice(WORDS)}.\n"
+            f"**Technical Score (Estimate):** {score}"
+        )
+
+        if has_audio and '"transcript"' in prompt:
+            return json.dumps({'transcript': transcript, 'feedback': feedback, 'score': score})
+        if has_audio:
+            return transcript
+        if 'JSON object' in prompt and '"score"' in prompt:
+            return json.dumps({
+                'overall': 'A reasonable answer.',
+                'strengths': [f"Mentions {self._rng.choice(WORDS)}."],
+                'improvements': [f"Could go deeper on {self._rng.choice(WORDS)}."],
+                'score': score,
+            })
+        if 'CV' in prompt:
+            return ("**Overall Impression:** A solid CV.\n**Strengths:**\n- Clear experience section.\n"
+                    "**Areas for Improvement:**\n- Quantify achievements.")
+        return feedback
+
+
+def load_config():
+    """Read the FAKE_GEMINI_* settings."""
+    scale = float(os.environ.get('FAKE_GEMINI_SCALE') or 1.0)
+    return {
+        'latency': LatencyDistribution(os.environ.get('FAKE_GEMINI_LATENCY') or 'lognormal:1.5,0.4', scale),
+        'audio_latency': LatencyDistribution(os.environ.get('FAKE_GEMINI_AUDIO_LATENCY') or 'lognormal:2.5,0.4', scale),
+        'faults': FaultPlan(
+            error_rate=float(os.environ.get('FAKE_GEMINI_ERROR_RATE') or 0.0),
+            burst_every=float(os.environ.get('FAKE_GEMINI_429_EVERY') or 0.0),
+            burst_duration=float(os.environ.get('FAKE_GEMINI_429_DURATION') or 5.0),
+            burst_rate=float(os.environ.get('FAKE_GEMINI_429_RATE') or 1.0),
+        ),
+    }
+
+
+def install():
+    """Make every model the app creates a FakeGenerativeModel. Call before create_app()."""
+    import google.generativeai as genai
+
+    load_config()  # Fail fast on a bad spec rather than on the first request
+    os.environ.setdefault('GOOGLE_API_KEY', 'simulated')
+    genai.GenerativeModel = FakeGenerativeModel
@@ -0,0 +1,296 @@
+"""
+Scripted user journeys driven over HTTP.
+
+Each virtual user registers, logs in, browses the catalog, starts an
+interview, submits an answer to every question through the streaming
+endpoint the question pages use (reading each answer's events until it
+finishes), views the history, uploads a CV and waits for its review, then
+logs out. Every HTTP request and every background job is
+recorded under a route-style label such as "POST /interview/submit_answer/<id>".
+"""
+import http.cookiejar
+import json
+import os
+import random
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+ANSWER_RE = re.compile(r'/interview/question/(\d+)')
+GRADES = ['Junior', 'Middle', 'Senior']
+
+
+class JourneyError(Exception):
+    """Raised when a step gets a response the journey can't continue from."""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirects are followed by the client itself so each hop is timed on its own
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Client:
+    """A cookie-keeping HTTP client that records every request's latency and status."""
+
+    def __init__(self, base_url, recorder, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect()
+        )
+
+    def request(self, label, path, data=None, headers=None, method=None, ok=(200, 302), redirect_to=None):
+        """
+        Send a request and record it under label.
+
+        A status outside ok is an error, as is a redirect whose Location
+        doesn't contain redirect_to (forms redirect back to themselves when
+        they reject a submission).
+
+        Returns:
+            A (status, headers, body) tuple
+
+        Raises:
+            JourneyError: If the status isn't in ok or the request failed
+        """
+        url = path if path.startswith('http') else self.base_url + path
+        req = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                status, response_headers, body = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status, response_headers, body = e.code, e.headers, e.read()
+        except Exception as e:
+            self.recorder.record(label, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+            raise JourneyError(f"{label}: {e}")
+        elapsed = time.perf_counter() - start
+
+        error = None if status in ok else f"HTTP {status}"
+        location = response_headers.get('Location') or ''
+        if error is None and redirect_to and redirect_to not in location:
+            error = f"redirected to {urllib.parse.urlsplit(location).path or '(nowhere)'}"
+        self.recorder.record(label, status, elapsed, error)
+        if error:
+            raise JourneyError(f"{label}: {error}")
+        return status, response_headers, body.decode('utf-8', errors='replace')
+
+    def get(self, label, path, **kwargs):
+        return self.request(label, path, **kwargs)
+
+    def post_form(self, label, path, fields, **kwargs):
+        data = urllib.parse.urlencode(fields).encode()
+        return self.request(label, path, data, {'Content-Type': 'application/x-www-form-urlencoded'}, 'POST', **kwargs)
+
+    def post_file(self, label, path, field, filename, content, content_type, **kwargs):
+        data, headers = multipart_body(field, filename, content, content_type)
+        return self.request(label, path, data, headers, 'POST', **kwargs)
+
+    def post_file_events(self, label, path, field, filename, content, content_type):
+        """
+        POST a file to a Server-Sent Events endpoint and read events until the stream ends.
+
+        The request is recorded under label with the time until the stream
+        closed. A JSON error response (e.g. a full queue) is an error.
+
+        Returns:
+            A list of (seconds since the request was sent, event, data) tuples
+
+        Raises:
+            JourneyError: If the response isn't a 200 event stream or the connection failed
+        """
+        data, headers = multipart_body(field, filename, content, content_type)
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method='POST')
+        start = time.perf_counter()
+        events = []
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                status = response.status
+                if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                    raise JourneyError(f"{label}: expected an event stream, got {response.read()[:200]!r}")
+                event = None
+                for line in response:
+                    line = line.decode('utf-8', errors='replace').rstrip('\r\n')
+                    if line.startswith('event: '):
+                        event = line[len('event: '):]
+                    elif line.startswith('data: ') and event:
+                        events.append((time.perf_counter() - start, event, json.loads(line[len('data: '):])))
+                        event = None
+        except urllib.error.HTTPError as e:
+            self.recorder.record(label, e.code, time.perf_counter() - start, f"HTTP {e.code}")
+            raise JourneyError(f"{label}: HTTP {e.code}")
+        except JourneyError:
+            self.recorder.record(label, status, time.perf_counter() - start, 'not an event stream')
+            raise
+        except Exception as e:
+            self.recorder.record(label, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+            raise JourneyError(f"{label}: {e}")
+
+        self.recorder.record(label, status, time.perf_counter() - start)
+        return events
+
+    def follow(self, label, headers):
+        """GET the Location of a redirect response."""
+        location = headers.get('Location')
+        if not location:
+            raise JourneyError(f"{label}: expected a redirect")
+        return location, self.get(label, location)
+
+
+def multipart_body(field, filename, content, content_type):
+    """Encode a single-file multipart/form-data body. Returns (data, headers)."""
+    boundary = uuid.uuid4().hex
+    data = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return data, {'Content-Type': f"multipart/form-data; boundary={boundary}"}
+
+
+def csrf_token(body):
+    match = CSRF_RE.search(body)
+    if not match:
+        raise JourneyError("No CSRF token in form")
+    return match.group(1)
+
+
+def make_pdf(lines):
+    """Build a minimal one-page PDF with the given text lines, which PyPDF2 can extract."""
+    text = " T* ".join(f"({line.replace('(', '').replace(')', '')}) Tj" for line in lines)
+    stream = f"BT /F1 11 Tf 14 TL 72 760 Td {text} ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+
+class Journey:
+    """One virtual user's scripted visit. Options come from the load test's command line."""
+
+    def __init__(self, client, options, rng=None):
+        self.client = client
+        self.options = options
+        self.rng = rng or random.Random()
+
+    def think(self):
+        if self.options.think:
+            time.sleep(self.rng.uniform(0, 2 * self.options.think))
+
+    def wait_for_job(self, job_label, status_label, path, done, started):
+        """
+        Poll a JSON status endpoint until done(data) is true.
+
+        The time from started (the submission) to completion is recorded under
+        job_label by the caller; a job that runs past --job-timeout is recorded
+        here as a timeout.
+        """
+        deadline = started + self.options.job_timeout
+        while time.time() < deadline:
+            _, _, body = self.client.get(status_label, path)
+            data = json.loads(body)
+            if done(data):
+                return data
+            time.sleep(self.options.poll_interval)
+        self.client.recorder.record(job_label, None, time.time() - started, 'timeout')
+        raise JourneyError(f"{job_label}: timed out")
+
+    def run(self):
+        client = self.client
+
+        # Register and log in
+        email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        password = 'load-test-password'
+        _, _, body = client.get('GET /register', '/register')
+        client.post_form('POST /register', '/register', {
+            'csrf_token': csrf_token(body), 'full_name': 'Load Test User', 'email': email,
+            'password': password, 'confirm_password': password
+        }, ok=(302,), redirect_to='/login')
+        _, _, body = client.get('GET /login', '/login')
+        client.post_form('POST /login', '/login', {
+            'csrf_token': csrf_token(body), 'email': email, 'password': password
+        }, ok=(302,), redirect_to='/')
+        self.think()
+
+        # Browse the catalog
+        grade = self.rng.choice(GRADES)
+        profession_id = self.rng.randint(1, self.options.professions)
+        client.get('GET /catalog', '/catalog')
+        client.get('GET /catalog/filter', f"/catalog/filter?grade={grade}")
+        client.get('GET /catalog/profession/<id>/grade/<grade>', f"/catalog/profession/{profession_id}/grade/{grade}")
+        self.think()
+
+        # Start an interview and answer every question
+        _, headers, _ = client.get('GET /interview/start/<id>/<grade>', f"/interview/start/{profession_id}/{grade}",
+                                   ok=(302,), redirect_to='/interview/process/')
+        location, (_, _, body) = client.follow('GET /interview/process/<id>', headers)
+        interview_id = int(location.rstrip('/').rsplit('/', 1)[-1])
+        answer_ids = list(dict.fromkeys(int(a) for a in ANSWER_RE.findall(body)))
+        if not answer_ids:
+            raise JourneyError("Interview has no questions")
+
+        for answer_id in answer_ids:
+            client.get('GET /interview/question/<id>', f"/interview/question/{answer_id}")
+            self.think()
+            audio = os.urandom(self.options.audio_kb * 1024)
+            # Submit like the question pages do, reading the job's progress as it is relayed
+            events = client.post_file_events('POST /interview/submit_answer/<id>/stream',
+                                             f"/interview/submit_answer/{answer_id}/stream",
+                                             'audio', 'recording.webm', audio, 'audio/webm')
+            first_feedback = next((seconds for seconds, event, _ in events if event == 'feedback'), None)
+            if first_feedback is not None:
+                client.recorder.record('STREAM first feedback', 200, first_feedback)
+
+            seconds, event, data = events[-1] if events else (0.0, None, {})
+            if event == 'complete':
+                # Gemini failures leave an "Error: ..." review on an otherwise completed job
+                error = 'review failed' if (data.get('feedback') or '').startswith('Error') else None
+            else:
+                error = data.get('error') or 'stream ended early'
+            client.recorder.record('JOB process_answer', 200, seconds, error)
+            client.get('GET /interview/process/<id>', f"/interview/process/{interview_id}")
+
+        client.get('GET /interview/complete/<id>', f"/interview/complete/{interview_id}")
+        self.think()
+
+        # Review the history
+        client.get('GET /history', '/history')
+        client.get('GET /history/detail/<id>', f"/history/detail/{interview_id}")
+        self.think()
+
+        # Upload a CV and wait for its review
+        client.get('GET /cvs/upload', '/cvs/upload')
+        pdf = make_pdf(["Load Test User", "Experience", f"Worked with {', '.join(self.rng.sample(GRADES, 2))} teams",
+                        "Skills: Python, SQL, Docker", f"Reference {uuid.uuid4().hex}"])
+        started = time.time()
+        _, headers, _ = client.post_file('POST /cvs/upload', '/cvs/upload', 'cv_file', 'cv.pdf', pdf,
+                                         'application/pdf', ok=(302,), redirect_to='/cvs/view/')
+        location, _ = client.follow('GET /cvs/view/<id>', headers)
+        cv_id = int(location.rstrip('/').rsplit('/', 1)[-1])
+        data = self.wait_for_job('JOB process_cv', 'GET /cvs/status/<id>', f"/cvs/status/{cv_id}",
+                                 lambda d: d.get('review_status') not in ('pending', 'processing'), started)
+        client.recorder.record('JOB process_cv', 200, time.time() - started,
+                               None if data.get('review_status') == 'completed' else data.get('review_status'))
+
+        client.get('GET /logout', '/logout', ok=(302,))
@@ -0,0 +1,143 @@
+"""Collects request samples during a run and summarises them per endpoint."""
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile (q in 0-100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Thread-safe store of (label, status, seconds, error) samples."""
+
+    def __init__(self):
+        self.samples = []
+        self.journeys = 0
+        self.failed_journeys = Counter()
+        self.abandoned_journeys = 0
+        self.started = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, label, status, seconds, error=None):
+        with self._lock:
+            # Users still running after the run ends would otherwise record the server shutting down
+            if self.finished is None:
+                self.samples.append((label, status, seconds, error))
+
+    def journey_done(self, error=None):
+        with self._lock:
+            if self.finished is not None:
+                return
+            if error is None:
+                self.journeys += 1
+            else:
+                self.failed_journeys[error] += 1
+
+    def stop(self, abandoned=0):
+        """End the run; abandoned is the number of journeys still in flight."""
+        with self._lock:
+            self.finished = time.time()
+            self.abandoned_journeys = abandoned
+
+    def summary(self):
+        """
+        Per-label statistics for the run.
+
+        Returns:
+            A dict with the run's duration, completed and failed journeys, and
+            'endpoints': a list of dicts with count, throughput, p50/p95/p99 and
+            maximum latency in milliseconds, error count, error rate and the
+            most common errors. Labels starting with "JOB " measure the time
+            from submission to completion of a background job.
+        """
+        duration = (self.finished or time.time()) - self.started
+        by_label = defaultdict(list)
+        errors = defaultdict(Counter)
+        all_timings = []
+        with self._lock:
+            for label, status, seconds, error in self.samples:
+                by_label[label].append(seconds)
+                if not label.startswith('JOB '):
+                    all_timings.append(seconds)
+                if error:
+                    errors[label][error] += 1
+        all_timings.sort()
+
+        endpoints = []
+        for label, timings in by_label.items():
+            timings.sort()
+            error_count = sum(errors[label].values())
+            endpoints.append({
+                'endpoint': label,
+                'count': len(timings),
+                'throughput': len(timings) / duration if duration else 0.0,
+                'p50_ms': percentile(timings, 50) * 1000,
+                'p95_ms': percentile(timings, 95) * 1000,
+                'p99_ms': percentile(timings, 99) * 1000,
+                'max_ms': timings[-1] * 1000,
+                'errors': error_count,
+                'error_rate': error_count / len(timings),
+                'top_errors': errors[label].most_common(3),
+            })
+        # HTTP endpoints first, then background jobs
+        endpoints.sort(key=lambda e: (e['endpoint'].startswith('JOB '), e['endpoint'].split(' ', 1)[-1], e['endpoint']))
+
+        requests = [e for e in endpoints if not e['endpoint'].startswith('JOB ')]
+        total = len(all_timings)
+        total_errors = sum(e['errors'] for e in requests)
+        return {
+            'duration_s': duration,
+            'journeys': self.journeys,
+            'failed_journeys': dict(self.failed_journeys),
+            'abandoned_journeys': self.abandoned_journeys,
+            'requests': total,
+            'throughput': total / duration if duration else 0.0,
+            'p50_ms': percentile(all_timings, 50) * 1000,
+            'p95_ms': percentile(all_timings, 95) * 1000,
+            'p99_ms': percentile(all_timings, 99) * 1000,
+            'error_rate': total_errors / total if total else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+def print_summary(name, summary):
+    """Print one configuration's per-endpoint table and its error breakdown."""
+    print(f"\n== {name}: {summary['requests']} requests in {summary['duration_s']:.1f}s, "
+          f"{summary['throughput']:.1f} req/s, {summary['journeys']} journeys completed, "
+          f"{sum(summary['failed_journeys'].values())} failed, {summary['abandoned_journeys']} cut off at the end")
+    print(f"{'Endpoint':<46} {'Count':>6} {'Req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Max ms':>8} {'Errors':>7}")
+    print('-' * 104)
+    for e in summary['endpoints']:
+        print(f"{e['endpoint'][:46]:<46} {e['count']:>6} {e['throughput']:>7.2f} {e['p50_ms']:>8.0f} {e['p95_ms']:>8.0f} "
+              f"{e['p99_ms']:>8.0f} {e['max_ms']:>8.0f} {e['error_rate']:>6.1%}")
+    print('-' * 104)
+    print(f"{'All HTTP requests':<46} {summary['requests']:>6} {summary['throughput']:>7.2f} {summary['p50_ms']:>8.0f} "
+          f"{summary['p95_ms']:>8.0f} {summary['p99_ms']:>8.0f} {'':>8} {summary['error_rate']:>6.1%}")
+
+    failing = [e for e in summary['endpoints'] if e['errors']]
+    if failing or summary['failed_journeys']:
+        print("\nErrors:")
+        for e in failing:
+            details = "; ".join(f"{error[:60]} x{count}" for error, count in e['top_errors'])
+            print(f"  {e['endpoint']}: {details}")
+        for error, count in sorted(summary['failed_journeys'].items(), key=lambda item: -item[1])[:5]:
+            print(f"  journey aborted: {error[:80]} x{count}")
+
+
+def print_comparison(results):
+    """Print one line per configuration so capacity can be compared at a glance."""
+    print(f"\n{'Config':<16} {'Req/s':>7} {'Journeys':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7} "
+          f"{'Answer job p95 s':>17}")
+    print('-' * 86)
+    for name, summary in results:
+        job = next((e for e in summary['endpoints'] if e['endpoint'] == 'JOB process_answer'), None)
+        job_p95 = f"{job['p95_ms'] / 1000:.1f}" if job else '-'
+        print(f"{name:<16} {summary['throughput']:>7.1f} {summary['journeys']:>9} {summary['p50_ms']:>8.0f} "
+              f"{summary['p95_ms']:>8.0f} {summary['p99_ms']:>8.0f} {summary['error_rate']:>6.1%} {job_p95:>17}")
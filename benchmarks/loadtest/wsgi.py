@@ -0,0 +1,14 @@
+"""
+WSGI entry point for load tests: the app with Gemini replaced by the simulated model.
+
+    gunicorn -w 2 --threads 4 benchmarks.loadtest.wsgi:app
+
+Run from the repository root; the load test starts it the same way.
+"""
+from benchmarks.loadtest import fake_gemini
+
+fake_gemini.install()
+
+from app import create_app  # noqa: E402
+
+app = create_app()
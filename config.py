@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 
 basedir = os.path.abspath(os.path.dirname(__file__))
+instancedir = os.path.join(basedir, 'instance')  # The app's instance_path: files written at runtime, kept out of the source tree
 load_dotenv(os.path.join(basedir, '.env'))
 
 class Config:
@@ -17,9 +18,120 @@ class Config:
     AUDIO_FOLDER = os.path.join(UPLOAD_FOLDER, 'audio')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
     
+    # Per-type upload limits, enforced while streaming the upload to disk
+    AUDIO_MAX_BYTES = 10 * 1024 * 1024  # 10MB
+    CV_MAX_BYTES = 10 * 1024 * 1024  # 10MB
+    IMAGE_MAX_BYTES = 5 * 1024 * 1024  # 5MB
+    UPLOAD_CHUNK_SIZE = 64 * 1024  # 64KB
+    
+    # Upload storage: 'local' (sharded directories under STORAGE_LOCAL_ROOT) or 's3' (any S3-compatible service)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'local'
+    STORAGE_LOCAL_ROOT = os.environ.get('STORAGE_LOCAL_ROOT')  # Defaults to UPLOAD_FOLDER
+    STORAGE_SHARD_DEPTH = int(os.environ.get('STORAGE_SHARD_DEPTH') or 2)  # Directory levels of 256 shards each
+    STORAGE_CHUNK_SIZE = int(os.environ.get('STORAGE_CHUNK_SIZE') or 1024 * 1024)  # Bytes per streamed read
+    STORAGE_S3_BUCKET = os.environ.get('STORAGE_S3_BUCKET')
+    STORAGE_S3_PREFIX = os.environ.get('STORAGE_S3_PREFIX') or ''
+    STORAGE_S3_ENDPOINT_URL = os.environ.get('STORAGE_S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    STORAGE_S3_REGION = os.environ.get('STORAGE_S3_REGION')
+    
     # Default profile picture
     DEFAULT_PROFILE_PIC = 'default.jpg'
     
     # Google Gemini API settings
     GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
-    GEMINI_MODEL = 'gemini-1.5-flash-latest'
\ No newline at end of file
+    GEMINI_MODEL = os.environ.get('GEMINI_MODEL') or 'gemini-1.5-flash-latest'  # Used for reviews and transcription
+    # 'two_call' transcribes then reviews; 'fused' sends the audio with the review prompt in one request
+    INTERVIEW_PIPELINE_MODE = os.environ.get('INTERVIEW_PIPELINE_MODE') or 'two_call'
+    # 'markdown' asks for a free-form review; 'structured' asks for compact JSON stored in dedicated answer columns
+    REVIEW_OUTPUT_MODE = os.environ.get('REVIEW_OUTPUT_MODE') or 'markdown'
+    REVIEW_STRUCTURED_MAX_TOKENS = int(os.environ.get('REVIEW_STRUCTURED_MAX_TOKENS') or 512)
+    
+    # Optional ffmpeg pass before audio is sent to Gemini: trim silence, downmix to mono and re-encode compactly
+    AUDIO_PREPROCESS_ENABLED = os.environ.get('AUDIO_PREPROCESS_ENABLED', 'false').lower() == 'true'
+    AUDIO_FFMPEG_PATH = os.environ.get('AUDIO_FFMPEG_PATH') or 'ffmpeg'
+    AUDIO_PREPROCESS_FORMAT = os.environ.get('AUDIO_PREPROCESS_FORMAT') or 'ogg'  # 'ogg' (Opus), 'mp3' or 'flac'
+    AUDIO_PREPROCESS_BITRATE = os.environ.get('AUDIO_PREPROCESS_BITRATE') or '24k'
+    AUDIO_PREPROCESS_SAMPLE_RATE = int(os.environ.get('AUDIO_PREPROCESS_SAMPLE_RATE') or 16000)  # Hz
+    AUDIO_PREPROCESS_SILENCE_DB = float(os.environ.get('AUDIO_PREPROCESS_SILENCE_DB') or -50)
+    AUDIO_PREPROCESS_TIMEOUT = float(os.environ.get('AUDIO_PREPROCESS_TIMEOUT') or 30)  # seconds
+    
+    # Interview question selection
+    QUESTIONS_PER_INTERVIEW = 5
+    QUESTION_RECENT_INTERVIEWS = 3  # Questions from this many recent interviews count as "recently answered"
+    QUESTION_RECENT_WEIGHT = 0.1  # Relative chance of re-asking a recently answered question
+    
+    # Catalog question counts are cached in-process; touching the version file invalidates every process
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL') or 300)  # seconds
+    CATALOG_VERSION_FILE = os.environ.get('CATALOG_VERSION_FILE') or os.path.join(instancedir, '.catalog_version')
+    
+    # History pages are cursor-paginated; totals for rating-filtered views are cached in-process
+    HISTORY_PER_PAGE = int(os.environ.get('HISTORY_PER_PAGE') or 10)
+    HISTORY_COUNT_CACHE_TTL = int(os.environ.get('HISTORY_COUNT_CACHE_TTL') or 60)  # seconds
+    
+    # Gemini rate limiting, shared by every call in a process (0 disables a budget). The limits are per process,
+    # so the real cap is multiplied by the number of gunicorn workers and job worker processes
+    GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY') or 4)
+    GEMINI_RPM = int(os.environ.get('GEMINI_RPM') or 60)
+    GEMINI_TPM = int(os.environ.get('GEMINI_TPM') or 1000000)
+    GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES') or 3)
+    GEMINI_BACKOFF_BASE = float(os.environ.get('GEMINI_BACKOFF_BASE') or 1.0)  # seconds
+    GEMINI_BACKOFF_MAX = float(os.environ.get('GEMINI_BACKOFF_MAX') or 30.0)  # seconds
+    GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT') or 60.0)  # seconds per call attempt, sync or async
+    
+    # Gemini response cache settings
+    GEMINI_CACHE_BACKEND = os.environ.get('GEMINI_CACHE_BACKEND') or 'memory'  # 'memory', 'sqlite' or 'none'
+    GEMINI_CACHE_TTL = int(os.environ.get('GEMINI_CACHE_TTL') or 24 * 60 * 60)  # seconds
+    GEMINI_CACHE_MAX_ENTRIES = int(os.environ.get('GEMINI_CACHE_MAX_ENTRIES') or 1000)
+    GEMINI_CACHE_PATH = os.environ.get('GEMINI_CACHE_PATH') or os.path.join(instancedir, 'gemini_cache.db')
+    
+    # Usage ledger: every Gemini call is recorded in gemini_usage, written in batches
+    USAGE_LEDGER_ENABLED = os.environ.get('USAGE_LEDGER_ENABLED', 'true').lower() == 'true'
+    USAGE_LEDGER_BATCH_SIZE = int(os.environ.get('USAGE_LEDGER_BATCH_SIZE') or 20)
+    USAGE_LEDGER_FLUSH_SECONDS = float(os.environ.get('USAGE_LEDGER_FLUSH_SECONDS') or 5.0)
+    # USD per million tokens, for the cost estimates in usage reports
+    GEMINI_PRICE_INPUT_PER_1M = float(os.environ.get('GEMINI_PRICE_INPUT_PER_1M') or 0.075)
+    GEMINI_PRICE_AUDIO_PER_1M = float(os.environ.get('GEMINI_PRICE_AUDIO_PER_1M') or 0.075)
+    GEMINI_PRICE_OUTPUT_PER_1M = float(os.environ.get('GEMINI_PRICE_OUTPUT_PER_1M') or 0.30)
+    # Prometheus metrics at /metrics (needs prometheus_client); set PROMETHEUS_MULTIPROC_DIR under gunicorn
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # If set, scrapes must send "Authorization: Bearer <token>"
+    # Request tracing: a request is traced when sampled, when it sends TRACE_HEADER: 1, or with a sampled traceparent
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE') or 0.0)  # Fraction of requests traced (0-1)
+    TRACE_HEADER = os.environ.get('TRACE_HEADER') or 'X-Trace'
+    TRACE_EXPORT_FILE = os.environ.get('TRACE_EXPORT_FILE')  # OTLP/JSON lines, e.g. for the collector's otlpjsonfile receiver
+    TRACE_EXPORT_URL = os.environ.get('TRACE_EXPORT_URL')  # OTLP/HTTP JSON endpoint, e.g. http://localhost:4318/v1/traces
+    # Every request is recorded while this is set, and traces slower than it are dumped to TRACE_SLOW_DIR (0 disables)
+    TRACE_SLOW_SECONDS = float(os.environ.get('TRACE_SLOW_SECONDS') or 10.0)
+    TRACE_SLOW_DIR = os.environ.get('TRACE_SLOW_DIR') or os.path.join(instancedir, 'slow_traces')
+    TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS') or 2000)  # Per trace; further spans are counted as dropped
+    # Comma-separated emails of users allowed to see the /admin endpoints
+    ADMIN_EMAILS = [email.strip().lower() for email in (os.environ.get('ADMIN_EMAILS') or '').split(',') if email.strip()]
+    
+    # CV text extraction: PDFs with at least this many pages are split across a process pool
+    CV_PARALLEL_PAGE_THRESHOLD = int(os.environ.get('CV_PARALLEL_PAGE_THRESHOLD') or 8)
+    CV_EXTRACTION_WORKERS = int(os.environ.get('CV_EXTRACTION_WORKERS') or 4)
+    
+    # CVs longer than this (estimated tokens) are reviewed section by section, then merged (0 disables)
+    CV_CHUNK_THRESHOLD_TOKENS = int(os.environ.get('CV_CHUNK_THRESHOLD_TOKENS') or 8000)
+    CV_CHUNK_TARGET_TOKENS = int(os.environ.get('CV_CHUNK_TARGET_TOKENS') or 3000)  # Per-section size
+    CV_CHUNK_NOTES_MAX_TOKENS = int(os.environ.get('CV_CHUNK_NOTES_MAX_TOKENS') or 512)  # Output budget per section
+    CV_CHUNK_CONCURRENCY = int(os.environ.get('CV_CHUNK_CONCURRENCY') or 4)
+    
+    # Where `flask answers rescore` records its progress so an interrupted run can resume
+    RESCORE_CHECKPOINT_FILE = os.environ.get('RESCORE_CHECKPOINT_FILE') or os.path.join(instancedir, '.rescore_checkpoint.json')
+    
+    # Reuse stored transcripts for byte-identical audio recordings
+    TRANSCRIPT_CACHE_ENABLED = os.environ.get('TRANSCRIPT_CACHE_ENABLED', 'true').lower() == 'true'
+    
+    # Background job queue settings
+    JOB_QUEUE_BACKEND = os.environ.get('JOB_QUEUE_BACKEND') or 'thread'  # 'thread' or 'database'
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS') or 4)
+    JOB_QUEUE_MAX_DEPTH = int(os.environ.get('JOB_QUEUE_MAX_DEPTH') or 100)
+    JOB_QUEUE_POLL_INTERVAL = float(os.environ.get('JOB_QUEUE_POLL_INTERVAL') or 1.0)  # seconds
+    # Jobs running longer than this are assumed to belong to a dead worker and are marked as failed
+    JOB_QUEUE_STALE_SECONDS = int(os.environ.get('JOB_QUEUE_STALE_SECONDS') or 900)
+    # Start database-backend pollers inside the web process (disable when running `flask jobs work`)
+    JOB_QUEUE_START_WORKERS = os.environ.get('JOB_QUEUE_START_WORKERS', 'true').lower() == 'true'
+    # How often the streaming answer endpoint checks its job for new progress
+    JOB_STREAM_POLL_INTERVAL = float(os.environ.get('JOB_STREAM_POLL_INTERVAL') or 0.25)  # seconds
@@ -0,0 +1,23 @@
+"""
+gunicorn settings picked up automatically when gunicorn is started from the repository root, e.g.
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/ai-interview-metrics METRICS_ENABLED=true gunicorn -w 4 run:app
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    """Clear samples left in the metrics directory by a previous run."""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (e.g. requests in progress) from the aggregated metrics."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
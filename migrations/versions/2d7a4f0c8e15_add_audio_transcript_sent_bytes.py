@@ -0,0 +1,26 @@
+"""Add sent_bytes to audio_transcript
+
+Revision ID: 2d7a4f0c8e15
+Revises: b5f1d8e3a6c0
+Create Date: 2026-10-18 19:12:47.503126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d7a4f0c8e15'
+down_revision = 'b5f1d8e3a6c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audio_transcript', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sent_bytes', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('audio_transcript', schema=None) as batch_op:
+        batch_op.drop_column('sent_bytes')
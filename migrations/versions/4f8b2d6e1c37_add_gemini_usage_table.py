@@ -0,0 +1,47 @@
+"""Add gemini_usage ledger table
+
+Revision ID: 4f8b2d6e1c37
+Revises: 9e4c1a7b3f62
+Create Date: 2026-10-18 20:31:05.118294
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8b2d6e1c37'
+down_revision = '9e4c1a7b3f62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('gemini_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('call_type', sa.String(length=30), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('input_tokens', sa.Integer(), nullable=False),
+    sa.Column('output_tokens', sa.Integer(), nullable=False),
+    sa.Column('audio_tokens', sa.Integer(), nullable=False),
+    sa.Column('estimated', sa.Boolean(), nullable=False),
+    sa.Column('latency_ms', sa.Integer(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=False),
+    sa.Column('cache_hit', sa.Boolean(), nullable=False),
+    sa.Column('success', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('gemini_usage', schema=None) as batch_op:
+        batch_op.create_index('ix_gemini_usage_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_gemini_usage_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('gemini_usage', schema=None) as batch_op:
+        batch_op.drop_index('ix_gemini_usage_user_id_created_at')
+        batch_op.drop_index('ix_gemini_usage_created_at')
+
+    op.drop_table('gemini_usage')
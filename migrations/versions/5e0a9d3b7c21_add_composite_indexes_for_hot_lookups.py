@@ -0,0 +1,52 @@
+"""Add composite indexes for hot lookup columns
+
+Revision ID: 5e0a9d3b7c21
+Revises: c27d5f90ab13
+Create Date: 2026-10-18 14:21:44.908351
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0a9d3b7c21'
+down_revision = 'c27d5f90ab13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # catalog counts and interview question selection
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.create_index('ix_question_profession_id_grade', ['profession_id', 'grade'], unique=False)
+
+    # history listing, profile counts and catalog profession detail
+    with op.batch_alter_table('interview', schema=None) as batch_op:
+        batch_op.create_index('ix_interview_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_interview_user_id_profession_id_grade', ['user_id', 'profession_id', 'grade'], unique=False)
+
+    # interview questions/details and completion checks
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.create_index('ix_answer_interview_id', ['interview_id'], unique=False)
+
+    # CV listing and profile CV download
+    with op.batch_alter_table('cv', schema=None) as batch_op:
+        batch_op.create_index('ix_cv_user_id_uploaded_at', ['user_id', 'uploaded_at'], unique=False)
+        batch_op.create_index('ix_cv_file_path', ['file_path'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cv', schema=None) as batch_op:
+        batch_op.drop_index('ix_cv_file_path')
+        batch_op.drop_index('ix_cv_user_id_uploaded_at')
+
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_index('ix_answer_interview_id')
+
+    with op.batch_alter_table('interview', schema=None) as batch_op:
+        batch_op.drop_index('ix_interview_user_id_profession_id_grade')
+        batch_op.drop_index('ix_interview_user_id_created_at')
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_profession_id_grade')
@@ -0,0 +1,29 @@
+"""Extend the interview history index with id for keyset pagination
+
+Revision ID: 7c3e9a15d2f8
+Revises: e6b2c4f81a93
+Create Date: 2026-10-18 17:58:12.430671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e9a15d2f8'
+down_revision = 'e6b2c4f81a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # history pages seek and order on (created_at, id) within a user
+    with op.batch_alter_table('interview', schema=None) as batch_op:
+        batch_op.create_index('ix_interview_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+        batch_op.drop_index('ix_interview_user_id_created_at')
+
+
+def downgrade():
+    with op.batch_alter_table('interview', schema=None) as batch_op:
+        batch_op.create_index('ix_interview_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.drop_index('ix_interview_user_id_created_at_id')
@@ -0,0 +1,33 @@
+"""Add audio_transcript table for transcript deduplication
+
+Revision ID: 8b41e6c2d9a7
+Revises: 3f9c2a7d1e04
+Create Date: 2026-10-18 11:40:07.215840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41e6c2d9a7'
+down_revision = '3f9c2a7d1e04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audio_transcript',
+    sa.Column('audio_hash', sa.String(length=64), nullable=False),
+    sa.Column('transcript', sa.Text(), nullable=False),
+    sa.Column('mime_type', sa.String(length=50), nullable=True),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('audio_hash')
+    )
+
+
+def downgrade():
+    op.drop_table('audio_transcript')
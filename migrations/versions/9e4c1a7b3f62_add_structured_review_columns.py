@@ -0,0 +1,30 @@
+"""Add structured review columns to answer
+
+Revision ID: 9e4c1a7b3f62
+Revises: 2d7a4f0c8e15
+Create Date: 2026-10-18 19:48:21.376054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4c1a7b3f62'
+down_revision = '2d7a4f0c8e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('review_overall', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('review_strengths', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('review_improvements', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_column('review_improvements')
+        batch_op.drop_column('review_strengths')
+        batch_op.drop_column('review_overall')
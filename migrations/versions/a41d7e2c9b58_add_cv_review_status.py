@@ -0,0 +1,29 @@
+"""Add review status to CVs
+
+Revision ID: a41d7e2c9b58
+Revises: 5e0a9d3b7c21
+Create Date: 2026-10-18 15:02:17.316492
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d7e2c9b58'
+down_revision = '5e0a9d3b7c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cv', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('review_status', sa.String(length=20), nullable=True))
+
+    # CVs uploaded before background processing were reviewed inline
+    op.execute("UPDATE cv SET review_status = 'completed' WHERE review IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('cv', schema=None) as batch_op:
+        batch_op.drop_column('review_status')
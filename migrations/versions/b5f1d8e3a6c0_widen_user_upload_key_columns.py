@@ -0,0 +1,40 @@
+"""Widen user upload columns to hold storage keys
+
+Revision ID: b5f1d8e3a6c0
+Revises: 7c3e9a15d2f8
+Create Date: 2026-10-18 18:34:09.215847
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f1d8e3a6c0'
+down_revision = '7c3e9a15d2f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('profile_picture',
+               existing_type=sa.String(length=100),
+               type_=sa.String(length=255),
+               existing_nullable=True)
+        batch_op.alter_column('actual_cv',
+               existing_type=sa.String(length=100),
+               type_=sa.String(length=255),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('actual_cv',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=100),
+               existing_nullable=True)
+        batch_op.alter_column('profile_picture',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=100),
+               existing_nullable=True)
@@ -0,0 +1,36 @@
+"""Add content hash and size columns for uploads
+
+Revision ID: c27d5f90ab13
+Revises: 8b41e6c2d9a7
+Create Date: 2026-10-18 13:05:52.630174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27d5f90ab13'
+down_revision = '8b41e6c2d9a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('audio_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('audio_size', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('cv', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('file_size', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('cv', schema=None) as batch_op:
+        batch_op.drop_column('file_size')
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_column('audio_size')
+        batch_op.drop_column('audio_hash')
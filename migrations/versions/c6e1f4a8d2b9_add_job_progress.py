@@ -0,0 +1,26 @@
+"""Add progress to jobs
+
+Revision ID: c6e1f4a8d2b9
+Revises: 4f8b2d6e1c37
+Create Date: 2026-10-18 18:41:09.527316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e1f4a8d2b9'
+down_revision = '4f8b2d6e1c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('progress', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('progress')
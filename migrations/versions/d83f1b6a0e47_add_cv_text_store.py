@@ -0,0 +1,32 @@
+"""Add extracted CV text store
+
+Revision ID: d83f1b6a0e47
+Revises: a41d7e2c9b58
+Create Date: 2026-10-18 15:48:03.571926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83f1b6a0e47'
+down_revision = 'a41d7e2c9b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cv_text',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('page_count', sa.Integer(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+
+
+def downgrade():
+    op.drop_table('cv_text')
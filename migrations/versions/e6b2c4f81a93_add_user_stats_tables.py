@@ -0,0 +1,44 @@
+"""Add per-user summary statistics tables
+
+Revision ID: e6b2c4f81a93
+Revises: d83f1b6a0e47
+Create Date: 2026-10-18 17:21:44.902318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b2c4f81a93'
+down_revision = 'd83f1b6a0e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('interview_count', sa.Integer(), nullable=False),
+    sa.Column('completed_interview_count', sa.Integer(), nullable=False),
+    sa.Column('cv_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('user_rating_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('profession_id', sa.Integer(), nullable=False),
+    sa.Column('grade', sa.String(length=20), nullable=False),
+    sa.Column('completed_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Float(), nullable=False),
+    sa.Column('best_rating', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['profession_id'], ['profession.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'profession_id', 'grade')
+    )
+
+
+def downgrade():
+    op.drop_table('user_rating_stats')
+    op.drop_table('user_stats')
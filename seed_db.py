@@ -2,6 +2,7 @@ import json
 import os
 from app import create_app, db
 from app.models import Profession, Question
+from app.services.catalog_service import invalidate_catalog
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -61,6 +62,9 @@ def seed_database():
         # Commit all changes
         db.session.commit()
         
+        # Make running web processes reload the catalog question counts
+        invalidate_catalog()
+        
         # Print summary
         print(f"Database seeded with {len(professions)} professions and {len(questions_data)} questions.")
 
@@ -0,0 +1,94 @@
+import os
+import pytest
+
+# create_app configures the Gemini client, which needs a key; no test calls the real API
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key')
+
+from app import create_app, db
+from app.models import User, Profession, Question, Interview, Answer
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh SQLite file, with background workers, caches and the usage ledger off."""
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        STORAGE_LOCAL_ROOT = str(tmp_path / 'uploads')
+        CATALOG_VERSION_FILE = str(tmp_path / '.catalog_version')
+        GEMINI_CACHE_BACKEND = 'none'
+        USAGE_LEDGER_ENABLED = False
+        JOB_QUEUE_BACKEND = 'database'
+        JOB_QUEUE_START_WORKERS = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope='session')
+def _metric_objects():
+    # prometheus_client registers metrics globally, so create them once per test run
+    from app.services import metrics
+    return metrics._metrics or metrics._Metrics()
+
+
+@pytest.fixture
+def prometheus_metrics(_metric_objects, monkeypatch):
+    """Turn the record_* helpers on; read samples from prometheus_client.REGISTRY."""
+    from app.services import metrics
+    monkeypatch.setattr(metrics, '_metrics', _metric_objects)
+    return _metric_objects
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(full_name='Test User', email='test@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def make_interview(user):
+    """Factory creating an interview for `user` with one answer per question."""
+    user_id = user.id
+
+    def make(questions=3, grade='Junior', profession_name='Python Developer', **fields):
+        profession = Profession.query.filter_by(name=profession_name).first()
+        if profession is None:
+            profession = Profession(name=profession_name)
+            db.session.add(profession)
+            db.session.flush()
+
+        interview = Interview(user_id=user_id, profession_id=profession.id, grade=grade, **fields)
+        db.session.add(interview)
+        db.session.flush()
+        for i in range(questions):
+            question = Question(profession_id=profession.id, grade=grade, question_text=f"Question {i + 1}?")
+            db.session.add(question)
+            db.session.flush()
+            db.session.add(Answer(interview_id=interview.id, question_id=question.id))
+        db.session.commit()
+        return interview
+    return make
+
+
+@pytest.fixture
+def auth_client(client, user):
+    """A test client logged in as `user` without going through the login form."""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,103 @@
+import io
+import json
+import threading
+import time
+from app.models import Job
+from app.routes import interview as interview_routes
+from app.services.job_queue import job_queue
+
+
+def parse_events(body):
+    """Split a Server-Sent Events body into (event, data) pairs, skipping comments."""
+    events = []
+    for block in body.split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def post_answer(app, client, answer_id):
+    with app.app_context():
+        response = client.post(
+            f'/interview/submit_answer/{answer_id}/stream',
+            data={'audio': (io.BytesIO(b'fake audio'), 'recording.webm')},
+            content_type='multipart/form-data'
+        )
+        return response.status_code, parse_events(response.get_data(as_text=True))
+
+
+def run_worker(app, monkeypatch):
+    """Run one queued job on a database-backend poller thread, as a separate worker would."""
+    monkeypatch.setattr(job_queue.backend, 'poll_interval', 0.05)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=job_queue.backend.work, args=(stop_event, 1), daemon=True)
+    thread.start()
+    return stop_event, thread
+
+
+def test_stream_relays_job_progress(app, auth_client, make_interview, monkeypatch):
+    interview = make_interview(questions=1)
+    answer_id = interview.answers[0].id
+    request_thread = threading.current_thread()
+    chunks = ["**Technical Score:** 4\n", "Clear answer. ", "Mention edge cases."]
+    ran_on = []
+
+    def fake_stream_answer(answer_id, audio_path):
+        ran_on.append(threading.current_thread())
+        yield 'transcribed', {'transcript': "My answer"}
+        for text in chunks:
+            time.sleep(0.2)
+            yield 'feedback', {'text': text}
+        yield 'complete', {'answer_id': answer_id, 'interview_id': interview.id,
+                           'feedback': "".join(chunks), 'rating': 4.0}
+
+    monkeypatch.setattr(interview_routes.interview_service, 'stream_answer', fake_stream_answer)
+    monkeypatch.setattr(interview_routes, 'PROGRESS_REPORT_INTERVAL', 0)
+    app.config['JOB_STREAM_POLL_INTERVAL'] = 0.05
+    stop_event, worker = run_worker(app, monkeypatch)
+
+    status, events = post_answer(app, auth_client, answer_id)
+    stop_event.set()
+    worker.join(timeout=5)
+
+    names = [event for event, _ in events]
+    assert status == 200
+    assert names[0] == 'uploaded' and names[-1] == 'complete'
+    assert 'started' in names and 'transcribed' in names
+
+    # The review was relayed while it was being written, not only at the end
+    feedback = "".join(data['text'] for event, data in events if event == 'feedback')
+    assert names.index('feedback') < names.index('complete')
+    assert "".join(chunks).startswith(feedback) and feedback
+
+    complete = events[-1][1]
+    assert complete['success'] is True
+    assert complete['rating'] == 4.0
+    assert complete['next_url'] == f'/interview/process/{interview.id}'
+
+    # The pipeline ran on the worker, not in the request
+    assert ran_on and ran_on[0] is not request_thread
+    assert Job.query.filter_by(job_type='process_answer').one().status == 'completed'
+
+
+def test_stream_reports_failed_job(app, auth_client, make_interview, monkeypatch):
+    interview = make_interview(questions=1)
+    answer_id = interview.answers[0].id
+
+    def fake_stream_answer(answer_id, audio_path):
+        yield 'error', {'error': "AI service encountered an issue (ValueError). Please try again later."}
+
+    monkeypatch.setattr(interview_routes.interview_service, 'stream_answer', fake_stream_answer)
+    app.config['JOB_STREAM_POLL_INTERVAL'] = 0.05
+    stop_event, worker = run_worker(app, monkeypatch)
+
+    status, events = post_answer(app, auth_client, answer_id)
+    stop_event.set()
+    worker.join(timeout=5)
+
+    assert status == 200
+    assert events[-1] == ('error', {
+        'success': False,
+        'error': "AI service encountered an issue (ValueError). Please try again later."
+    })
@@ -0,0 +1,40 @@
+import os
+from app import db
+from app.models import Profession, Question
+from app.services.catalog_service import catalog_version
+from app.services.question_sampler import question_sampler
+
+
+def test_catalog_version_changes_only_when_question_changes_commit(app):
+    profession = Profession(name='Go Developer')
+    db.session.add(profession)
+    db.session.commit()
+    # Backdate the file so the next touch changes its mtime whatever the clock's resolution
+    os.utime(app.config['CATALOG_VERSION_FILE'], (0, 0))
+    committed = catalog_version()
+
+    db.session.add(Question(profession_id=profession.id, grade='Junior', question_text='What is a goroutine?'))
+    db.session.flush()
+    assert catalog_version() == committed
+
+    db.session.rollback()
+    db.session.commit()
+    assert catalog_version() == committed
+
+    db.session.add(Question(profession_id=profession.id, grade='Junior', question_text='What is a channel?'))
+    db.session.commit()
+    assert catalog_version() != committed
+
+
+def test_question_changes_reach_the_sampler_without_a_version_file(app):
+    # Without the file the version never changes, so only the in-process invalidation can reload the pools
+    app.config['CATALOG_VERSION_FILE'] = None
+    profession = Profession(name='Rust Developer')
+    db.session.add(profession)
+    db.session.commit()
+    assert question_sampler.sample(profession.id, 'Junior', 5) == []
+
+    question = Question(profession_id=profession.id, grade='Junior', question_text='What is ownership?')
+    db.session.add(question)
+    db.session.commit()
+    assert question_sampler.sample(profession.id, 'Junior', 5) == [question.id]
@@ -0,0 +1,18 @@
+from app import db
+from app.models import CVText, User
+from app.services.cv_service import CVService
+
+
+def test_text_store_leaves_the_commit_to_the_caller(app, user):
+    db.session.add(CVText(content_hash='a' * 64, text='Stored text.', page_count=1, hit_count=0))
+    db.session.commit()
+
+    # Pending work of the caller, e.g. the CV being reviewed
+    user.full_name = 'Renamed User'
+    assert CVService._get_stored_text('a' * 64) == 'Stored text.'
+    CVService._store_text('b' * 64, 'New text.', 2)
+    db.session.rollback()
+
+    assert db.session.get(User, user.id).full_name == 'Test User'
+    assert db.session.get(CVText, 'a' * 64).hit_count == 0
+    assert db.session.get(CVText, 'b' * 64) is None
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from app import db
+from app.services.history_service import decode_cursor, encode_cursor, get_history_page
+
+
+def make_history(make_interview, count):
+    """Create interviews in pairs that share a created_at, so the id tiebreak matters."""
+    start = datetime(2026, 1, 1)
+    interviews = [make_interview(questions=0) for _ in range(count)]
+    for i, interview in enumerate(interviews):
+        interview.created_at = start + timedelta(minutes=i // 2)
+    db.session.commit()
+    # Newest first, ties broken by the higher id
+    return sorted(interviews, key=lambda interview: (interview.created_at, interview.id), reverse=True)
+
+
+def test_cursor_round_trip(make_interview):
+    interview = make_interview(questions=0)
+    assert decode_cursor(encode_cursor(interview)) == (interview.created_at, interview.id)
+
+
+def test_malformed_cursor_is_ignored(make_interview):
+    expected = make_history(make_interview, 3)
+
+    assert decode_cursor('not-a-cursor') is None
+    page = get_history_page(expected[0].user_id, after='not-a-cursor', per_page=2)
+    assert [item.id for item in page.items] == [interview.id for interview in expected[:2]]
+    assert not page.has_prev
+
+
+def test_paging_forwards_visits_every_interview_once(make_interview):
+    expected = make_history(make_interview, 7)
+    user_id = expected[0].user_id
+
+    seen = []
+    pages = 0
+    page = get_history_page(user_id, per_page=3)
+    while True:
+        pages += 1
+        seen.extend(item.id for item in page.items)
+        if not page.has_next:
+            break
+        page = get_history_page(user_id, after=page.next_cursor, per_page=3)
+
+    assert seen == [interview.id for interview in expected]
+    assert pages == 3
+    assert page.total == 7
+
+
+def test_paging_backwards_returns_the_previous_page(make_interview):
+    expected = make_history(make_interview, 7)
+    user_id = expected[0].user_id
+
+    first = get_history_page(user_id, per_page=3)
+    second = get_history_page(user_id, after=first.next_cursor, per_page=3)
+    back = get_history_page(user_id, before=second.prev_cursor, per_page=3)
+
+    assert [item.id for item in second.items] == [interview.id for interview in expected[3:6]]
+    assert [item.id for item in back.items] == [item.id for item in first.items]
+    assert back.has_next and not back.has_prev
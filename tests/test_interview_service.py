@@ -0,0 +1,111 @@
+import json
+import pytest
+from app import db
+from app.models import Answer
+from app.services.interview_service import InterviewService, extract_rating
+
+
+@pytest.fixture
+def service():
+    return InterviewService()
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("The two-call pipeline should not run")
+
+
+def test_stream_answer_uses_the_fused_pipeline(app, service, make_interview, monkeypatch):
+    app.config['INTERVIEW_PIPELINE_MODE'] = 'fused'
+    answer = make_interview(questions=1).answers[0]
+    monkeypatch.setattr(service, '_transcribe_and_review', lambda *args: {
+        'transcript': 'I would use a dict.', 'feedback': 'Solid answer.', 'score': 4.5
+    })
+    monkeypatch.setattr(service.transcription_service, 'transcribe', fail)
+
+    events = list(service.stream_answer(answer.id, 'audio/answer.webm'))
+
+    assert [event for event, _ in events] == ['transcribed', 'feedback', 'complete']
+    assert events[1][1] == {'text': 'Solid answer.'}
+    assert events[2][1]['rating'] == 4.5
+    answer = db.session.get(Answer, answer.id)
+    assert (answer.transcribed_text, answer.feedback, answer.rating) == ('I would use a dict.', 'Solid answer.', 4.5)
+
+
+def test_fused_result_without_a_score_keeps_the_rating_parsed_from_the_feedback(app, service, make_interview, monkeypatch):
+    app.config['INTERVIEW_PIPELINE_MODE'] = 'fused'
+    answer = make_interview(questions=1).answers[0]
+    monkeypatch.setattr(service, '_transcribe_and_review', lambda *args: {
+        'transcript': 'A transcript.', 'feedback': '**Technical Score:** 3\nGood start.', 'score': None
+    })
+
+    answer, error = service.process_answer(answer.id, 'audio/answer.webm')
+
+    assert error is None
+    assert answer.rating == 3.0
+
+
+REVIEW = {
+    'overall': 'Correct and concise.',
+    'strengths': ['Knows dict lookups are O(1)'],
+    'improvements': ['Mention hash collisions'],
+    'score': 4.0
+}
+
+
+def test_parse_structured_review_accepts_the_schema(service):
+    fenced = "```json\n" + json.dumps(REVIEW) + "\n```"
+    assert service.gemini_service.parse_structured_review(fenced) == REVIEW
+
+
+@pytest.mark.parametrize('response_text', [
+    json.dumps(dict(REVIEW, extra='field')),
+    json.dumps({key: value for key, value in REVIEW.items() if key != 'improvements'}),
+    json.dumps(dict(REVIEW, overall='  ')),
+    json.dumps(dict(REVIEW, strengths=['fine', 3])),
+    json.dumps(dict(REVIEW, score=True)),
+    json.dumps(dict(REVIEW, score=6)),
+    json.dumps([REVIEW]),
+    '{"overall": "cut off',
+    'Error: AI service encountered an issue (ServiceUnavailable). Please try again later.',
+])
+def test_parse_structured_review_rejects_anything_else(service, response_text):
+    assert service.gemini_service.parse_structured_review(response_text) is None
+
+
+def test_formatted_structured_review_keeps_a_parseable_score(service):
+    feedback = service.gemini_service.format_structured_review(REVIEW)
+    assert extract_rating(feedback) == 4.0
+
+
+def test_stream_answer_stores_structured_reviews(app, service, make_interview, monkeypatch):
+    app.config['REVIEW_OUTPUT_MODE'] = 'structured'
+    answer = make_interview(questions=1).answers[0]
+    monkeypatch.setattr(service.transcription_service, 'transcribe', lambda *args, **kwargs: 'I would use a dict.')
+    monkeypatch.setattr(service.gemini_service, 'review_interview_answer_structured', lambda *args: REVIEW)
+    monkeypatch.setattr(service.gemini_service, 'stream_interview_answer_review', fail)
+
+    events = list(service.stream_answer(answer.id, 'audio/answer.webm'))
+
+    assert [event for event, _ in events] == ['transcribed', 'feedback', 'complete']
+    answer = db.session.get(Answer, answer.id)
+    assert events[1][1] == {'text': answer.feedback}
+    assert answer.review_overall == REVIEW['overall']
+    assert answer.review_strengths == REVIEW['strengths']
+    assert answer.review_improvements == REVIEW['improvements']
+    assert answer.rating == 4.0
+
+
+def test_unparseable_structured_review_falls_back_to_a_streamed_markdown_review(app, service, make_interview, monkeypatch):
+    app.config['REVIEW_OUTPUT_MODE'] = 'structured'
+    answer = make_interview(questions=1).answers[0]
+    monkeypatch.setattr(service.transcription_service, 'transcribe', lambda *args, **kwargs: 'I would use a dict.')
+    monkeypatch.setattr(service.gemini_service, 'review_interview_answer_structured', lambda *args: None)
+    monkeypatch.setattr(service.gemini_service, 'stream_interview_answer_review',
+                        lambda *args: iter(["**Technical Score:** 2\n", "Too vague."]))
+
+    answer, error = service.process_answer(answer.id, 'audio/answer.webm')
+
+    assert error is None
+    assert answer.feedback == "**Technical Score:** 2\nToo vague."
+    assert answer.review_overall is None
+    assert answer.rating == 2.0
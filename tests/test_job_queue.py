@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models import CV, Job
+from app.services.job_queue import STALE_JOB_ERROR, ThreadPoolBackend, job_queue
+
+
+def add_job(job_type='process_answer', status='queued', payload=None, **fields):
+    job = Job(id=f"job-{Job.query.count() + 1}", job_type=job_type, status=status,
+              payload=json.dumps(payload or {}), **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_only_one_worker_claims_a_job(app):
+    job_id = add_job()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def claim():
+        with app.app_context():
+            barrier.wait()
+            results.append(job_queue.claim_job(job_id))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert db.session.get(Job, job_id).status == 'running'
+
+
+def test_claim_job_ignores_jobs_that_are_not_queued(app):
+    job_id = add_job(status='completed')
+
+    assert job_queue.claim_job(job_id) is False
+    assert db.session.get(Job, job_id).status == 'completed'
+
+
+def test_stale_running_jobs_are_failed_with_their_records(app, user):
+    cv = CV(user_id=user.id, filename='cv.pdf', file_path='cvs/cv.pdf', review_status='processing')
+    db.session.add(cv)
+    db.session.commit()
+    stale_id = add_job('process_cv', status='running', payload={'cv_id': cv.id},
+                       started_at=datetime.utcnow() - timedelta(seconds=app.config['JOB_QUEUE_STALE_SECONDS'] + 60))
+    fresh_id = add_job('process_cv', status='running', payload={'cv_id': cv.id}, started_at=datetime.utcnow())
+
+    assert job_queue.reap_stale_jobs() == 1
+
+    db.session.expire_all()
+    stale = db.session.get(Job, stale_id)
+    assert (stale.status, stale.error) == ('failed', STALE_JOB_ERROR)
+    assert db.session.get(Job, fresh_id).status == 'running'
+    assert db.session.get(CV, cv.id).review_status == 'failed'
+
+
+def test_thread_backend_runs_jobs_left_queued_by_a_previous_process(app, monkeypatch):
+    calls = []
+
+    def echo(value):
+        calls.append(value)
+        return {'value': value}
+
+    monkeypatch.setitem(job_queue._handlers, 'test_echo', echo)
+
+    job_id = add_job('test_echo', payload={'value': 42})
+    backend = ThreadPoolBackend(app, job_queue)
+    backend.start()
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        if db.session.get(Job, job_id).status == 'completed':
+            break
+        time.sleep(0.05)
+
+    assert calls == [42]
+    assert db.session.get(Job, job_id).get_result() == {'value': 42}
+
+
+def test_a_reaped_job_stays_failed_when_its_handler_finishes_late(app, monkeypatch):
+    def slow(value):
+        # The reaper gives up on the job while the handler is still running
+        Job.query.filter_by(status='running').update({
+            'status': 'failed', 'error': STALE_JOB_ERROR, 'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return {'value': value}
+
+    monkeypatch.setitem(job_queue._handlers, 'test_slow', slow)
+
+    job_id = add_job('test_slow', payload={'value': 1})
+    assert job_queue.claim_job(job_id)
+    job_queue.run_job(job_id)
+    db.session.expire_all()
+
+    job = db.session.get(Job, job_id)
+    assert job.status == 'failed'
+    assert job.error == STALE_JOB_ERROR
+    assert job.result is None
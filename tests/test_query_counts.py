@@ -0,0 +1,51 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.models import User
+from app.query_counter import QueryCounter, assert_max_queries
+
+
+def count_queries(app, client, url):
+    """Request `url` in its own app context (a fresh session and current_user) and count its queries."""
+    with app.app_context(), QueryCounter() as counter:
+        response = client.get(url)
+    assert response.status_code == 200
+    return counter.count
+
+
+def completed_interview(make_interview, questions=5):
+    return make_interview(questions=questions, overall_rating=3.5, completed_at=datetime.utcnow())
+
+
+@pytest.mark.parametrize('url', ['/history', '/history?min_rating=2'])
+def test_history_listing_does_not_query_per_interview(app, auth_client, make_interview, url):
+    completed_interview(make_interview)
+    # The first visit creates the user's summary rows; later visits are the steady state
+    count_queries(app, auth_client, url)
+    baseline = count_queries(app, auth_client, url)
+
+    for _ in range(8):
+        completed_interview(make_interview)
+
+    with app.app_context(), assert_max_queries(baseline):
+        assert auth_client.get(url).status_code == 200
+
+
+@pytest.mark.parametrize('url', [
+    '/history/detail/{id}',
+    '/interview/process/{id}',
+    '/interview/complete/{id}',
+])
+def test_interview_pages_do_not_query_per_answer(app, auth_client, make_interview, url):
+    baseline = count_queries(app, auth_client, url.format(id=completed_interview(make_interview, questions=1).id))
+    interview_id = completed_interview(make_interview, questions=10).id
+
+    with app.app_context(), assert_max_queries(baseline):
+        assert auth_client.get(url.format(id=interview_id)).status_code == 200
+
+
+def test_assert_max_queries_lists_the_statements_when_exceeded(app, user):
+    with pytest.raises(AssertionError, match=r"at most 1 queries, got 2:\n  1\. SELECT"):
+        with assert_max_queries(1):
+            db.session.query(User).count()
+            db.session.query(User).count()
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import pytest
+from google.api_core import exceptions as google_exceptions
+from app.services.rate_limiter import GeminiRateLimiter, is_retryable_error
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+@pytest.mark.parametrize('error', [
+    google_exceptions.ResourceExhausted("Quota exceeded"),
+    google_exceptions.ServiceUnavailable("The service is currently unavailable."),
+    google_exceptions.InternalServerError("Internal error"),
+    google_exceptions.DeadlineExceeded("Deadline exceeded"),
+    ConnectionError("Connection reset"),
+    HTTPError(503),
+])
+def test_rate_limits_and_server_errors_are_retried(error):
+    assert is_retryable_error(error)
+
+
+@pytest.mark.parametrize('error', [
+    google_exceptions.InvalidArgument("Request contains 1500 tokens, more than the 500 allowed"),
+    google_exceptions.PermissionDenied("API key not valid"),
+    ValueError("Response has 500 candidates"),
+    HTTPError(400),
+])
+def test_client_errors_are_not_retried_whatever_their_message(error):
+    assert not is_retryable_error(error)
+
+
+def make_limiter(**kwargs):
+    return GeminiRateLimiter(max_concurrency=2, requests_per_minute=0, tokens_per_minute=0,
+                             backoff_base=0.0, backoff_max=0.0, **kwargs)
+
+
+def test_call_retries_until_the_call_succeeds():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise google_exceptions.ServiceUnavailable("try again")
+        return 'ok'
+
+    assert make_limiter(max_retries=3).call(flaky) == 'ok'
+    assert len(attempts) == 3
+
+
+def test_call_raises_non_retryable_errors_immediately():
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise google_exceptions.InvalidArgument("500 is not a valid value")
+
+    with pytest.raises(google_exceptions.InvalidArgument):
+        make_limiter(max_retries=3).call(invalid)
+    assert len(attempts) == 1
+
+
+def test_sync_call_times_out_but_keeps_its_slot_until_it_returns():
+    limiter = make_limiter(max_retries=0, timeout=0.1)
+    release = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        limiter.call(release.wait, 5)
+    assert limiter.stats()['in_flight'] == 1
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while limiter.stats()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert limiter.stats()['in_flight'] == 0
+
+
+def test_sync_and_async_calls_share_the_concurrency_cap():
+    limiter = make_limiter(max_retries=0, timeout=5)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def enter():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+
+    def leave():
+        with lock:
+            running.pop()
+
+    def sync_call():
+        enter()
+        time.sleep(0.05)
+        leave()
+
+    async def async_call():
+        enter()
+        await asyncio.sleep(0.05)
+        leave()
+
+    async def run_async_calls():
+        await asyncio.gather(*(limiter.async_call(async_call) for _ in range(4)))
+
+    threads = [threading.Thread(target=limiter.call, args=(sync_call,)) for _ in range(4)]
+    threads.append(threading.Thread(target=asyncio.run, args=(run_async_calls(),)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(peak) == 8
+    assert max(peak) == 2
+
+
+def test_limiter_wait_is_exported_as_a_metric(prometheus_metrics):
+    from prometheus_client import REGISTRY
+
+    before = REGISTRY.get_sample_value('gemini_limiter_wait_seconds_count') or 0
+
+    make_limiter().call(lambda: 'ok')
+
+    assert REGISTRY.get_sample_value('gemini_limiter_wait_seconds_count') == before + 1
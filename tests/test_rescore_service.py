@@ -0,0 +1,29 @@
+from datetime import datetime
+from app import db
+from app.models import Answer, Interview
+from app.services.rescore_service import AnswerRescorer, RescoreCheckpoint
+
+
+def test_review_without_a_score_keeps_the_previous_rating(app, make_interview, tmp_path, monkeypatch):
+    interview = make_interview(questions=2, completed_at=datetime.utcnow(), overall_rating=3.0)
+    for answer in interview.answers:
+        answer.transcribed_text = 'An answer.'
+        answer.feedback = '**Technical Score:** 3'
+        answer.rating = 3.0
+    db.session.commit()
+    scored, unscored = sorted(answer.id for answer in interview.answers)
+
+    rescorer = AnswerRescorer(RescoreCheckpoint(str(tmp_path / 'checkpoint.json')))
+
+    async def review_answers(pairs, *args, **kwargs):
+        return ["**Technical Score:** 5\nGreat.", "Great answer, no score given."]
+
+    monkeypatch.setattr(rescorer.gemini_service, 'review_answers', review_answers)
+    rescorer.run()
+    db.session.expire_all()
+
+    assert db.session.get(Answer, scored).rating == 5.0
+    answer = db.session.get(Answer, unscored)
+    assert answer.feedback == "Great answer, no score given."
+    assert answer.rating == 3.0
+    assert db.session.get(Interview, interview.id).overall_rating == 4.0
@@ -0,0 +1,76 @@
+import pytest
+from app.services.response_cache import MemoryResponseCache, SQLiteResponseCache, make_cache_key
+
+
+def test_cache_key_is_stable_and_ignores_generation_config_order():
+    first = make_cache_key('gemini', 'prompt', {'temperature': 0.2, 'max_output_tokens': 512})
+    second = make_cache_key('gemini', 'prompt', {'max_output_tokens': 512, 'temperature': 0.2})
+
+    assert first == second
+
+
+@pytest.mark.parametrize('other', [
+    ('gemini-pro', 'prompt', None),
+    ('gemini', 'prompt.', None),
+    ('gemini', 'prompt', {'temperature': 0.2}),
+])
+def test_cache_key_changes_with_model_prompt_and_config(other):
+    assert make_cache_key('gemini', 'prompt', None) != make_cache_key(*other)
+
+
+def test_cache_key_separates_prompt_parts():
+    assert make_cache_key('gemini', ['ab', 'c']) != make_cache_key('gemini', ['a', 'bc'])
+
+
+def test_cache_key_covers_inline_audio_bytes_and_mime_type():
+    audio = {'mime_type': 'audio/webm', 'data': b'\x00\x01'}
+
+    assert make_cache_key('gemini', ['prompt', audio]) == make_cache_key('gemini', ['prompt', dict(audio)])
+    assert make_cache_key('gemini', ['prompt', audio]) != make_cache_key('gemini', ['prompt', dict(audio, data=b'\x00\x02')])
+    assert make_cache_key('gemini', ['prompt', audio]) != make_cache_key('gemini', ['prompt', dict(audio, mime_type='audio/ogg')])
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteResponseCache(ttl=60, max_entries=2, path=str(tmp_path / 'cache' / 'gemini_cache.db'))
+    return MemoryResponseCache(ttl=60, max_entries=2)
+
+
+def test_cache_never_stores_errors(cache):
+    cache.set('key', 'Error: quota exceeded')
+
+    assert cache.get('key') is None
+
+
+def test_cache_evicts_the_least_recently_used_entry(cache):
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.set('c', 'C')
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('A', 'C')
+
+
+def test_cache_expires_entries(cache, monkeypatch):
+    cache.set('key', 'value')
+    monkeypatch.setattr('app.services.response_cache.time.time', lambda: 10 ** 12)
+
+    assert cache.get('key') is None
+
+
+def test_lookups_are_exported_as_a_metric(prometheus_metrics):
+    from prometheus_client import REGISTRY
+
+    def lookups(result):
+        return REGISTRY.get_sample_value('gemini_cache_lookups_total', {'backend': 'memory', 'result': result}) or 0
+
+    cache = MemoryResponseCache(ttl=60, max_entries=10)
+    hits, misses = lookups('hit'), lookups('miss')
+    cache.get('key')
+    cache.set('key', 'Review text')
+    cache.get('key')
+
+    assert lookups('hit') == hits + 1
+    assert lookups('miss') == misses + 1
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import UserRatingStats, UserStats
+from app.services import stats_service
+
+
+def test_refresh_rating_stats_marks_the_user_stats_row_as_updated(make_interview):
+    interview = make_interview(completed_at=datetime.utcnow(), overall_rating=2.0)
+    stats_service.rebuild_user_stats([interview.user_id])
+    stale = datetime.utcnow() - timedelta(days=1)
+    db.session.get(UserStats, interview.user_id).updated_at = stale
+    db.session.commit()
+
+    interview.overall_rating = 4.0
+    stats_service.refresh_rating_stats([interview.id])
+    db.session.commit()
+    db.session.expire_all()
+
+    rating_stats = UserRatingStats.query.filter_by(user_id=interview.user_id).one()
+    assert rating_stats.best_rating == 4.0
+    assert rating_stats.rating_sum == 4.0
+    assert db.session.get(UserStats, interview.user_id).updated_at > stale
@@ -0,0 +1,51 @@
+import io
+import pytest
+from app.services.storage import Storage, get_storage, send_stored_file
+
+CONTENT = b'0123456789'
+
+
+@pytest.fixture
+def stored_key(app):
+    key = 'audio/range-test.webm'
+    get_storage().save(key, io.BytesIO(CONTENT))
+    return key
+
+
+def send(app, key, range_header):
+    with app.test_request_context(headers={'Range': range_header}):
+        response = send_stored_file(key)
+        response.direct_passthrough = False
+        return response
+
+
+def test_single_range_is_served_partially(app, stored_key):
+    response = send(app, stored_key, 'bytes=2-5')
+
+    assert response.status_code == 206
+    assert response.get_data() == b'2345'
+    assert response.headers['Content-Range'] == 'bytes 2-5/10'
+
+
+def test_multiple_ranges_get_the_whole_file(app, stored_key):
+    response = send(app, stored_key, 'bytes=0-1,4-5')
+
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
+    assert 'Content-Range' not in response.headers
+
+
+def test_single_range_past_the_end_is_unsatisfiable(app, stored_key):
+    response = send(app, stored_key, 'bytes=20-30')
+
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == 'bytes */10'
+
+
+def test_incomplete_backend_cannot_be_created(tmp_path):
+    class PartialStorage(Storage):
+        def save(self, key, stream):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStorage(str(tmp_path), 1024)
@@ -0,0 +1,34 @@
+from app import db
+from app.models import Answer, AudioTranscript
+from app.services.transcription_service import TranscriptionService
+
+
+def test_transcript_cache_leaves_the_commit_to_the_caller(app, make_interview):
+    service = TranscriptionService()
+    answer = make_interview(questions=1).answers[0]
+    db.session.add(AudioTranscript(audio_hash='a' * 64, transcript='Cached transcript.', mime_type='audio/webm', size_bytes=10))
+    db.session.commit()
+
+    # Pending work of the caller, e.g. the answer being processed
+    answer.feedback = 'Not reviewed yet'
+    assert service._get_cached_transcript('a' * 64) == 'Cached transcript.'
+    service._store_transcript('b' * 64, 'New transcript.', 'audio/webm', 10)
+    db.session.rollback()
+
+    assert db.session.get(Answer, answer.id).feedback is None
+    assert db.session.get(AudioTranscript, 'a' * 64).hit_count == 0
+    assert db.session.get(AudioTranscript, 'b' * 64) is None
+
+
+def test_storing_a_duplicate_transcript_keeps_the_callers_changes(app, make_interview):
+    service = TranscriptionService()
+    answer = make_interview(questions=1).answers[0]
+    db.session.add(AudioTranscript(audio_hash='a' * 64, transcript='First.', mime_type='audio/webm', size_bytes=10))
+    db.session.commit()
+
+    answer.transcribed_text = 'Second.'
+    service._store_transcript('a' * 64, 'Second.', 'audio/webm', 10)
+    db.session.commit()
+
+    assert db.session.get(Answer, answer.id).transcribed_text == 'Second.'
+    assert db.session.get(AudioTranscript, 'a' * 64).transcript == 'First.'
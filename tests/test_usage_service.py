@@ -0,0 +1,19 @@
+import time
+from app import db
+from app.models import GeminiUsage
+from app.services.usage_service import UsageLedger
+
+
+def test_partial_batches_are_written_without_another_call(app):
+    app.config['USAGE_LEDGER_ENABLED'] = True
+    ledger = UsageLedger(batch_size=20, flush_interval=0.1)
+    try:
+        ledger.add({'call_type': 'transcription', 'model': 'gemini-test', 'user_id': None})
+
+        deadline = time.monotonic() + 5
+        while not db.session.query(GeminiUsage).count() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        ledger.stop()
+
+    assert db.session.query(GeminiUsage).count() == 1